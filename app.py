@@ -1,18 +1,28 @@
 """Flask 메인 애플리케이션"""
 import logging
-from flask import Flask, request, jsonify, render_template
+import queue
+import time
+from flask import Flask, Response, request, jsonify, render_template, make_response
 from flask_session import Session
 from services.counselor_service import CounselorService
 from services.firestore_service import FirestoreService
 from services.persona_service import PersonaService
+from services.session_service import SessionService, get_session_write_metrics
+from services.structured_output import get_structured_output_metrics
+from services.json_provider import AppJSONProvider
+from services.write_behind_service import WriteBehindService, WriteBehindDelayed, ConversationBlocked
+from services.warmup_service import WarmupService
+from services.log_setup import configure_logging, set_log_context
 from config import Config
 
-# Flask 앱 로깅 설정
-logging.basicConfig(level=logging.INFO)
+# Flask 앱 로깅 설정 (콘솔/파일 쓰기는 백그라운드 스레드에서)
+configure_logging()
 app_logger = logging.getLogger('werkzeug')
 app_logger.setLevel(logging.INFO)
 
 app = Flask(__name__)
+# 응답 직렬화 (datetime 등 변환, ?fields= 필드 마스크, gzip)
+app.json = AppJSONProvider(app)
 app.config.from_object(Config)
 app.config['SESSION_TYPE'] = 'filesystem'
 Session(app)
@@ -21,8 +31,49 @@ Session(app)
 counselor_service = CounselorService()
 firestore_service = FirestoreService()
 persona_service = PersonaService()
+session_service = SessionService()
 from services.module_service import ModuleService
 module_service = ModuleService()
+# 상담사 응답 write-behind (CHAT_WRITE_BEHIND=true이고 outbox 디스크가 인스턴스 교체 후에도 남을 때만)
+write_behind_service = None
+if Config.CHAT_WRITE_BEHIND and not Config.WRITE_BEHIND_DURABLE_DISK:
+    app_logger.warning("[WRITE_BEHIND] outbox 디스크가 휘발성이므로 write-behind를 끕니다 "
+                       "(영구 볼륨이면 WRITE_BEHIND_DURABLE_DISK=true)")
+elif Config.CHAT_WRITE_BEHIND:
+    write_behind_service = WriteBehindService(firestore_service, session_service, Config.WRITE_BEHIND_OUTBOX_PATH)
+# 턴 종료 시의 세션 쓰기(message_count, Task 완료 판단 로그)도 outbox로
+counselor_service.write_behind = write_behind_service
+# 이전 인스턴스가 끝내지 못한 백그라운드 작업 재실행 (워커 모드에서는 worker.py가 처리)
+if counselor_service.jobs.mode == 'inline':
+    counselor_service.jobs.replay_unfinished()
+# 첫 요청 전에 캐시 적재와 저장소/LLM 연결 수립 (완료되면 /ready가 200)
+warmup_service = WarmupService(counselor_service, module_service, persona_service, firestore_service)
+warmup_service.start()
+
+
+def _flush_pending_writes(conversation_id: str, for_write: bool = False) -> None:
+    """write-behind로 밀린 이 대화의 쓰기를 먼저 반영 (대화별 순서 보장)"""
+    if write_behind_service:
+        write_behind_service.flush_conversation(conversation_id, for_write=for_write)
+
+
+def _write_behind_error_response(error: Exception):
+    """밀린 쓰기 반영 실패 응답 (지연은 재시도 가능한 503, 차단된 대화는 409)"""
+    if isinstance(error, WriteBehindDelayed):
+        response = jsonify({'error': str(error)})
+        response.headers['Retry-After'] = str(Config.WRITE_BEHIND_RETRY_AFTER)
+        return response, 503
+    return jsonify({'error': str(error)}), 409
+
+
+@app.before_request
+def _bind_log_context():
+    """이 요청의 로그에 conversation_id 추가 (요청마다 교체하므로 이전 요청 값이 남지 않음)"""
+    conversation_id = (request.view_args or {}).get('conversation_id')
+    if conversation_id:
+        set_log_context(conversation_id=conversation_id)
+    else:
+        set_log_context()
 
 
 @app.route('/')
@@ -37,6 +88,13 @@ def health_check():
     return jsonify({'status': 'ok'}), 200
 
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """준비 상태 엔드포인트 (워밍업이 끝나면 200, 그 전에는 503 - Cloud Run 시작 프로브용)"""
+    status = warmup_service.status()
+    return jsonify(status), 200 if warmup_service.is_warm else 503
+
+
 @app.route('/api/conversations', methods=['POST'])
 def create_conversation():
     """새 대화 생성"""
@@ -85,8 +143,11 @@ def chat(conversation_id):
         if not user_message:
             return jsonify({'error': '메시지가 필요합니다.'}), 400
         
+        # 이전 턴의 상담사 응답이 아직 저장 중이면 먼저 반영
+        _flush_pending_writes(conversation_id, for_write=True)
+        
         # 사용자 메시지를 Firestore에 저장
-        firestore_service.add_message(conversation_id, 'user', user_message)
+        user_message_seq = firestore_service.add_message(conversation_id, 'user', user_message)
         
         # 대화 기록 가져오기
         conversation_history = firestore_service.get_conversation_history(conversation_id)
@@ -96,7 +157,7 @@ def chat(conversation_id):
         
         # 상담사 응답을 Firestore에 저장 (프롬프트 메타데이터 포함)
         prompt_metadata = {
-            'prompt': result.get('prompt', ''),
+            'prompt_ref': result.get('prompt_ref'),
             'current_task': result.get('current_task'),
             'current_part': result.get('current_part', 1),
             'current_module': result.get('current_module'),
@@ -113,17 +174,29 @@ def chat(conversation_id):
                 'needs_improvement': result['supervision'].get('needs_improvement', False)
             }
         
-        firestore_service.add_message(
-            conversation_id, 
-            'assistant', 
-            result['response'],
-            metadata=prompt_metadata
-        )
+        if write_behind_service:
+            # 응답을 먼저 반환하고 저장은 outbox를 통해 백그라운드에서
+            message_seq = write_behind_service.enqueue_message(
+                conversation_id,
+                'assistant',
+                result['response'],
+                metadata=prompt_metadata,
+                expected_seq=user_message_seq + 1
+            )
+        else:
+            message_seq = firestore_service.add_message(
+                conversation_id, 
+                'assistant', 
+                result['response'],
+                metadata=prompt_metadata
+            )
         
         # 응답에 메타데이터 포함
         response_data = {
             'conversation_id': conversation_id,
             'response': result['response'],
+            'user_message_seq': user_message_seq,
+            'message_seq': message_seq,
             'current_task': result.get('current_task'),
             'current_part': result.get('current_part', 1),
             'current_module': result.get('current_module')
@@ -138,6 +211,34 @@ def chat(conversation_id):
         
         return jsonify(response_data), 200
         
+    except (WriteBehindDelayed, ConversationBlocked) as e:
+        return _write_behind_error_response(e)
+    except Exception as e:
+        import traceback
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+
+@app.route('/api/conversations/<conversation_id>/messages', methods=['GET'])
+def list_messages(conversation_id):
+    """since 이후의 메시지만 가져오기 (?since=<seq>&limit=<n>&exclude=metadata.prompt)"""
+    try:
+        since = request.args.get('since', -1, type=int)
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+        exclude = [path for path in request.args.get('exclude', '').split(',') if path]
+        
+        _flush_pending_writes(conversation_id)
+        messages = firestore_service.get_messages(conversation_id, since, limit, exclude)
+        if messages is None:
+            return jsonify({'error': '대화를 찾을 수 없습니다.'}), 404
+        
+        return jsonify({
+            'conversation_id': conversation_id,
+            'messages': messages,
+            'last_seq': messages[-1]['seq'] if messages else since
+        }), 200
+        
+    except (WriteBehindDelayed, ConversationBlocked) as e:
+        return _write_behind_error_response(e)
     except Exception as e:
         import traceback
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
@@ -147,94 +248,199 @@ def chat(conversation_id):
 def get_conversation(conversation_id):
     """대화 가져오기"""
     try:
+        _flush_pending_writes(conversation_id)
         conversation = firestore_service.get_conversation(conversation_id)
         
         if not conversation:
             return jsonify({'error': '대화를 찾을 수 없습니다.'}), 404
         
-        # datetime 객체를 문자열로 변환
-        from datetime import datetime
-        if 'created_at' in conversation and isinstance(conversation['created_at'], datetime):
-            conversation['created_at'] = conversation['created_at'].isoformat()
-        if 'updated_at' in conversation and isinstance(conversation['updated_at'], datetime):
-            conversation['updated_at'] = conversation['updated_at'].isoformat()
-        # messages 내부의 timestamp도 변환
-        if 'messages' in conversation:
-            for msg in conversation['messages']:
-                if 'timestamp' in msg and isinstance(msg['timestamp'], datetime):
-                    msg['timestamp'] = msg['timestamp'].isoformat()
-        
         return jsonify(conversation), 200
         
+    except (WriteBehindDelayed, ConversationBlocked) as e:
+        return _write_behind_error_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/sessions/<conversation_id>', methods=['GET'])
 def get_session(conversation_id):
-    """상담 세션 정보 가져오기"""
+    """상담 세션 정보 가져오기 (기본은 요약, ?view=full이면 전체 문서)"""
     try:
-        from services.session_service import SessionService
-        from services.module_service import ModuleService
+        view = 'full' if request.args.get('view') == 'full' else 'summary'
+        
+        # 조건부 요청: version만 읽어 변경이 없으면 304 반환
+        # (Task의 module 정보도 응답에 포함되므로 카탈로그 version도 ETag에 반영)
+        if request.if_none_match:
+            version = session_service.get_session_version(conversation_id)
+            if version is None:
+                return jsonify({'error': '세션을 찾을 수 없습니다.'}), 404
+            etag = f"{view}-{version}-{module_service.catalog.version}"
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'no-cache'
+                return response
+        
+        if view == 'full':
+            session = session_service.get_session(conversation_id)
+        else:
+            session = session_service.get_session_summary(conversation_id)
         
-        session_service = SessionService()
-        module_service = ModuleService()
+        if not session:
+            return jsonify({'error': '세션을 찾을 수 없습니다.'}), 404
         
-        session = session_service.get_session(conversation_id)
+        # ETag는 실제로 읽은 문서의 version 기준
+        etag = f"{view}-{session.get('version', 0)}-{module_service.catalog.version}"
         
+        _attach_module_info(session.get('tasks', []))
+        
+        response = jsonify(session)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response, 200
+        
+    except Exception as e:
+        import traceback
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+
+@app.route('/api/sessions/<conversation_id>/events', methods=['GET'])
+def session_events(conversation_id):
+    """
+    세션 변경 이벤트 스트림 (Server-Sent Events)
+    
+    - snapshot: 연결 직후 및 다른 인스턴스의 변경이 감지되었을 때 세션 요약 전체
+    - delta: 이 인스턴스에서 커밋된 변경분 (task 상태, 현재 task/module, part, supervision 점수 등)
+    - 느려서 delta 큐가 넘친 구독자는 스냅샷으로 다시 맞춤
+    - 스트림마다 워커 스레드를 점유하므로 동시 스트림 수를 넘으면 503 (클라이언트는 ETag 폴링으로 대체)
+    """
+    try:
+        # 스냅샷을 읽기 전에 구독해야 그 사이의 변경을 놓치지 않음
+        events = session_service.events
+        subscription = events.subscribe(conversation_id)
+        if subscription is None:
+            response = jsonify({'error': '세션 이벤트 스트림이 가득 찼습니다. 폴링을 사용하세요.'})
+            response.headers['Retry-After'] = str(Config.SESSION_EVENTS_MAX_DURATION)
+            return response, 503
+        
+        session = session_service.get_session_summary(conversation_id)
         if not session:
+            events.unsubscribe(conversation_id, subscription)
             return jsonify({'error': '세션을 찾을 수 없습니다.'}), 404
         
-        # datetime 객체를 문자열로 변환
-        from datetime import datetime
-        for key in ['created_at', 'updated_at']:
-            if key in session and isinstance(session[key], datetime):
-                session[key] = session[key].isoformat()
-        
-        # Task에 module 정보 추가
-        tasks = session.get('tasks', [])
-        for task in tasks:
-            module_id = task.get('module_id')
-            if module_id:
-                module = module_service.get_module(module_id)
-                if module:
-                    task['module'] = {
-                        'id': module.get('id'),
-                        'name': module.get('name'),
-                        'description': module.get('description')
-                    }
-        
-        return jsonify(session), 200
-        
     except Exception as e:
         import traceback
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+    
+    def format_event(event: str, data) -> str:
+        payload = app.json.dumps(data)
+        return f"event: {event}\ndata: {payload}\n\n"
+    
+    def stream():
+        try:
+            _attach_module_info(session.get('tasks', []))
+            last_version = session.get('version', 0)
+            yield "retry: 3000\n\n"
+            yield format_event('snapshot', session)
+            
+            deadline = time.monotonic() + Config.SESSION_EVENTS_MAX_DURATION
+            while time.monotonic() < deadline:
+                if subscription.needs_resync:
+                    # 큐가 넘쳐 delta를 버렸으면 밀린 delta 대신 스냅샷 전체 전송
+                    subscription.reset()
+                    snapshot = session_service.get_session_summary(conversation_id)
+                    if not snapshot:
+                        return
+                    _attach_module_info(snapshot.get('tasks', []))
+                    last_version = snapshot.get('version', 0)
+                    yield format_event('snapshot', snapshot)
+                    continue
+                
+                try:
+                    delta = subscription.get(timeout=Config.SESSION_EVENTS_HEARTBEAT)
+                except queue.Empty:
+                    # 다른 인스턴스에서 커밋된 변경은 version으로만 감지 가능 → 스냅샷 재전송
+                    version = session_service.get_session_version(conversation_id)
+                    if version is None:
+                        return
+                    if version != last_version:
+                        snapshot = session_service.get_session_summary(conversation_id)
+                        if not snapshot:
+                            return
+                        _attach_module_info(snapshot.get('tasks', []))
+                        last_version = snapshot.get('version', 0)
+                        yield format_event('snapshot', snapshot)
+                    else:
+                        yield ": keepalive\n\n"
+                    continue
+                
+                # 이 인스턴스의 커밋은 delta마다 version +1로 따라가 heartbeat에서 스냅샷을 다시 보내지 않음
+                # (스냅샷에 이미 반영된 커밋이 겹쳐 세어지면 다음 heartbeat에서 스냅샷 한 번으로 복구)
+                last_version += 1
+                if not delta:
+                    continue  # 화면 필드 없이 version만 바뀐 커밋
+                if 'tasks' in delta:
+                    delta = {**delta, 'tasks': _attach_module_info([dict(t) for t in delta['tasks']])}
+                yield format_event('delta', delta)
+        finally:
+            events.unsubscribe(conversation_id, subscription)
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+def _attach_module_info(tasks):
+    """Task에 module 정보 추가 (카탈로그 캐시에서 한 번에 조회)"""
+    modules = module_service.get_modules(
+        task.get('module_id') for task in tasks if task.get('module_id')
+    )
+    for task in tasks:
+        module_id = task.get('module_id')
+        if module_id:
+            module = modules.get(module_id)
+            if module:
+                task['module'] = {
+                    'id': module.get('id'),
+                    'name': module.get('name'),
+                    'description': module.get('description')
+                }
+    return tasks
+
+
+# 프롬프트 보기에서 쓰는 메시지 메타데이터 필드 (timing 등은 읽지 않음)
+PROMPT_METADATA_FIELDS = [
+    'prompt', 'prompt_ref', 'current_task', 'current_part', 'current_module', 'task_selector_output', 'supervision'
+]
 
 
 @app.route('/api/conversations/<conversation_id>/messages/<int:message_index>/prompt', methods=['GET'])
 def get_message_prompt(conversation_id, message_index):
     """특정 메시지의 프롬프트 가져오기"""
     try:
-        conversation = firestore_service.get_conversation(conversation_id)
-        
-        if not conversation:
-            return jsonify({'error': '대화를 찾을 수 없습니다.'}), 404
-        
-        messages = conversation.get('messages', [])
-        
-        if message_index < 0 or message_index >= len(messages):
+        if message_index < 0:
             return jsonify({'error': '메시지를 찾을 수 없습니다.'}), 404
         
-        message = messages[message_index]
+        _flush_pending_writes(conversation_id)
+        
+        # message_index는 메시지 순번(seq)과 같음 - 메타데이터 문서 하나에서 표시할 필드만 조회
+        metadata = firestore_service.get_message_metadata(
+            conversation_id, message_index, field_paths=PROMPT_METADATA_FIELDS
+        )
         
         # assistant 메시지이고 metadata가 있는 경우만 프롬프트 반환
-        if message.get('role') == 'assistant' and message.get('metadata'):
-            metadata = message.get('metadata', {})
-            prompt = metadata.get('prompt', '')
+        if metadata:
+            prompt = metadata.get('prompt')
+            if prompt is None and metadata.get('prompt_ref'):
+                # 시스템 프롬프트(해시 참조) + 대화 메시지(history_count개) + 변경분으로 복원
+                prompt = counselor_service.prompt_store.get_prompt(
+                    conversation_id, message_index, metadata['prompt_ref']
+                )
             supervision = metadata.get('supervision')
             
             response_data = {
-                'prompt': prompt,
+                'prompt': prompt or '',
                 'current_task': metadata.get('current_task'),
                 'current_part': metadata.get('current_part', 1),
                 'current_module': metadata.get('current_module'),
@@ -249,6 +455,8 @@ def get_message_prompt(conversation_id, message_index):
         else:
             return jsonify({'error': '이 메시지에는 프롬프트 정보가 없습니다.'}), 404
         
+    except (WriteBehindDelayed, ConversationBlocked) as e:
+        return _write_behind_error_response(e)
     except Exception as e:
         import traceback
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
@@ -259,26 +467,15 @@ def list_conversations():
     """사용자의 대화 목록 가져오기"""
     try:
         user_id = request.args.get('user_id', 'anonymous')
-        limit = int(request.args.get('limit', 10))
-        
-        conversations = firestore_service.list_conversations(user_id, limit)
-        
-        # datetime 객체를 문자열로 변환
-        from datetime import datetime
-        for conv in conversations:
-            if 'created_at' in conv and isinstance(conv['created_at'], datetime):
-                conv['created_at'] = conv['created_at'].isoformat()
-            if 'updated_at' in conv and isinstance(conv['updated_at'], datetime):
-                conv['updated_at'] = conv['updated_at'].isoformat()
-            # messages 내부의 timestamp도 변환
-            if 'messages' in conv:
-                for msg in conv['messages']:
-                    if 'timestamp' in msg and isinstance(msg['timestamp'], datetime):
-                        msg['timestamp'] = msg['timestamp'].isoformat()
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+        cursor = request.args.get('cursor') or None
+        
+        conversations, next_cursor = firestore_service.list_conversations(user_id, limit, cursor)
         
         return jsonify({
             'conversations': conversations,
-            'count': len(conversations)
+            'count': len(conversations),
+            'next_cursor': next_cursor
         }), 200
         
     except Exception as e:
@@ -300,13 +497,6 @@ def list_personas():
     try:
         personas = persona_service.list_personas()
         
-        # datetime 객체를 문자열로 변환
-        from datetime import datetime
-        for persona in personas:
-            for key in ['created_at', 'updated_at']:
-                if key in persona and isinstance(persona[key], datetime):
-                    persona[key] = persona[key].isoformat()
-        
         return jsonify({
             'personas': personas,
             'count': len(personas)
@@ -328,12 +518,6 @@ def create_persona():
         
         persona = persona_service.create_persona(data)
         
-        # datetime 객체를 문자열로 변환
-        from datetime import datetime
-        for key in ['created_at', 'updated_at']:
-            if key in persona and isinstance(persona[key], datetime):
-                persona[key] = persona[key].isoformat()
-        
         return jsonify({
             'message': '페르소나가 생성되었습니다.',
             'persona': persona
@@ -355,12 +539,6 @@ def get_persona(persona_id):
         if not persona:
             return jsonify({'error': '페르소나를 찾을 수 없습니다.'}), 404
         
-        # datetime 객체를 문자열로 변환
-        from datetime import datetime
-        for key in ['created_at', 'updated_at']:
-            if key in persona and isinstance(persona[key], datetime):
-                persona[key] = persona[key].isoformat()
-        
         return jsonify(persona), 200
         
     except Exception as e:
@@ -376,12 +554,6 @@ def update_persona(persona_id):
         
         persona = persona_service.update_persona(persona_id, data)
         
-        # datetime 객체를 문자열로 변환
-        from datetime import datetime
-        for key in ['created_at', 'updated_at']:
-            if key in persona and isinstance(persona[key], datetime):
-                persona[key] = persona[key].isoformat()
-        
         return jsonify({
             'message': '페르소나가 수정되었습니다.',
             'persona': persona
@@ -463,6 +635,34 @@ def initialize_personas():
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
 
+@app.route('/admin/api/metrics', methods=['GET'])
+def get_metrics():
+    """프로세스 내 운영 지표 (세션 커밋별 쓰기 필드 수 / 바이트, 분류기 LLM 출력 파싱 결과)"""
+    try:
+        return jsonify({
+            'session_writes': get_session_write_metrics().snapshot(),
+            'structured_output': get_structured_output_metrics().snapshot()
+        }), 200
+        
+    except Exception as e:
+        import traceback
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+
+@app.route('/admin/api/write-behind/<conversation_id>/requeue', methods=['POST'])
+def requeue_write_behind(conversation_id):
+    """저장에 실패해 멈춘 대화의 밀린 쓰기를 다시 반영 (저장소 복구 후)"""
+    try:
+        if not write_behind_service:
+            return jsonify({'error': 'write-behind가 꺼져 있습니다.'}), 400
+        requeued = write_behind_service.requeue_dead_letter(conversation_id)
+        return jsonify({'conversation_id': conversation_id, 'requeued': requeued}), 200
+        
+    except Exception as e:
+        import traceback
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+
 @app.route('/admin/api/counseling-levels', methods=['GET'])
 def get_counseling_levels():
     """상담 레벨 목록 가져오기"""
@@ -0,0 +1,63 @@
+"""
+앱 import 시간 벤치마크 (콜드 스타트에서 요청을 받기 전까지의 비용)
+
+새 프로세스에서 `python -X importtime -c "import app"`을 실행해 모듈별 누적 import 시간을 집계한다.
+저장소 연결/워밍업이 섞이지 않도록 STORAGE_BACKEND=memory, WARMUP_ENABLED=false로 실행한다.
+
+실행:
+    python benchmarks/import_time_benchmark.py [--target app] [--top 15] [--max-ms 1500]
+
+--max-ms를 주면 전체 import 시간이 이를 넘을 때 종료 코드 1 (CI에서 회귀 확인용)
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_imports(target: str) -> List[Tuple[int, int, str]]:
+    """(self_us, cumulative_us, module) 목록 반환"""
+    env = dict(os.environ, STORAGE_BACKEND="memory", WARMUP_ENABLED="false", LOG_FILE_ENABLED="false")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {target} 실패:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # 구분자 뒤 공백 하나를 제외한 들여쓰기가 import 깊이
+        rows.append((int(self_us), int(cumulative_us), name[1:].rstrip()))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="앱 import 시간 벤치마크")
+    parser.add_argument("--target", default="app", help="import할 모듈 (기본: app)")
+    parser.add_argument("--top", type=int, default=15, help="출력할 모듈 수")
+    parser.add_argument("--max-ms", type=float, default=None, help="전체 import 시간 상한 (ms)")
+    args = parser.parse_args()
+
+    rows = measure_imports(args.target)
+    # 최상위 import(들여쓰기 없음)의 누적 시간 합이 전체 import 시간
+    total_ms = sum(cumulative for _, cumulative, name in rows if not name.startswith(" ")) / 1e3
+
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for self_us, cumulative_us, name in sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1e3:>10.1f}ms {self_us / 1e3:>8.1f}ms  {name.strip()}")
+    print(f"total: {total_ms:.1f}ms (import {args.target})")
+
+    if args.max_ms is not None and total_ms > args.max_ms:
+        print(f"import 시간이 상한을 넘음: {total_ms:.1f}ms > {args.max_ms:.1f}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
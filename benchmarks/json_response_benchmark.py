@@ -0,0 +1,122 @@
+"""
+JSON 응답 직렬화 벤치마크
+
+300개 메시지(타임스탬프는 Firestore가 돌려주는 DatetimeWithNanoseconds)를 가진 대화 문서를
+GET /api/conversations/<id> 응답으로 만드는 비용을 비교한다.
+
+- legacy: 라우트에서 datetime을 순회하며 isoformat()한 뒤 Flask 기본 provider로 직렬화 (이전 방식)
+- json: AppJSONProvider + 표준 json
+- orjson: AppJSONProvider + orjson (설치된 경우)
+- mask: ?fields=messages.role,messages.content,messages.seq 적용
+- gzip: Accept-Encoding: gzip 요청 (본문 크기 포함)
+
+실행:
+    python benchmarks/json_response_benchmark.py [--messages 300] [--repeat 200]
+"""
+import argparse
+import copy
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from benchmarks.text_codec_benchmark import COUNSELOR_LINES, USER_LINES  # noqa: E402
+from services import json_provider  # noqa: E402
+from services.json_provider import AppJSONProvider  # noqa: E402
+
+try:
+    from google.api_core.datetime_helpers import DatetimeWithNanoseconds as Timestamp
+except ImportError:
+    Timestamp = datetime
+
+
+def build_conversation(message_count: int, rng: random.Random) -> dict:
+    """Firestore에서 읽은 대화 문서와 같은 형태의 데이터 생성"""
+    start = datetime(2025, 1, 1, 9, 0, 0)
+    messages = []
+    for seq in range(message_count):
+        role = "user" if seq % 2 == 0 else "assistant"
+        ts = start + timedelta(seconds=seq * 17)
+        message = {
+            "seq": seq,
+            "role": role,
+            "content": rng.choice(USER_LINES if role == "user" else COUNSELOR_LINES),
+            "timestamp": Timestamp(ts.year, ts.month, ts.day, ts.hour, ts.minute, ts.second, ts.microsecond)
+        }
+        if role == "assistant":
+            message["has_metadata"] = True
+        messages.append(message)
+    return {
+        "conversation_id": "bench",
+        "user_id": "user123",
+        "created_at": Timestamp(2025, 1, 1, 9, 0, 0),
+        "updated_at": Timestamp(2025, 1, 1, 10, 30, 0),
+        "message_count": message_count,
+        "last_message_preview": messages[-1]["content"] if messages else "",
+        "messages": messages
+    }
+
+
+def legacy_convert(conversation: dict) -> dict:
+    """이전 get_conversation 라우트의 datetime 변환"""
+    if "created_at" in conversation and isinstance(conversation["created_at"], datetime):
+        conversation["created_at"] = conversation["created_at"].isoformat()
+    if "updated_at" in conversation and isinstance(conversation["updated_at"], datetime):
+        conversation["updated_at"] = conversation["updated_at"].isoformat()
+    for msg in conversation.get("messages", []):
+        if "timestamp" in msg and isinstance(msg["timestamp"], datetime):
+            msg["timestamp"] = msg["timestamp"].isoformat()
+    return conversation
+
+
+def make_app(provider_class, use_orjson: bool = True) -> Flask:
+    app = Flask(__name__)
+    app.json = provider_class(app)
+    if isinstance(app.json, AppJSONProvider):
+        app.json.use_orjson = use_orjson and json_provider.orjson is not None
+    return app
+
+
+def measure(label: str, app: Flask, conversation: dict, repeat: int, convert=None,
+            query: str = "", headers=None) -> None:
+    elapsed = 0.0
+    size = 0
+    with app.test_request_context(f"/bench{query}", headers=headers or {}):
+        for _ in range(repeat):
+            data = copy.deepcopy(conversation) if convert else conversation
+            start = time.perf_counter()
+            if convert:
+                data = convert(data)
+            response = app.json.response(data)
+            elapsed += time.perf_counter() - start
+            size = len(response.get_data())
+    print(f"{label:<16} {elapsed / repeat * 1e3:>8.3f}ms  {size:>9,}B")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JSON 응답 직렬화 벤치마크")
+    parser.add_argument("--messages", type=int, default=300, help="대화 메시지 수")
+    parser.add_argument("--repeat", type=int, default=200, help="반복 횟수")
+    args = parser.parse_args()
+
+    conversation = build_conversation(args.messages, random.Random(42))
+    print(f"messages={args.messages}, timestamp={Timestamp.__name__}, orjson={json_provider.orjson is not None}")
+
+    measure("legacy", make_app(DefaultJSONProvider), conversation, args.repeat, convert=legacy_convert)
+    measure("json", make_app(AppJSONProvider, use_orjson=False), conversation, args.repeat)
+    if json_provider.orjson is not None:
+        measure("orjson", make_app(AppJSONProvider), conversation, args.repeat)
+
+    app = make_app(AppJSONProvider)
+    measure("mask", app, conversation, args.repeat, query="?fields=messages.role,messages.content,messages.seq")
+    measure("gzip", app, conversation, args.repeat, headers={"Accept-Encoding": "gzip"})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+텍스트 압축 코덱 벤치마크
+
+실제 상담 한 건을 익명화해 재구성한 대화(benchmarks/fixtures/counseling_transcript.json)로
+Counselor 프롬프트, Task Selector 원본 출력, Supervision 피드백, Task 완료 판단 출력을 만들어
+TextCodec의 절감 바이트와 CPU 비용을 측정한다. (같은 문장을 반복한 합성 텍스트는 실제보다 훨씬
+잘 압축되므로 사용하지 않음)
+
+실행:
+    python benchmarks/text_codec_benchmark.py [--fixture PATH] [--repeat 200]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.text_codec import TextCodec  # noqa: E402
+
+DEFAULT_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "counseling_transcript.json")
+
+
+def load_fixture(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_prompts(fixture: dict):
+    """턴마다 메시지 메타데이터에 저장되는 표시용 프롬프트 (시스템 프롬프트 + 그 턴까지의 대화)"""
+    prompts = []
+    parts = [f"[System]\n{fixture['system_prompt']}\n"]
+    for turn in fixture["turns"]:
+        parts.append(f"[User]\n{turn['user']}\n")
+        prompts.append("\n".join(parts))
+        parts.append(f"[Assistant]\n{turn['assistant']}\n")
+    return prompts
+
+
+def measure(codec: TextCodec, label: str, samples, repeat: int) -> None:
+    raw_bytes = sum(len(s.encode("utf-8")) for s in samples)
+    encoded = [codec.encode(s) for s in samples]
+    stored_bytes = sum(len(e) if isinstance(e, bytes) else len(e.encode("utf-8")) for e in encoded)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for s in samples:
+            codec.encode(s)
+    encode_us = (time.perf_counter() - start) / (repeat * len(samples)) * 1e6
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for e in encoded:
+            codec.decode(e)
+    decode_us = (time.perf_counter() - start) / (repeat * len(samples)) * 1e6
+
+    saved = raw_bytes - stored_bytes
+    print(f"{label:<30} 원본 {raw_bytes / len(samples):>9.0f}B  저장 {stored_bytes / len(samples):>9.0f}B  "
+          f"절감 {saved / raw_bytes * 100:>5.1f}%  인코딩 {encode_us:>7.1f}us  디코딩 {decode_us:>6.1f}us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="TextCodec 벤치마크")
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE, help="상담 대화 fixture (JSON)")
+    parser.add_argument("--repeat", type=int, default=200, help="CPU 측정 반복 횟수")
+    parser.add_argument("--threshold", type=int, default=None, help="압축 임계값 (기본: Config)")
+    args = parser.parse_args()
+
+    fixture = load_fixture(args.fixture)
+    codec = TextCodec(threshold=args.threshold, enabled=True)
+    print(f"threshold={codec.threshold}B, level={codec.level}, turns={len(fixture['turns'])}")
+
+    measure(codec, "prompt (턴별)", build_prompts(fixture), args.repeat)
+    measure(codec, "system prompt", [fixture["system_prompt"]], args.repeat)
+    measure(codec, "task_selector_output", fixture["task_selector_outputs"], args.repeat)
+    for field in ("feedback", "improvements", "strengths"):
+        measure(codec, f"supervision {field}", [entry[field] for entry in fixture["supervision"]], args.repeat)
+    for field in ("raw_output", "completion_reason"):
+        measure(codec, f"completion {field}", [entry[field] for entry in fixture["completion_outputs"]], args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -24,7 +24,69 @@ class Config:
     # Firestore 설정
     FIRESTORE_COLLECTION = os.getenv('FIRESTORE_COLLECTION', 'conversations')
     
+    # 저장소 백엔드 설정
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'firestore')  # 'firestore', 'sqlite'(단일 노드/온프레미스) 또는 'memory'(부하 테스트/프로파일링)
+    STORAGE_MEMORY_LATENCY_MS = float(os.getenv('STORAGE_MEMORY_LATENCY_MS', 0))  # memory 백엔드의 요청당 인위적 지연 (ms)
+    SQLITE_PATH = os.getenv('SQLITE_PATH', 'data/cbot.sqlite3')  # sqlite 백엔드 데이터베이스 파일 경로
+    
+    # 상담사 응답 쓰기 지연(write-behind) 설정 (outbox가 로컬 파일이므로 단일 인스턴스에서만 사용)
+    CHAT_WRITE_BEHIND = os.getenv('CHAT_WRITE_BEHIND', 'false').lower() == 'true'  # 응답을 먼저 반환하고 메시지/턴 종료 세션 쓰기는 백그라운드에서
+    WRITE_BEHIND_OUTBOX_PATH = os.getenv('WRITE_BEHIND_OUTBOX_PATH', 'data/outbox.sqlite3')  # 로컬 outbox 파일 경로
+    WRITE_BEHIND_MAX_ATTEMPTS = int(os.getenv('WRITE_BEHIND_MAX_ATTEMPTS', 8))  # 최대 시도 횟수 (넘으면 outbox의 dead_letter 테이블로 이동)
+    # outbox 디스크가 인스턴스 교체 후에도 남는지 (Cloud Run 로컬 디스크는 메모리라 기본 false, 영구 볼륨을 붙였을 때만 true)
+    WRITE_BEHIND_DURABLE_DISK = os.getenv('WRITE_BEHIND_DURABLE_DISK', 'false' if os.getenv('K_SERVICE') else 'true').lower() == 'true'
+    WRITE_BEHIND_RETRY_AFTER = int(os.getenv('WRITE_BEHIND_RETRY_AFTER', 5))  # 밀린 쓰기 반영 지연 시 503 응답의 Retry-After (초)
+
+    # 세션 조건부 저장 설정
+    SESSION_COMMIT_MAX_ATTEMPTS = int(os.getenv('SESSION_COMMIT_MAX_ATTEMPTS', 5))  # 충돌 시 최신 세션에 변경을 재적용해 저장하는 최대 시도 횟수
+
+    # 백그라운드 작업 큐 설정 (Supervision, Part 전환, Part 2 Task 업데이트)
+    JOB_EXECUTION_MODE = os.getenv('JOB_EXECUTION_MODE', 'inline')  # 'inline'(웹 프로세스에서 실행) 또는 'worker'(worker.py 별도 프로세스에서 실행)
+    JOB_THREADS = int(os.getenv('JOB_THREADS', 4))  # 작업 실행 스레드 수
+    JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', 300))  # 실행 중 작업의 lease (초, 만료되면 다른 인스턴스가 재실행)
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))  # 최대 시도 횟수 (넘으면 failed로 남김)
+    JOB_RETRY_BACKOFF_SECONDS = float(os.getenv('JOB_RETRY_BACKOFF_SECONDS', 5))  # 실패한 작업의 첫 재시도 간격 (초, 시도마다 2배)
+    JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 2))  # 워커가 새 작업을 확인하는 주기 (초)
+    
+    # 로깅 설정
+    # (Cloud Run(K_SERVICE 설정됨)에서는 기본으로 파일 없이 stdout JSON만 기록)
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json' if os.getenv('K_SERVICE') else 'text')  # 'text' 또는 'json'(구조화 로그)
+    LOG_DIR = os.getenv('LOG_DIR', 'logs')  # 상담 로그 파일 디렉토리
+    LOG_FILE_ENABLED = os.getenv('LOG_FILE_ENABLED', 'false' if os.getenv('K_SERVICE') else 'true').lower() == 'true'  # 날짜별 로그 파일 기록 여부
+    LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv('LOG_PAYLOAD_SAMPLE_RATE', 0.1))  # LLM 원본 출력 등 큰 페이로드를 기록할 대화 비율 (0이면 끔, 1이면 전부)
+    
+    # 인스턴스 워밍업 설정 (/ready는 워밍업이 끝난 뒤에만 200)
+    WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'true').lower() == 'true'  # 시작 시 캐시 적재, 저장소/LLM 연결 수립
+    WARMUP_LLM_PING = os.getenv('WARMUP_LLM_PING', 'true').lower() == 'true'  # LLM 클라이언트마다 1토큰 호출로 연결 수립
+    
+    # 분류기 LLM 설정 (User State Detector, Task Completion Checker, Module Selector)
+    CLASSIFIER_EARLY_EXIT = os.getenv('CLASSIFIER_EARLY_EXIT', 'true').lower() == 'true'  # 스트리밍으로 받아 필요한 필드가 모이면 나머지(이유/요약)를 기다리지 않음
+    
     # 상담 에이전트 설정
     SUPERVISION_INTERVAL = int(os.getenv('SUPERVISION_INTERVAL', 3))  # N개 메시지마다 supervision
     TASK_UPDATE_INTERVAL = int(os.getenv('TASK_UPDATE_INTERVAL', 3))  # N개 메시지마다 task 업데이트
 
+    # Part 2 계획 미리 생성 설정 (Part 1 → 2 전환 전에 목표/Task를 백그라운드에서 만들어 두고 전환 시 바로 저장)
+    PART2_PLAN_SPECULATIVE = os.getenv('PART2_PLAN_SPECULATIVE', 'true').lower() == 'true'
+    PART2_PLAN_SPECULATE_REMAINING = int(os.getenv('PART2_PLAN_SPECULATE_REMAINING', 1))  # 남은 Part 1 Task(sufficient 미만)가 N개 이하가 되면 생성 시작
+    PART2_PLAN_DRAFT_MAX_STALE_MESSAGES = int(os.getenv('PART2_PLAN_DRAFT_MAX_STALE_MESSAGES', 6))  # 생성 후 대화가 N개 메시지 넘게 진행됐으면 전환 시 다시 생성
+    
+    # 캐시 설정 (모듈 카탈로그 등 관리자만 수정하는 데이터)
+    CATALOG_CACHE_REFRESH_INTERVAL = int(os.getenv('CATALOG_CACHE_REFRESH_INTERVAL', 30))  # N초마다 version 확인
+    CATALOG_CACHE_LISTENER = os.getenv('CATALOG_CACHE_LISTENER', 'false').lower() == 'true'  # 변경 리스너 사용 여부
+    
+    # 세션 이벤트 스트림(SSE) 설정
+    SESSION_EVENTS_HEARTBEAT = int(os.getenv('SESSION_EVENTS_HEARTBEAT', 15))  # N초마다 keepalive 및 version 확인
+    SESSION_EVENTS_MAX_DURATION = int(os.getenv('SESSION_EVENTS_MAX_DURATION', 300))  # 스트림 최대 유지 시간 (초, 이후 클라이언트 재연결)
+    SESSION_EVENTS_MAX_STREAMS = int(os.getenv('SESSION_EVENTS_MAX_STREAMS', 8))  # 인스턴스(프로세스)당 동시 스트림 수 (넘으면 503 → 클라이언트는 ETag 폴링, 0이면 제한 없음)
+    
+    # JSON 응답 설정
+    JSON_USE_ORJSON = os.getenv('JSON_USE_ORJSON', 'true').lower() == 'true'  # orjson이 설치되어 있으면 사용 (없으면 표준 json)
+    JSON_GZIP_ENABLED = os.getenv('JSON_GZIP_ENABLED', 'true').lower() == 'true'  # Accept-Encoding: gzip 요청에 응답 압축
+    JSON_GZIP_MIN_BYTES = int(os.getenv('JSON_GZIP_MIN_BYTES', 2048))  # N바이트 이상인 응답만 압축
+    JSON_GZIP_LEVEL = int(os.getenv('JSON_GZIP_LEVEL', 6))  # gzip 압축 레벨 (1~9)
+    
+    # 대용량 텍스트 필드 압축 설정 (프롬프트, LLM 원본 출력, Supervision 피드백 등)
+    TEXT_COMPRESSION_ENABLED = os.getenv('TEXT_COMPRESSION_ENABLED', 'true').lower() == 'true'
+    TEXT_COMPRESSION_THRESHOLD = int(os.getenv('TEXT_COMPRESSION_THRESHOLD', 1024))  # N바이트 이상인 텍스트만 압축
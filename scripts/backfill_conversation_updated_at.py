@@ -0,0 +1,77 @@
+"""
+대화 updated_at 보정 도구 (1회성)
+
+대화 목록은 updated_at 내림차순으로 조회하므로 updated_at이 없는 기존 대화는 목록에서 빠진다
+(Firestore는 정렬 필드가 없는 문서를 결과에서 제외). updated_at이 없는 대화에
+마지막 메시지 시각, 없으면 created_at을 채운다.
+
+사용 예:
+    # 바꿀 대화 수만 확인
+    python scripts/backfill_conversation_updated_at.py --backend firestore --dry-run
+
+    python scripts/backfill_conversation_updated_at.py --backend firestore
+    python scripts/backfill_conversation_updated_at.py --backend sqlite --sqlite-path data/cbot.sqlite3
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+from typing import Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from services.storage_backend import StorageBackend  # noqa: E402
+from scripts.migrate_storage import build_backend  # noqa: E402
+
+
+def resolve_updated_at(data: dict) -> Optional[datetime]:
+    """채울 updated_at (마지막 메시지 timestamp → created_at 순)"""
+    for message in reversed(data.get("messages") or []):
+        if message.get("timestamp"):
+            return message["timestamp"]
+    return data.get("created_at")
+
+
+def backfill(backend: StorageBackend, collection_name: str, dry_run: bool = False) -> Tuple[int, int]:
+    """
+    updated_at이 없는 대화에 값 채우기
+
+    Returns:
+        (확인한 대화 수, 채운 대화 수)
+    """
+    collection = backend.collection(collection_name)
+    checked = 0
+    updated = 0
+    # 필드가 없는 문서는 쿼리로 고를 수 없으므로 updated_at만 읽어 확인하고, 필요한 문서만 전체를 읽음
+    for snapshot in collection.select(["updated_at"]).stream():
+        checked += 1
+        if (snapshot.to_dict() or {}).get("updated_at") is not None:
+            continue
+
+        document = collection.document(snapshot.id)
+        updated_at = resolve_updated_at(document.get(field_paths=["messages", "created_at"]).to_dict() or {})
+        if updated_at is None:
+            print(f"[SKIP] {snapshot.id}: 메시지 timestamp와 created_at이 모두 없음")
+            continue
+        if not dry_run:
+            document.update({"updated_at": updated_at})
+        updated += 1
+    return checked, updated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="updated_at이 없는 대화 보정 (대화 목록 누락 방지)")
+    parser.add_argument("--backend", choices=["firestore", "sqlite"], required=True)
+    parser.add_argument("--sqlite-path", default=Config.SQLITE_PATH, help="SQLite 데이터베이스 파일 경로")
+    parser.add_argument("--collection", default=Config.FIRESTORE_COLLECTION, help="대화 컬렉션 이름")
+    parser.add_argument("--dry-run", action="store_true", help="쓰지 않고 채울 대화 수만 출력")
+    args = parser.parse_args()
+
+    checked, updated = backfill(build_backend(args.backend, args.sqlite_path), args.collection, args.dry_run)
+    action = "채울 대상" if args.dry_run else "보정 완료"
+    print(f"[OK] {checked}개 대화 확인, {updated}개 {action}")
+
+
+if __name__ == "__main__":
+    main()
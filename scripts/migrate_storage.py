@@ -0,0 +1,123 @@
+"""
+저장소 백엔드 간 데이터 이동 도구
+
+모든 컬렉션(하위 컬렉션 포함)의 문서를 경로 그대로 옮긴다.
+내보내기 파일은 한 줄에 문서 하나인 JSONL이며 datetime/bytes 값은 태그로 보존된다.
+
+사용 예:
+    # Firestore → SQLite 직접 복사
+    python scripts/migrate_storage.py copy --source firestore --target sqlite --sqlite-path data/cbot.sqlite3
+
+    # 파일로 내보내기 / 가져오기
+    python scripts/migrate_storage.py export --backend firestore --output backup.jsonl
+    python scripts/migrate_storage.py import --backend sqlite --input backup.jsonl
+"""
+import argparse
+import os
+import sys
+from typing import Iterator, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from services.storage_backend import (  # noqa: E402
+    FirestoreBackend, StorageBackend, dumps_document, loads_document
+)
+
+
+def build_backend(name: str, sqlite_path: str) -> StorageBackend:
+    """이름으로 백엔드 생성 (memory는 같은 프로세스 안에서만 의미가 있어 제외)"""
+    if name == "firestore":
+        return FirestoreBackend()
+    if name == "sqlite":
+        from services.sqlite_backend import SqliteBackend
+        return SqliteBackend(sqlite_path)
+    raise ValueError(f"지원하지 않는 백엔드: {name}")
+
+
+def iter_documents(backend: StorageBackend) -> Iterator[Tuple[str, dict]]:
+    """모든 문서를 (문서 경로, 데이터)로 순회 (하위 컬렉션까지)"""
+    stack = list(backend.collections())
+    while stack:
+        collection = stack.pop()
+        for snapshot in collection.stream():
+            # 참조의 path는 컬렉션부터 시작하는 상대 경로 (예: conversations/<id>/message_meta/<seq>)
+            yield snapshot.reference.path, snapshot.to_dict()
+            stack.extend(snapshot.reference.collections())
+
+
+def write_document(backend: StorageBackend, document_path: str, data: dict) -> None:
+    """문서 경로(컬렉션/문서/컬렉션/문서...)에 데이터를 그대로 기록"""
+    parts = document_path.split("/")
+    reference = backend.collection(parts[0]).document(parts[1])
+    for index in range(2, len(parts), 2):
+        reference = reference.collection(parts[index]).document(parts[index + 1])
+    reference.set(data)
+
+
+def export_documents(backend: StorageBackend, output_path: str) -> int:
+    count = 0
+    with open(output_path, "w", encoding="utf-8") as output:
+        for document_path, data in iter_documents(backend):
+            output.write(dumps_document({"path": document_path, "data": data}) + "\n")
+            count += 1
+    return count
+
+
+def import_documents(backend: StorageBackend, input_path: str) -> int:
+    count = 0
+    with open(input_path, encoding="utf-8") as source:
+        for line in source:
+            if not line.strip():
+                continue
+            record = loads_document(line)
+            write_document(backend, record["path"], record["data"])
+            count += 1
+    return count
+
+
+def copy_documents(source: StorageBackend, target: StorageBackend) -> int:
+    count = 0
+    for document_path, data in iter_documents(source):
+        write_document(target, document_path, data)
+        count += 1
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="저장소 백엔드 간 데이터 이동")
+    parser.add_argument("--sqlite-path", default=Config.SQLITE_PATH, help="SQLite 데이터베이스 파일 경로")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="백엔드 → JSONL 파일")
+    export_parser.add_argument("--backend", choices=["firestore", "sqlite"], required=True)
+    export_parser.add_argument("--output", required=True)
+
+    import_parser = subparsers.add_parser("import", help="JSONL 파일 → 백엔드")
+    import_parser.add_argument("--backend", choices=["firestore", "sqlite"], required=True)
+    import_parser.add_argument("--input", required=True)
+
+    copy_parser = subparsers.add_parser("copy", help="백엔드 → 백엔드 직접 복사")
+    copy_parser.add_argument("--source", choices=["firestore", "sqlite"], required=True)
+    copy_parser.add_argument("--target", choices=["firestore", "sqlite"], required=True)
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        count = export_documents(build_backend(args.backend, args.sqlite_path), args.output)
+        print(f"[OK] {count}개 문서 내보내기 완료: {args.output}")
+    elif args.command == "import":
+        count = import_documents(build_backend(args.backend, args.sqlite_path), args.input)
+        print(f"[OK] {count}개 문서 가져오기 완료 ({args.backend})")
+    else:
+        if args.source == args.target:
+            parser.error("source와 target이 같습니다")
+        count = copy_documents(
+            build_backend(args.source, args.sqlite_path),
+            build_backend(args.target, args.sqlite_path)
+        )
+        print(f"[OK] {count}개 문서 복사 완료 ({args.source} → {args.target})")
+
+
+if __name__ == "__main__":
+    main()
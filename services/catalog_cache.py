@@ -0,0 +1,163 @@
+"""버전 기반 인프로세스 카탈로그 캐시"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogCache:
+    """
+    관리자만 수정하는 설정성 데이터를 한 번 로드해 메모리에서 제공하는 캐시
+
+    - 로컬 스냅샷은 `cache_versions/<name>` 문서의 version과 함께 보관
+    - refresh_interval 초마다 version만 확인하고, 바뀌었을 때만 다시 로드
+    - listener 모드에서는 version 문서의 변경 리스너가 스냅샷을 무효화
+    - 관리자 쓰기 후 invalidate()로 로컬 스냅샷을 버리고 version을 증가시켜
+      다른 인스턴스도 다음 확인 시점에 새로 로드
+    - 바뀐 항목을 알고 있으면 apply_update()로 로컬 스냅샷에 변경분만 반영 (다시 읽지 않음)
+    """
+
+    VERSION_COLLECTION = "cache_versions"
+
+    def __init__(self, db, name: str, loader: Callable[[], Any],
+                 refresh_interval: int = 30, use_listener: bool = False):
+        """
+        Args:
+            db: 저장소 백엔드 (StorageBackend)
+            name: 캐시 이름 (version 문서 ID)
+            loader: 스냅샷을 새로 만드는 함수 (Firestore 읽기 수행)
+            refresh_interval: version 확인 주기 (초)
+            use_listener: version 문서 변경 리스너 사용 여부 (db.supports_listeners일 때만)
+        """
+        self.db = db
+        self.name = name
+        self._loader = loader
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = None
+        self._checked_at = 0.0
+        self._watch = None
+
+        if use_listener and db.supports_listeners:
+            self._start_listener()
+        elif use_listener:
+            logger.info(f"[CATALOG_CACHE] {self.name} 저장소가 변경 리스너를 지원하지 않아 주기 확인 사용")
+
+    @property
+    def version(self) -> Optional[int]:
+        """현재 로드된 스냅샷의 version"""
+        return self._version
+
+    def get(self) -> Any:
+        """현재 스냅샷 반환 (필요 시 다시 로드)"""
+        snapshot = self._snapshot
+        if snapshot is not None and self._is_fresh():
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None and self._is_fresh():
+                return self._snapshot
+
+            # version을 먼저 읽고 로드해야 로드 도중의 변경을 다음 확인에서 놓치지 않음
+            remote_version = self._read_remote_version()
+            if self._snapshot is None or remote_version != self._version:
+                self._snapshot = self._loader()
+                self._version = remote_version
+                logger.info(f"[CATALOG_CACHE] {self.name} 로드 완료 (version={remote_version})")
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def invalidate(self, bump_version: bool = True) -> None:
+        """
+        로컬 스냅샷 무효화
+
+        Args:
+            bump_version: 원격 version도 증가시킬지 여부 (다른 인스턴스 갱신용)
+        """
+        if bump_version:
+            try:
+                self._version_ref().set({
+                    "version": self.db.increment(1),
+                    "updated_at": datetime.now()
+                }, merge=True)
+            except Exception as e:
+                logger.error(f"[CATALOG_CACHE] {self.name} version 증가 실패: {str(e)}")
+
+        with self._lock:
+            self._snapshot = None
+            self._checked_at = 0.0
+
+    def apply_update(self, update: Callable[[Any], Any]) -> None:
+        """
+        관리자 쓰기 후 version을 증가시키고 로컬 스냅샷에 변경분만 반영
+
+        로컬 스냅샷이 증가 직전 version과 같을 때만 반영하고, 아니면(사이에 다른 인스턴스의
+        변경이 있었음) 무효화해 다음 get()에서 다시 로드한다.
+
+        Args:
+            update: 현재 스냅샷을 받아 변경을 반영한 새 스냅샷을 반환하는 함수 (저장소를 읽지 않음)
+        """
+        version_ref = self._version_ref()
+
+        def bump(transaction) -> int:
+            doc = version_ref.get(field_paths=["version"], transaction=transaction)
+            version = (doc.to_dict() or {}).get("version", 0) if doc.exists else 0
+            transaction.set(version_ref, {
+                "version": version + 1,
+                "updated_at": datetime.now()
+            }, merge=True)
+            return version
+
+        try:
+            previous_version = self.db.run_transaction(bump)
+        except Exception as e:
+            logger.error(f"[CATALOG_CACHE] {self.name} version 증가 실패: {str(e)}")
+            previous_version = None
+
+        with self._lock:
+            if (self._snapshot is not None and previous_version is not None
+                    and self._version == previous_version):
+                self._snapshot = update(self._snapshot)
+                self._version = previous_version + 1
+                self._checked_at = time.monotonic()
+            else:
+                self._snapshot = None
+                self._checked_at = 0.0
+
+    def _is_fresh(self) -> bool:
+        if self._watch is not None:
+            return True
+        return time.monotonic() - self._checked_at < self.refresh_interval
+
+    def _version_ref(self):
+        return self.db.collection(self.VERSION_COLLECTION).document(self.name)
+
+    def _read_remote_version(self) -> Optional[int]:
+        try:
+            doc = self._version_ref().get(field_paths=["version"])
+            if doc.exists:
+                return (doc.to_dict() or {}).get("version", 0)
+            return 0
+        except Exception as e:
+            # version 확인 실패 시 기존 스냅샷 유지
+            logger.error(f"[CATALOG_CACHE] {self.name} version 확인 실패: {str(e)}")
+            return self._version
+
+    def _start_listener(self) -> None:
+        def on_change(doc_snapshots, changes, read_time):
+            for doc in doc_snapshots:
+                version = (doc.to_dict() or {}).get("version", 0)
+                if version != self._version:
+                    with self._lock:
+                        self._snapshot = None
+
+        try:
+            self._watch = self._version_ref().on_snapshot(on_change)
+        except Exception as e:
+            logger.error(f"[CATALOG_CACHE] {self.name} 리스너 등록 실패, 주기 확인으로 대체: {str(e)}")
+            self._watch = None
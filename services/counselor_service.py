@@ -3,10 +3,11 @@ import os
 import time
 import logging
 import threading
+import contextvars
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Set
 from datetime import datetime
-from langchain_google_vertexai import ChatVertexAI
+from services.llm_client import LazyChatModel
 from config import Config
 from services.task_planner_service import TaskPlannerService
 from services.task_selector_service import TaskSelectorService
@@ -17,32 +18,13 @@ from services.part_manager_service import PartManagerService
 from services.task_completion_checker_service import TaskCompletionCheckerService
 from services.user_state_detector_service import UserStateDetectorService
 from services.module_selector_service import ModuleSelectorService
-
-# 로깅 설정
-log_dir = 'logs'
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir)
-
-log_file = os.path.join(log_dir, f'counselor_{datetime.now().strftime("%Y%m%d")}.log')
+from services.prompt_store_service import PromptStoreService
+from services.firestore_service import FirestoreService
+from services.job_queue_service import JobQueueService
+from services.models import Message, Session, SupervisionEntry, Task
+from services.log_setup import log_payload
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-
-if logger.handlers:
-    logger.handlers.clear()
-
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-console_format = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%H:%M:%S')
-console_handler.setFormatter(console_format)
-
-file_handler = logging.FileHandler(log_file, encoding='utf-8')
-file_handler.setLevel(logging.INFO)
-file_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-file_handler.setFormatter(file_format)
-
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
 
 
 class CounselorService:
@@ -53,7 +35,7 @@ class CounselorService:
         if Config.GOOGLE_APPLICATION_CREDENTIALS and os.path.exists(Config.GOOGLE_APPLICATION_CREDENTIALS):
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = Config.GOOGLE_APPLICATION_CREDENTIALS
         
-        self.llm = ChatVertexAI(
+        self.llm = LazyChatModel(
             model_name=Config.VERTEX_AI_MODEL,
             project=Config.PROJECT_ID,
             location=Config.LOCATION,
@@ -72,16 +54,45 @@ class CounselorService:
         self.supervisor = SupervisorService()
         self.session_service = SessionService()
         self.module_service = ModuleService()
+        self.prompt_store = PromptStoreService()
+        self.firestore = FirestoreService()
+        
+        # 백그라운드 작업 큐 (Supervision, Part 전환, Part 2 Task 업데이트)
+        self.jobs = JobQueueService()
+        self.jobs.register("supervision", self._handle_supervision_job)
+        self.jobs.register("part_transition", self._invalidate_cache_on_error(self._handle_part_transition_job))
+        self.jobs.register("part2_update", self._invalidate_cache_on_error(self._handle_part2_update_job))
+        self.jobs.register("part2_plan_draft", self._handle_part2_plan_draft_job)
         
         # 주기 설정
         self.supervision_interval = Config.SUPERVISION_INTERVAL
         
-        # 세션 캐시
-        self.session_cache = {}
+        # 턴 종료 시의 세션 쓰기를 넘길 write-behind outbox (CHAT_WRITE_BEHIND일 때 app에서 설정)
+        self.write_behind = None
+        
+        # 세션 캐시 (conversation_id -> Session)
+        self.session_cache: Dict[str, Session] = {}
+        # 백그라운드 작업이 실패해 캐시가 저장소와 다를 수 있는 대화 (다음 턴에 revision 확인)
+        self._stale_sessions: Set[str] = set()
+        
+        # Part 2 계획 미리 생성을 요청한 대화 기록 길이 (conversation_id -> history_len, 같은 요청 반복 방지)
+        self._part2_draft_requests: Dict[str, int] = {}
         
         # Thread pool for parallel execution
         self.executor = ThreadPoolExecutor(max_workers=3)
     
+    def llm_clients(self) -> Dict[str, LazyChatModel]:
+        """상담에 사용하는 LLM 클라이언트 (워밍업용)"""
+        return {
+            "counselor": self.llm,
+            "task_planner": self.task_planner.llm,
+            "task_selector": self.task_selector.llm,
+            "task_completion_checker": self.task_completion_checker.llm,
+            "user_state_detector": self.user_state_detector.llm,
+            "module_selector": self.module_selector.llm,
+            "supervisor": self.supervisor.llm
+        }
+    
     def _get_base_prompt(self) -> str:
         """
         기본 시스템 프롬프트 반환
@@ -195,19 +206,13 @@ class CounselorService:
             # 대화 기록 가져오기
             t0 = time.time()
             if not conversation_history:
-                from services.firestore_service import FirestoreService
-                firestore = FirestoreService()
-                conversation_history = firestore.get_conversation_history(conversation_id)
+                conversation_history = self.firestore.get_conversation_history(conversation_id)
             timing_log['history_load'] = time.time() - t0
             
-            current_tasks = session.get('tasks', [])
-            message_count = session.get('message_count', 0) + 1
-            current_part = session.get('current_part', 1)
-            current_task_id = session.get('current_task')
-            current_module_id = session.get('current_module')
-            
-            # Part Manager: 현재 Part 확인
-            current_part = self.part_manager.get_current_part(conversation_id)
+            message_count = session.message_count + 1
+            current_part = session.current_part
+            current_task_id = session.current_task
+            current_module_id = session.current_module
             
             # 병렬 실행: Task Completion Checker + User State Detector
             t0 = time.time()
@@ -217,25 +222,28 @@ class CounselorService:
             # 현재 Task 찾기
             current_task = None
             if current_task_id:
-                current_task = next((t for t in current_tasks if t.get('id') == current_task_id), None)
+                current_task = session.task(current_task_id)
                 
                 # 현재 Task가 다른 Part에 속해있으면 None으로 설정 (Part 전환 후 정리)
-                if current_task and current_task.get('part') != current_part:
-                    logger.info(f"[PART_CHECK] current_task가 다른 Part에 속함: task_part={current_task.get('part')}, current_part={current_part}")
+                if current_task and current_task.part != current_part:
+                    logger.info(f"[PART_CHECK] current_task가 다른 Part에 속함: task_part={current_task.part}, current_part={current_part}")
                     current_task = None
                     current_task_id = None
-                    session['current_task'] = None
+                    session.current_task = None
             
             # 병렬 실행
             futures = {}
             if current_task:
+                # 로그 컨텍스트(conversation_id)를 실행 스레드로 전달
                 futures['completion'] = self.executor.submit(
+                    contextvars.copy_context().run,
                     self.task_completion_checker.check_completion,
-                    current_task,
+                    current_task.to_dict(),
                     conversation_history
                 )
             
             futures['user_state'] = self.executor.submit(
+                contextvars.copy_context().run,
                 self.user_state_detector.detect_state,
                 conversation_history
             )
@@ -270,30 +278,26 @@ class CounselorService:
             if completion_result:
                 logger.info(f"[TASK_COMPLETION] task_id={completion_result.get('task_id')} | "
                            f"new_status={completion_result.get('new_status')} | "
-                           f"reason={completion_result.get('completion_reason', 'N/A')[:100]}")
-                logger.debug(f"[TASK_COMPLETION_RAW] {completion_result.get('raw_output', 'N/A')[:500]}")
-                # 세션에 로그 저장
-                self.session_service.add_completion_log(conversation_id, completion_result)
+                           f"reason={(completion_result.get('completion_reason') or 'N/A')[:100]}")
+                log_payload(logger, "[TASK_COMPLETION_RAW]", (completion_result.get('raw_output') or 'N/A')[:500])
+                # 세션에 로그 저장 (write-behind면 outbox를 거쳐 백그라운드에서)
+                if self.write_behind:
+                    self.write_behind.enqueue_session_log(conversation_id, "completion_log", completion_result)
+                else:
+                    self.session_service.add_completion_log(conversation_id, completion_result)
             
             # Task 완료 시 상태 업데이트
             if task_completed and completion_result.get('new_status'):
                 task_id = completion_result.get('task_id')
                 new_status = completion_result.get('new_status')
-                self.session_service.update_task_status(conversation_id, task_id, new_status)
-                # 캐시 업데이트
-                for task in current_tasks:
-                    if task.get('id') == task_id:
-                        task['status'] = new_status
-                        break
-                session['tasks'] = current_tasks
-                self.session_cache[conversation_id] = session
+                session.set_task_status(task_id, new_status)
             
             # Task Selector 실행 (매턴마다)
             task_selection = None
             task_selector_output = None
             t0 = time.time()
             # 현재 Part의 Task만 선택
-            part_tasks = [t for t in current_tasks if t.get('part') == current_part]
+            part_tasks = [t.to_dict() for t in session.tasks_in_part(current_part)]
             task_selection = self.task_selector.select_next_task(
                 conversation_history,
                 part_tasks,
@@ -305,190 +309,46 @@ class CounselorService:
             timing_log['task_select'] = time.time() - t0
             
             if task_selection:
-                selected_task = task_selection['task']
-                selected_task_status = selected_task.get('status')
+                selected_task_id = task_selection['task'].get('id')
+                selected_task = session.task(selected_task_id) or Task.from_dict(task_selection['task'])
                 
-                # 선택된 Task를 current_task로 설정
-                self.session_service.set_current_task(conversation_id, selected_task.get('id'))
-                
-                # sufficient 상태가 아닐 때만 in_progress로 변경
-                if selected_task_status != 'sufficient':
-                    self.session_service.update_task_status(conversation_id, selected_task.get('id'), 'in_progress')
-                    # 캐시 업데이트
-                    for task in current_tasks:
-                        if task.get('id') == selected_task.get('id'):
-                            task['status'] = 'in_progress'
-                            break
-                else:
-                    # sufficient 상태는 그대로 유지
-                    # 캐시만 업데이트
-                    for task in current_tasks:
-                        if task.get('id') == selected_task.get('id'):
-                            # 이미 sufficient 상태이므로 변경하지 않음
-                            break
+                # sufficient 상태가 아닐 때만 in_progress로 변경 (sufficient 상태는 그대로 유지)
+                if selected_task.status != 'sufficient':
+                    session.set_task_status(selected_task_id, 'in_progress')
                 
                 current_task = selected_task
-                current_task_id = selected_task.get('id')
-                session['current_task'] = selected_task.get('id')
-                session['tasks'] = current_tasks
-                self.session_cache[conversation_id] = session
-            else:
-                # Task를 선택하지 못했다면 Part 전환 체크
-                # 단, 정말로 모든 Task가 sufficient 이상인지 확인
-                part_tasks_for_check = [t for t in current_tasks if t.get('part') == current_part]
-                all_sufficient_or_completed = all(
-                    t.get('status') in ['sufficient', 'completed'] 
-                    for t in part_tasks_for_check
-                )
-                
-                if all_sufficient_or_completed:
-                    # 모든 Task가 sufficient 이상이면 Part 전환 체크
-                    next_part = self.part_manager.check_part_transition(conversation_id)
-                else:
-                    # 아직 pending이나 in_progress Task가 있으면 Part 전환하지 않음
-                    next_part = None
-                    
-                    if next_part:
-                        # 이전 Part의 sufficient Task들을 completed로 변경
-                        previous_part = current_part
-                        for task in current_tasks:
-                            if task.get('part') == previous_part and task.get('status') == 'sufficient':
-                                self.session_service.update_task_status(conversation_id, task.get('id'), 'completed')
-                                task['status'] = 'completed'
-                        
-                        # Part 전환
-                        self.part_manager.transition_to_part(conversation_id, next_part)
-                        current_part = next_part
-                        
-                        # Part 2 목표 수립 및 Task 생성
-                        if next_part == 2:
-                            part2_goal, selected_keywords, part2_tasks = self.task_planner.create_part2_goal_and_plan(
-                                conversation_id, conversation_history
-                            )
-                            
-                            logger.info(f"[PART_TRANSITION] Part 2 목표 수립: 목표={part2_goal[:100] if part2_goal else 'None'}, 키워드={selected_keywords}, Task={len(part2_tasks)}개")
-                            
-                            if len(part2_tasks) == 0:
-                                logger.warning(f"[PART_TRANSITION] Part 2 Task 생성 실패 - 빈 리스트 반환")
-                                # Task 생성 실패 시에도 current_part는 업데이트하되, 기존 Task 유지
-                                session_ref = self.session_service.firestore.db.collection("sessions").document(conversation_id)
-                                session_ref.update({
-                                    "current_part": next_part,
-                                    "updated_at": datetime.now()
-                                })
-                                session['current_part'] = next_part
-                                self.session_cache[conversation_id] = session
-                            else:
-                                # Part 2 목표 및 선택된 키워드 저장
-                                if part2_goal:
-                                    self.session_service.update_part2_goal(conversation_id, part2_goal, selected_keywords)
-                                    logger.info(f"[PART_TRANSITION] Part 2 목표 저장 완료")
-                                
-                                # 기존 Task에 추가
-                                current_tasks = current_tasks + part2_tasks
-                                
-                                # Firestore에 저장 (current_part와 tasks 함께 업데이트)
-                                session_ref = self.session_service.firestore.db.collection("sessions").document(conversation_id)
-                                update_data = {
-                                    "current_part": next_part,
-                                    "tasks": current_tasks,
-                                    "updated_at": datetime.now()
-                                }
-                                if part2_goal:
-                                    update_data["part2_goal"] = part2_goal
-                                    update_data["part2_selected_keywords"] = selected_keywords
-                                session_ref.update(update_data)
-                                
-                                logger.info(f"[PART_TRANSITION] Firestore 업데이트 완료: current_part={next_part}, tasks_count={len(current_tasks)}")
-                                
-                                # 캐시 업데이트
-                                session['current_part'] = next_part
-                                session['tasks'] = current_tasks
-                                if part2_goal:
-                                    session['part2_goal'] = part2_goal
-                                    session['part2_selected_keywords'] = selected_keywords
-                                self.session_cache[conversation_id] = session
-                                
-                                logger.info(f"[PART_TRANSITION] 캐시 업데이트 완료: current_part={next_part}, tasks_count={len(current_tasks)}")
-                                
-                                # Part 2의 첫 번째 Task 선택
-                                part2_pending = [t for t in part2_tasks if t.get('status') == 'pending']
-                                if part2_pending:
-                                    first_task = part2_pending[0]
-                                    self.session_service.set_current_task(conversation_id, first_task.get('id'))
-                                    self.session_service.update_task_status(conversation_id, first_task.get('id'), 'in_progress')
-                                    current_task = first_task
-                                    current_task_id = first_task.get('id')
-                                    session['current_task'] = first_task.get('id')
-                                    self.session_cache[conversation_id] = session
-                                    logger.info(f"[PART_TRANSITION] Part 2 첫 번째 Task 선택: {first_task.get('id')}")
-                        
-                        # Part 3 Task 생성
-                        elif next_part == 3:
-                            part3_tasks = self.task_planner.create_part3_tasks()
-                            
-                            logger.info(f"[PART_TRANSITION] Part 3 Task 생성: {len(part3_tasks)}개 Task 생성됨")
-                            
-                            # 기존 Task에 추가
-                            current_tasks = current_tasks + part3_tasks
-                            
-                            # Firestore에 저장 (current_part와 tasks 함께 업데이트)
-                            session_ref = self.session_service.firestore.db.collection("sessions").document(conversation_id)
-                            session_ref.update({
-                                "current_part": next_part,
-                                "tasks": current_tasks,
-                                "updated_at": datetime.now()
-                            })
-                            
-                            logger.info(f"[PART_TRANSITION] Firestore 업데이트 완료: current_part={next_part}, tasks_count={len(current_tasks)}")
-                            
-                            # 캐시 업데이트
-                            session['current_part'] = next_part
-                            session['tasks'] = current_tasks
-                            self.session_cache[conversation_id] = session
-                            
-                            logger.info(f"[PART_TRANSITION] 캐시 업데이트 완료: current_part={next_part}, tasks_count={len(current_tasks)}")
-                            
-                            # Part 3의 첫 번째 Task 선택
-                            part3_pending = [t for t in part3_tasks if t.get('status') == 'pending']
-                            if part3_pending:
-                                first_task = part3_pending[0]
-                                self.session_service.set_current_task(conversation_id, first_task.get('id'))
-                                self.session_service.update_task_status(conversation_id, first_task.get('id'), 'in_progress')
-                                current_task = first_task
-                                current_task_id = first_task.get('id')
-                                session['current_task'] = first_task.get('id')
-                                self.session_cache[conversation_id] = session
-                                logger.info(f"[PART_TRANSITION] Part 3 첫 번째 Task 선택: {first_task.get('id')}")
+                current_task_id = selected_task_id
+                session.current_task = selected_task_id
+            
+            # Task를 선택하지 못했으면(현재 Part의 Task가 모두 sufficient 이상) Part 전환은
+            # 턴이 끝난 뒤 part_transition 작업에서 처리 (Part 2 계획은 미리 생성해 둔 것을 사용)
             
             # 현재 Task가 없으면 첫 번째 Task 선택
-            if not current_task and current_tasks:
+            if not current_task and session.tasks:
                 # completed만 제외 (sufficient는 재선택 가능하지만 우선순위 낮음)
-                part_tasks = [t for t in current_tasks if t.get('part') == current_part and t.get('status') != 'completed']
+                part_tasks = [t for t in session.tasks_in_part(current_part) if t.status != 'completed']
                 if part_tasks:
                     current_task = part_tasks[0]
-                    current_task_id = current_task.get('id')
-                    self.session_service.set_current_task(conversation_id, current_task_id)
-                    self.session_service.update_task_status(conversation_id, current_task_id, 'in_progress')
-                    session['current_task'] = current_task_id
-                    self.session_cache[conversation_id] = session
+                    current_task_id = current_task.id
+                    session.set_task_status(current_task_id, 'in_progress')
+                    session.current_task = current_task_id
+            
+            # 직전 턴의 Supervision 피드백 (Module 선택과 프롬프트에 사용)
+            # inline 모드는 처리기가 캐시된 세션에 추가하므로 다시 읽지 않고, 워커 모드는 로그 추가가
+            # revision을 바꾸지 않아 캐시에 없으므로 직전 턴이 Supervision 대상일 때만 로그 필드를 읽음
+            recent_supervision = session.supervision_for(message_count - 1)
+            if (recent_supervision is None and self.jobs.mode == "worker" and message_count > 1
+                    and (message_count - 1) % self.supervision_interval == 0):
+                recent_supervision = self.session_service.get_supervision_entry(conversation_id, message_count - 1)
+            recent_supervision = recent_supervision.to_dict() if recent_supervision else None
+            current_task_dict = current_task.to_dict() if current_task else None
             
             # Module Selector 실행
             t0 = time.time()
             module_result = None
             if current_task:
-                # 최근 Supervision 피드백 가져오기
-                latest_session = self.session_service.get_session(conversation_id)
-                supervision_log = latest_session.get('supervision_log', []) if latest_session else []
-                recent_supervision = None
-                for log_entry in reversed(supervision_log):
-                    log_message_index = log_entry.get('message_index', -1)
-                    if log_message_index == message_count - 1:
-                        recent_supervision = log_entry
-                        break
-                
                 module_result = self.module_selector.select_module(
-                    current_task,
+                    current_task_dict,
                     user_state or {},
                     current_module_id,
                     recent_supervision
@@ -503,104 +363,103 @@ class CounselorService:
                 if new_module_id != current_module_id:
                     module_changed = True
                     module_change_reason = module_result.get('change_reason')
-                    # 세션에 Module 정보 저장
-                    session_ref = self.session_service.firestore.db.collection("sessions").document(conversation_id)
-                    session_ref.update({
-                        "current_module": new_module_id,
-                        "previous_module": current_module_id,
-                        "module_change_reason": module_change_reason,
-                        "updated_at": datetime.now()
-                    })
-                    session['current_module'] = new_module_id
-                    session['previous_module'] = current_module_id
-                    session['module_change_reason'] = module_change_reason
-                    self.session_cache[conversation_id] = session
+                    session.current_module = new_module_id
+                    session.previous_module = current_module_id
+                    session.module_change_reason = module_change_reason
                 current_module_id = new_module_id
             
+            # 이번 턴에서 바뀐 세션 상태(Task 상태, 현재 Task, Module 등)를 한 번에 저장
+            # (턴 도중 백그라운드 작업이 세션을 바꿨으면 최신 세션에 이번 턴 변경을 다시 적용해 저장)
+            self.session_service.commit(session)
+            
             # Counselor 프롬프트 구성
             execution_guide = task_selection.get('execution_guide', '') if task_selection else ''
             module_guidelines = module_result.get('module_guidelines', '') if module_result else ''
             
-            # 최근 Supervision 피드백 가져오기 (프롬프트용)
-            latest_session = self.session_service.get_session(conversation_id)
-            supervision_log = latest_session.get('supervision_log', []) if latest_session else []
-            recent_supervision_for_prompt = None
-            for log_entry in reversed(supervision_log):
-                log_message_index = log_entry.get('message_index', -1)
-                if log_message_index == message_count - 1:
-                    recent_supervision_for_prompt = log_entry
-                    break
-            
             messages = []
             messages.append(('system', self.get_counselor_prompt(
                 current_part,
-                current_task,
+                current_task_dict,
                 execution_guide,
                 module_guidelines,
-                recent_supervision_for_prompt,
+                recent_supervision,
                 module_changed,
                 module_change_reason
             )))
             
             # 대화 기록 추가 (중복 제거)
             if conversation_history:
-                for i, msg in enumerate(conversation_history):
+                for i, msg in enumerate(map(Message.from_dict, conversation_history)):
                     is_last_user_msg = (
                         i == len(conversation_history) - 1 and 
-                        msg.get('role') == 'user' and 
-                        msg.get('content', '').strip() == message.strip()
+                        msg.role == 'user' and 
+                        msg.content.strip() == message.strip()
                     )
                     if is_last_user_msg:
                         continue
                     
-                    if msg.get('role') == 'user':
-                        messages.append(('user', msg.get('content', '')))
-                    elif msg.get('role') == 'assistant':
-                        messages.append(('assistant', msg.get('content', '')))
+                    if msg.role in ('user', 'assistant'):
+                        messages.append((msg.role, msg.content))
+            
+            # 프롬프트에 포함된 대화 기록 메시지 수 (디버그용 프롬프트 복원 기준)
+            history_count = len(messages) - 1
             
             # 현재 메시지 추가
             messages.append(('user', message))
             
             # LLM 호출
             counselor_start = time.time()
-            full_prompt = self._format_messages_for_display(messages)
             response = self.llm.invoke(messages)
             counselor_response = response.content if hasattr(response, 'content') else str(response)
             timing_log['counselor_llm'] = time.time() - counselor_start
             
+            # 백그라운드 작업 (작업 큐에 먼저 기록 후 실행 - 인스턴스가 종료되어도 재실행됨)
+            # 처리기는 저장소에서 대화 기록을 다시 읽으므로 기록 길이만 전달
+            history_len = len(conversation_history or [])
+            
             # Supervision 비동기 실행
             supervision_result = None
             if message_count % self.supervision_interval == 0:
-                threading.Thread(
-                    target=self._run_supervision_async,
-                    args=(conversation_id, message, counselor_response, current_task, conversation_history, message_count),
-                    daemon=True
-                ).start()
+                self.jobs.submit("supervision", conversation_id, {
+                    "message": message,
+                    "counselor_response": counselor_response,
+                    "current_task": current_task_dict,
+                    "history_len": history_len,
+                    "message_index": message_count
+                })
             
-            # Part 전환 확인 (비동기)
-            threading.Thread(
-                target=self._check_part_transition_async,
-                args=(conversation_id, current_tasks, current_part, conversation_history),
-                daemon=True
-            ).start()
+            # Part 전환 확인 (비동기) - 대부분의 턴은 전환하지 않으므로 세션 모델로 먼저 판단해
+            # 현재 Part의 Task가 모두 끝났거나, 전환 후 Task 생성이 중단된 경우에만 작업 등록
+            if (self.part_manager.check_part_transition(session)
+                    or not session.tasks_in_part(session.current_part)):
+                self.jobs.submit("part_transition", conversation_id, {
+                    "current_part": current_part,
+                    "history_len": history_len
+                })
+            
+            # Part 1이 거의 끝나가면 Part 2 계획 미리 생성 (비동기, 전환 시 바로 저장)
+            if current_part == 1 and Config.PART2_PLAN_SPECULATIVE:
+                self._submit_part2_plan_draft(conversation_id, session, history_len, user_state)
             
             # Part 2 Task 업데이트 확인 (비동기, Part 2일 때만)
             if current_part == 2 and user_state:
+                self.jobs.submit("part2_update", conversation_id, {
+                    "user_state": user_state,
+                    "history_len": history_len
+                })
+            
+            # 메시지 카운트 증가 (비동기, write-behind면 다시 반영되어도 같도록 최종 값을 outbox에 기록)
+            if self.write_behind:
+                self.write_behind.enqueue_session_fields(conversation_id, {"message_count": message_count})
+            else:
                 threading.Thread(
-                    target=self._check_part2_task_update_async,
-                    args=(conversation_id, current_tasks, conversation_history, user_state),
+                    target=lambda: self.session_service.increment_message_count(conversation_id),
                     daemon=True
                 ).start()
             
-            # 메시지 카운트 증가 (비동기)
-            threading.Thread(
-                target=lambda: self.session_service.increment_message_count(conversation_id),
-                daemon=True
-            ).start()
-            
             # 캐시 업데이트
-            session['message_count'] = message_count
-            self.session_cache[conversation_id] = session
+            session.message_count = message_count
+            self._cache_session(session)
             
             # 전체 시간 계산
             total_time = time.time() - start_time
@@ -611,16 +470,19 @@ class CounselorService:
                        f"total={total_time:.2f}s | "
                        f"part={current_part} | "
                        f"task_completed={task_completed} | "
-                       f"module_changed={module_changed}")
+                       f"module_changed={module_changed}",
+                       extra={"stage": "chat",
+                              "latency_ms": round(total_time * 1000, 1),
+                              "timing_ms": {key: round(value * 1000, 1) for key, value in timing_log.items()}})
             
             return {
                 "response": counselor_response,
-                "current_task": current_task.get('id') if current_task else None,
+                "current_task": current_task.id if current_task else None,
                 "current_part": current_part,
                 "current_module": current_module_id,
                 "supervision": supervision_result,
                 "timing": timing_log,
-                "prompt": full_prompt,
+                "prompt_ref": self._build_prompt_ref(messages, history_count),
                 "task_selector_output": task_selector_output  # Task Selector 원본 출력 추가
             }
         
@@ -631,14 +493,20 @@ class CounselorService:
                         f"total={total_time:.2f}s | error={str(e)}")
             raise Exception(f"상담 수행 중 오류 발생: {str(e)}")
     
-    def _get_or_create_session(self, conversation_id: str, force_refresh: bool = False) -> Dict:
+    def _get_or_create_session(self, conversation_id: str, force_refresh: bool = False) -> Session:
         """세션 가져오기 또는 생성 (캐시 사용)"""
         # 강제 새로고침이 아니고 캐시가 있으면 캐시 사용
         if not force_refresh and conversation_id in self.session_cache:
-            return self.session_cache[conversation_id]
+            cached = self.session_cache[conversation_id]
+            # 워커 모드(다른 프로세스가 세션을 바꿈)나 백그라운드 작업이 실패한 뒤에는 revision으로 확인
+            if self.jobs.mode != "worker" and conversation_id not in self._stale_sessions:
+                return cached
+            self._stale_sessions.discard(conversation_id)
+            if cached.revision == self.session_service.get_session_revision(conversation_id):
+                return cached
         
-        # Firestore에서 가져오기
-        session = self.session_service.get_session(conversation_id)
+        # Firestore에서 가져오기 (모델로 바꾸므로 로그 본문은 조회할 때 복원)
+        session = self.session_service.get_session(conversation_id, decode_logs=False)
         
         if not session:
             # 새 세션 생성
@@ -646,40 +514,62 @@ class CounselorService:
                 conversation_id, 
                 session_type="first_session"
             )
-            # Part 1 초기 Task 생성
-            initial_tasks = self.task_planner.create_initial_tasks("first_session")
-            self.session_service.update_tasks(conversation_id, initial_tasks)
-            session['tasks'] = initial_tasks
+        elif session.get('tasks'):
+            session = Session.from_dict(session)
+            self.session_cache[conversation_id] = session
+            return session
         else:
             # 세션이 존재하지만 태스크가 비어있으면 초기 태스크 생성
-            tasks = session.get('tasks', [])
-            if not tasks:
-                logger.info(f"[SESSION] 세션은 존재하지만 태스크가 비어있음. 초기 태스크 생성: {conversation_id[:8]}...")
-                initial_tasks = self.task_planner.create_initial_tasks("first_session")
-                self.session_service.update_tasks(conversation_id, initial_tasks)
-                session['tasks'] = initial_tasks
+            logger.info(f"[SESSION] 세션은 존재하지만 태스크가 비어있음. 초기 태스크 생성: {conversation_id[:8]}...")
+        
+        # Part 1 초기 Task 생성 (그 사이 다른 요청이 만들었으면 그대로 사용)
+        def add_initial_tasks(session: Session) -> None:
+            if not session.tasks:
+                session.replace_tasks(
+                    Task.from_dict(t) for t in self.task_planner.create_initial_tasks("first_session")
+                )
         
         # 캐시에 저장
+        session = self.session_service.mutate(conversation_id, add_initial_tasks, session=Session.from_dict(session))
         self.session_cache[conversation_id] = session
         return session
     
-    def _check_part_transition_async(self, conversation_id: str, tasks: List[Dict], 
-                                    current_part: int, conversation_history: List[Dict]) -> None:
-        """Part 전환 확인 (비동기)"""
+    def _check_part_transition_async(self, conversation_id: str, current_part: int,
+                                    conversation_history: List[Dict],
+                                    resume_part: Optional[int] = None) -> None:
+        """
+        Part 전환 확인 (비동기)
+        
+        resume_part가 주어지면 전환은 이미 기록된 것으로 보고 해당 Part의 Task 생성부터 다시 수행
+        """
         try:
-            next_part = self.part_manager.check_part_transition(conversation_id)
+            next_part = resume_part
+            history_len = len(conversation_history)
+            
+            def advance(session: Session) -> None:
+                # 충돌로 재실행될 때는 최신 세션 기준으로 다시 판단 (다른 작업이 이미 전환했으면 아무것도 안 함)
+                nonlocal next_part
+                if not resume_part:
+                    next_part = self.part_manager.advance_part(session) if session.current_part == current_part else None
+                # 미리 생성한 Part 2 계획이 최신이면 전환과 함께 저장 (전환 턴에 계획 LLM 호출 없음)
+                if next_part == 2 and not session.tasks_in_part(2):
+                    draft = session.extra.get("part2_plan_draft")
+                    if self._is_part2_draft_fresh(draft, history_len):
+                        self._add_part2_plan(session, draft.get("goal"), draft.get("keywords") or [], draft["tasks"])
+                        logger.info(f"[PART_TRANSITION_ASYNC] 미리 생성한 Part 2 계획 사용: "
+                                   f"{history_len - draft['history_len']}개 메시지 전 생성, Task={len(draft['tasks'])}개")
+            
+            # 이전 Part의 sufficient Task들을 completed로 변경하고 Part 전환 (조건부 저장)
+            session = self.session_service.mutate(conversation_id, advance)
+            if not session:
+                logger.warning(f"[PART_TRANSITION_ASYNC] 세션을 찾을 수 없음")
+                return
+            if not next_part:
+                return
             
-            if next_part:
-                # 이전 Part의 sufficient Task들을 completed로 변경
-                for task in tasks:
-                    if task.get('part') == current_part and task.get('status') == 'sufficient':
-                        self.session_service.update_task_status(conversation_id, task.get('id'), 'completed')
-                
-                # Part 전환
-                self.part_manager.transition_to_part(conversation_id, next_part)
-                
-                # Part 2 목표 수립 및 Task 생성
-                if next_part == 2:
+            # Part 2 목표 수립 및 Task 생성 (미리 생성한 계획이 없거나 그 뒤로 대화가 많이 진행된 경우)
+            if next_part == 2:
+                if not session.tasks_in_part(2):
                     part2_goal, selected_keywords, part2_tasks = self.task_planner.create_part2_goal_and_plan(
                         conversation_id, conversation_history
                     )
@@ -687,82 +577,139 @@ class CounselorService:
                     
                     if len(part2_tasks) == 0:
                         logger.warning(f"[PART_TRANSITION_ASYNC] Part 2 Task 생성 실패 - 빈 리스트 반환")
-                    else:
-                        # Part 2 목표 및 선택된 키워드 저장
-                        if part2_goal:
-                            self.session_service.update_part2_goal(conversation_id, part2_goal, selected_keywords)
-                            logger.info(f"[PART_TRANSITION_ASYNC] Part 2 목표 저장 완료")
-                        
-                        # 기존 Task에 추가
-                        current_tasks = tasks + part2_tasks
-                        self.session_service.update_tasks(conversation_id, current_tasks)
-                        logger.info(f"[PART_TRANSITION_ASYNC] Firestore 업데이트 완료: tasks_count={len(current_tasks)}")
-                        
-                        # 캐시 업데이트
-                        if conversation_id in self.session_cache:
-                            self.session_cache[conversation_id]['tasks'] = current_tasks
-                            self.session_cache[conversation_id]['current_part'] = 2
-                            if part2_goal:
-                                self.session_cache[conversation_id]['part2_goal'] = part2_goal
-                                self.session_cache[conversation_id]['part2_selected_keywords'] = selected_keywords
-                            logger.info(f"[PART_TRANSITION_ASYNC] 캐시 업데이트 완료: tasks_count={len(current_tasks)}")
-                
-                # Part 3 Task 생성
-                elif next_part == 3:
-                    # 최신 세션 정보 가져오기
-                    session = self.session_service.get_session(conversation_id)
-                    if not session:
-                        logger.warning(f"[PART_TRANSITION_ASYNC] 세션을 찾을 수 없음")
-                        return
+                        # 작업 큐가 다시 시도하도록 실패로 처리 (재시도 시 Task 생성부터 재개)
+                        raise RuntimeError("Part 2 Task 생성 실패")
                     
-                    # 최신 tasks 가져오기 (세션에서)
-                    latest_tasks = session.get('tasks', tasks)
-                    part3_tasks = self.task_planner.create_part3_tasks()
-                    current_tasks = latest_tasks + part3_tasks
+                    # Part 2 목표 및 선택된 키워드 저장, 기존 Task에 추가 (이미 추가되어 있으면 건너뜀)
+                    def add_part2_tasks(session: Session) -> None:
+                        if session.tasks_in_part(2):
+                            return
+                        self._add_part2_plan(session, part2_goal, selected_keywords, part2_tasks)
                     
-                    # Firestore에 저장 (current_part와 tasks 함께 업데이트)
-                    session_ref = self.session_service.firestore.db.collection("sessions").document(conversation_id)
-                    session_ref.update({
-                        "current_part": next_part,
-                        "tasks": current_tasks,
-                        "updated_at": datetime.now()
-                    })
-                    
-                    logger.info(f"[PART_TRANSITION_ASYNC] Part 3 Task 생성: {len(part3_tasks)}개 Task 생성됨")
-                    logger.info(f"[PART_TRANSITION_ASYNC] Firestore 업데이트 완료: current_part={next_part}, tasks_count={len(current_tasks)}")
-                    
-                    # 캐시 업데이트
-                    if conversation_id in self.session_cache:
-                        self.session_cache[conversation_id]['tasks'] = current_tasks
-                        self.session_cache[conversation_id]['current_part'] = 3
-                        logger.info(f"[PART_TRANSITION_ASYNC] 캐시 업데이트 완료: current_part={next_part}, tasks_count={len(current_tasks)}")
+                    session = self.session_service.mutate(conversation_id, add_part2_tasks, session=session)
+                    logger.info(f"[PART_TRANSITION_ASYNC] Firestore 업데이트 완료: tasks_count={len(session.tasks)}")
+                
+                # 전환이 끝났으므로 미리 생성한 계획은 삭제
+                self._part2_draft_requests.pop(conversation_id, None)
+                if session.extra.get("part2_plan_draft"):
+                    self.session_service.clear_part2_plan_draft(conversation_id)
+                    session.extra["part2_plan_draft"] = None
+            
+            # Part 3 Task 생성
+            elif next_part == 3:
+                part3_tasks = self.task_planner.create_part3_tasks()
+                
+                def add_part3_tasks(session: Session) -> None:
+                    if session.tasks_in_part(3):
+                        return
+                    session.add_tasks(Task.from_dict(t) for t in part3_tasks)
                     
                     # Part 3의 첫 번째 Task 선택
                     part3_pending = [t for t in part3_tasks if t.get('status') == 'pending']
                     if part3_pending:
-                        first_task = part3_pending[0]
-                        self.session_service.set_current_task(conversation_id, first_task.get('id'))
-                        self.session_service.update_task_status(conversation_id, first_task.get('id'), 'in_progress')
-                        logger.info(f"[PART_TRANSITION_ASYNC] Part 3 첫 번째 Task 선택: {first_task.get('id')}")
+                        first_task_id = part3_pending[0].get('id')
+                        session.current_task = first_task_id
+                        session.set_task_status(first_task_id, 'in_progress')
+                        logger.info(f"[PART_TRANSITION_ASYNC] Part 3 첫 번째 Task 선택: {first_task_id}")
                 
-                logger.info(f"[PART_TRANSITION] conversation_id={conversation_id[:8]}... | "
-                           f"part {current_part} → {next_part}")
+                session = self.session_service.mutate(conversation_id, add_part3_tasks, session=session)
+                logger.info(f"[PART_TRANSITION_ASYNC] Part 3 Task 생성: {len(part3_tasks)}개 Task 생성됨")
+                logger.info(f"[PART_TRANSITION_ASYNC] Firestore 업데이트 완료: current_part={next_part}, tasks_count={len(session.tasks)}")
+            
+            # 캐시 업데이트
+            self._cache_session(session)
+            
+            logger.info(f"[PART_TRANSITION] conversation_id={conversation_id[:8]}... | "
+                       f"part {current_part} → {next_part}")
         
         except Exception as e:
             logger.error(f"[PART_TRANSITION ERROR] conversation_id={conversation_id[:8]}... | "
                         f"error={str(e)}")
+            raise
+    
+    @staticmethod
+    def _add_part2_plan(session: Session, part2_goal: Optional[str], selected_keywords: List[str],
+                        part2_tasks: List[Dict]) -> None:
+        """Part 2 목표, 선택된 키워드, Task를 세션 모델에 추가"""
+        if part2_goal:
+            session.part2_goal = part2_goal
+            session.part2_selected_keywords = selected_keywords
+        session.add_tasks(Task.from_dict(t) for t in part2_tasks)
     
-    def _check_part2_task_update_async(self, conversation_id: str, current_tasks: List[Dict],
-                                      conversation_history: List[Dict], user_state: Dict) -> None:
+    @staticmethod
+    def _is_part2_draft_fresh(draft: Optional[Dict], history_len: int) -> bool:
+        """미리 생성한 Part 2 계획을 그대로 쓸 수 있는지 (생성 후 대화가 PART2_PLAN_DRAFT_MAX_STALE_MESSAGES 이내로 진행)"""
+        if not draft or not draft.get("tasks"):
+            return False
+        return 0 <= history_len - draft.get("history_len", 0) <= Config.PART2_PLAN_DRAFT_MAX_STALE_MESSAGES
+    
+    def _submit_part2_plan_draft(self, conversation_id: str, session: Session, history_len: int,
+                                 user_state: Optional[Dict]) -> None:
+        """
+        남은 Part 1 Task가 PART2_PLAN_SPECULATE_REMAINING개 이하면 Part 2 계획 미리 생성 작업 제출
+        
+        이미 요청했으면 대화가 많이 진행됐거나 주제가 바뀐 경우에만 다시 생성한다.
+        남은 Task가 없으면 이번 턴의 Part 전환 작업이 계획을 만들므로 제출하지 않는다.
+        """
+        remaining = [t for t in session.tasks_in_part(1) if t.status not in ('sufficient', 'completed')]
+        if not remaining or len(remaining) > Config.PART2_PLAN_SPECULATE_REMAINING:
+            return
+        
+        requested = self._part2_draft_requests.get(conversation_id)
+        topic_changed = requested is not None and bool(user_state and user_state.get('topic_change'))
+        if (requested is not None and not topic_changed
+                and history_len - requested <= Config.PART2_PLAN_DRAFT_MAX_STALE_MESSAGES):
+            return
+        
+        self._part2_draft_requests[conversation_id] = history_len
+        self.jobs.submit("part2_plan_draft", conversation_id, {
+            "history_len": history_len,
+            "regenerate": topic_changed
+        })
+    
+    def _invalidate_cache_on_error(self, handler: Callable[[str, Dict], None]) -> Callable[[str, Dict], None]:
+        """
+        세션을 바꾸는 작업 처리기 감싸기 - 실패하면 캐시된 세션을 버림
+        
+        전환이 일부만 저장되었거나 저장이 충돌로 끝난 경우, 다음 턴이 캐시의 이전 Part/Task로
+        진행하지 않도록 revision을 한 번 확인하게 한다 (성공 시에는 처리기가 _cache_session으로 갱신).
+        진행 중인 턴이 이전 세션 객체를 다시 캐시에 넣어도 확인은 다음 턴에 이루어진다.
+        """
+        def run(conversation_id: str, payload: Dict) -> None:
+            try:
+                handler(conversation_id, payload)
+            except Exception:
+                self._stale_sessions.add(conversation_id)
+                raise
+        return run
+    
+    def _cache_session(self, session: Session) -> None:
+        """
+        저장한 세션 모델을 캐시에 저장 (캐시에 더 최신 revision이 있으면 유지)
+        
+        캐시된 객체를 제자리에서 고치지 않고 교체하므로, 진행 중인 턴이 들고 있는 이전 객체는
+        commit 시 revision 충돌로 최신 세션에 변경을 다시 적용한다.
+        """
+        cached = self.session_cache.get(session.conversation_id)
+        if cached is not None and cached is not session:
+            if cached.revision > session.revision:
+                return
+            # message_count는 턴이 끝날 때 캐시에서만 먼저 증가
+            session.message_count = max(session.message_count, cached.message_count)
+        self.session_cache[session.conversation_id] = session
+        logger.info(f"[CACHE] 캐시 업데이트 완료: current_part={session.current_part}, tasks_count={len(session.tasks)}")
+    
+    def _check_part2_task_update_async(self, conversation_id: str, conversation_history: List[Dict],
+                                      user_state: Dict) -> None:
         """Part 2 Task 업데이트 확인 (비동기)"""
         try:
             # 세션에서 업데이트 횟수 확인
-            session = self.session_service.get_session(conversation_id)
+            session = self.session_service.get_session_model(conversation_id)
             if not session:
                 logger.warning(f"[PART2_UPDATE] 세션을 찾을 수 없음")
                 return
             
-            update_count = session.get('part2_task_update_count', 0)
+            update_count = session.part2_task_update_count
             MAX_UPDATE_COUNT = 2
             
             # 이미 최대 횟수에 도달했으면 업데이트하지 않음
@@ -788,9 +735,10 @@ class CounselorService:
                        f"resistance={user_state.get('resistance_detected')}, "
                        f"circular={user_state.get('circular_conversation')}")
             
-            # Task 업데이트 실행 (Part 2 목표 정보 포함)
-            part2_goal = session.get('part2_goal')
-            selected_keywords = session.get('part2_selected_keywords', [])
+            # Task 업데이트 실행 (Part 2 목표 정보 포함, 저장된 최신 Task 기준)
+            current_tasks = session.task_dicts()
+            part2_goal = session.part2_goal
+            selected_keywords = session.part2_selected_keywords or []
             updated_tasks = self.task_planner.update_part2_tasks(
                 conversation_history,
                 current_tasks,
@@ -801,21 +749,24 @@ class CounselorService:
             )
             
             if updated_tasks != current_tasks:
-                # Firestore 업데이트
-                self.session_service.update_tasks(conversation_id, updated_tasks)
-                
-                # 업데이트 횟수 증가
-                session_ref = self.session_service.firestore.db.collection("sessions").document(conversation_id)
+                # Task와 업데이트 횟수를 함께 저장
                 new_update_count = update_count + 1
-                session_ref.update({
-                    "part2_task_update_count": new_update_count,
-                    "updated_at": datetime.now()
-                })
+                
+                def apply_update(session: Session) -> None:
+                    # 그 사이 다른 업데이트가 저장되었으면 이번 결과는 버림
+                    if session.part2_task_update_count != update_count:
+                        return
+                    # 기존 Task의 진행 상태는 최신 세션 값 유지 (턴 처리 중 바뀐 상태가 사라지지 않도록)
+                    latest_states = {task.id: task.state() for task in session.tasks}
+                    session.replace_tasks(
+                        Task.from_dict({**t, **latest_states.get(t.get('id'), {})}) for t in updated_tasks
+                    )
+                    session.part2_task_update_count = new_update_count
+                
+                session = self.session_service.mutate(conversation_id, apply_update, session=session)
                 
                 # 캐시 업데이트
-                if conversation_id in self.session_cache:
-                    self.session_cache[conversation_id]['tasks'] = updated_tasks
-                    self.session_cache[conversation_id]['part2_task_update_count'] = new_update_count
+                self._cache_session(session)
                 
                 logger.info(f"[PART2_UPDATE] Task 업데이트 완료 ({new_update_count}/{MAX_UPDATE_COUNT}회): {len(updated_tasks)}개 Task")
             else:
@@ -825,6 +776,7 @@ class CounselorService:
             import traceback
             logger.error(f"[PART2_UPDATE] 오류: {str(e)}")
             logger.error(f"[PART2_UPDATE] Traceback: {traceback.format_exc()}")
+            raise
     
     def _run_supervision_async(self, conversation_id: str, message: str, 
                                counselor_response: str, current_task: Optional[Dict],
@@ -852,15 +804,12 @@ class CounselorService:
             self.session_service.add_supervision_log(conversation_id, supervision_log_entry)
             
             # 캐시 업데이트
-            if conversation_id in self.session_cache:
-                session = self.session_cache[conversation_id]
-                supervision_log = session.get('supervision_log', [])
-                supervision_log.append({
+            cached = self.session_cache.get(conversation_id)
+            if cached:
+                cached.supervision_log.append(SupervisionEntry.from_dict({
                     **supervision_log_entry,
                     "timestamp": datetime.now().isoformat()
-                })
-                session['supervision_log'] = supervision_log
-                self.session_cache[conversation_id] = session
+                }))
             
             logger.info(f"[SUPERVISION] conversation_id={conversation_id[:8]}... | "
                        f"score={supervision_log_entry['score']}")
@@ -868,16 +817,95 @@ class CounselorService:
         except Exception as e:
             logger.error(f"[SUPERVISION ERROR] conversation_id={conversation_id[:8]}... | "
                         f"error={str(e)}")
+            raise
+    
+    def _load_history(self, conversation_id: str, history_len: int) -> List[Dict]:
+        """작업 제출 시점의 대화 기록 다시 읽기"""
+        return self.firestore.get_conversation_history(conversation_id)[:history_len]
+    
+    def _handle_supervision_job(self, conversation_id: str, payload: Dict) -> None:
+        """Supervision 작업 처리 (같은 메시지에 대한 기록이 이미 있으면 건너뜀)"""
+        session = self.session_service.get_session_model(conversation_id)
+        if session and session.supervision_for(payload["message_index"]):
+            return
+        
+        self._run_supervision_async(
+            conversation_id,
+            payload["message"],
+            payload["counselor_response"],
+            payload.get("current_task"),
+            self._load_history(conversation_id, payload["history_len"]),
+            payload["message_index"]
+        )
+    
+    def _handle_part_transition_job(self, conversation_id: str, payload: Dict) -> None:
+        """Part 전환 작업 처리 (전환만 기록되고 Task 생성 전에 중단된 경우 이어서 수행)"""
+        current_part = payload["current_part"]
+        conversation_history = self._load_history(conversation_id, payload["history_len"])
+        
+        session = self.session_service.get_session_model(conversation_id)
+        if session and session.current_part > current_part:
+            if not session.tasks_in_part(session.current_part):
+                logger.info(f"[PART_TRANSITION] 중단된 전환 재개: conversation_id={conversation_id[:8]}... | "
+                           f"part={session.current_part}")
+                self._check_part_transition_async(
+                    conversation_id, current_part, conversation_history, resume_part=session.current_part
+                )
+            return
+        
+        self._check_part_transition_async(conversation_id, current_part, conversation_history)
     
-    def _format_messages_for_display(self, messages: List) -> str:
-        """메시지를 표시용 문자열로 변환"""
-        prompt_parts = []
-        for role, content in messages:
-            if role == 'system':
-                prompt_parts.append(f"[System]\n{content}\n")
-            elif role == 'user':
-                prompt_parts.append(f"[User]\n{content}\n")
-            elif role == 'assistant':
-                prompt_parts.append(f"[Assistant]\n{content}\n")
-        
-        return "\n".join(prompt_parts)
+    def _handle_part2_update_job(self, conversation_id: str, payload: Dict) -> None:
+        """Part 2 Task 업데이트 작업 처리"""
+        self._check_part2_task_update_async(
+            conversation_id,
+            self._load_history(conversation_id, payload["history_len"]),
+            payload["user_state"]
+        )
+    
+    def _handle_part2_plan_draft_job(self, conversation_id: str, payload: Dict) -> None:
+        """
+        Part 2 계획 미리 생성 작업 처리
+        
+        Part 1이 이미 끝났거나, 같은 시점 이후의 계획이 있거나, (주제 변경이 아니면) 저장된 계획이 아직 최신이면 건너뜀.
+        생성에 실패하면 재시도하지 않음 (전환 시 다시 생성).
+        """
+        history_len = payload["history_len"]
+        session = self.session_service.get_session_model(conversation_id)
+        if not session or session.current_part != 1:
+            return
+        
+        draft = session.extra.get("part2_plan_draft")
+        if draft and (draft.get("history_len", 0) >= history_len or
+                      (not payload.get("regenerate") and self._is_part2_draft_fresh(draft, history_len))):
+            return
+        
+        t0 = time.time()
+        part2_goal, selected_keywords, part2_tasks = self.task_planner.create_part2_goal_and_plan(
+            conversation_id, self._load_history(conversation_id, history_len)
+        )
+        if not part2_tasks:
+            logger.warning(f"[PART2_PLAN_DRAFT] Part 2 계획 미리 생성 실패 - 빈 리스트 반환")
+            return
+        
+        # 생성하는 동안 전환이 끝났으면 버림
+        if self.part_manager.get_current_part(conversation_id) != 1:
+            return
+        
+        self.session_service.save_part2_plan_draft(conversation_id, {
+            "goal": part2_goal,
+            "keywords": selected_keywords,
+            "tasks": part2_tasks,
+            "history_len": history_len,
+            "created_at": datetime.now().isoformat()
+        })
+        logger.info(f"[PART2_PLAN_DRAFT] Part 2 계획 미리 생성: history_len={history_len}, Task={len(part2_tasks)}개",
+                    extra={"stage": "part2_plan_draft", "latency_ms": round((time.time() - t0) * 1000, 1)})
+    
+    def _build_prompt_ref(self, messages: List, history_count: int) -> Optional[Dict]:
+        """프롬프트 참조 생성 (저장 실패 시 응답에는 영향 없음)"""
+        try:
+            return self.prompt_store.build_ref(messages, history_count)
+        except Exception as e:
+            logger.error(f"[PROMPT_STORE ERROR] 프롬프트 저장 실패: {str(e)}")
+            return None
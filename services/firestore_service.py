@@ -1,29 +1,33 @@
 """Firestore 대화 저장 서비스 모듈"""
-import os
 from datetime import datetime
-from typing import List, Dict, Optional
-import firebase_admin
-from firebase_admin import credentials, firestore
+from typing import List, Dict, Optional, Tuple
 from config import Config
+from services.storage_backend import get_storage_backend
+from services.text_codec import TextCodec
 
 
 class FirestoreService:
     """Firestore를 사용한 대화 저장 서비스"""
     
+    # 대화 목록에서 가져오는 요약 필드 (메시지 본문 제외)
+    SUMMARY_FIELDS = ['user_id', 'created_at', 'updated_at', 'message_count', 'last_message_preview']
+    
+    # 목록용 마지막 메시지 미리보기 길이
+    PREVIEW_LENGTH = 80
+    
+    # 메시지별 메타데이터(프롬프트 등) 하위 컬렉션: conversations/<id>/message_meta/<seq>
+    METADATA_SUBCOLLECTION = 'message_meta'
+    
+    # 메시지 메타데이터 중 압축 저장하는 텍스트 필드
+    COMPRESSED_METADATA_FIELDS = ('prompt', 'task_selector_output')
+    COMPRESSED_SUPERVISION_FIELDS = ('feedback', 'improvements', 'strengths')
+    
     def __init__(self):
         """Firestore 서비스 초기화"""
-        # Firebase Admin SDK 초기화 (이미 초기화되어 있지 않은 경우만)
-        if not firebase_admin._apps:
-            cred_path = Config.GOOGLE_APPLICATION_CREDENTIALS
-            if cred_path and os.path.exists(cred_path):
-                cred = credentials.Certificate(cred_path)
-                firebase_admin.initialize_app(cred)
-            else:
-                # 파일이 없으면 기본 자격 증명 사용 (Cloud Run 등)
-                firebase_admin.initialize_app()
-        
-        self.db = firestore.client()
+        # 저장소 백엔드 (Config.STORAGE_BACKEND: firestore 또는 memory)
+        self.db = get_storage_backend()
         self.collection_name = Config.FIRESTORE_COLLECTION
+        self.codec = TextCodec()
     
     def create_conversation(self, user_id: str, initial_message: Optional[str] = None) -> str:
         """
@@ -43,20 +47,25 @@ class FirestoreService:
             'user_id': user_id,
             'created_at': datetime.now(),
             'updated_at': datetime.now(),
-            'messages': []
+            'messages': [],
+            'message_count': 0  # 다음 메시지의 순번(seq)
         }
         
         if initial_message:
             conversation_data['messages'].append({
+                'seq': 0,
                 'role': 'user',
                 'content': initial_message,
                 'timestamp': datetime.now()
             })
+            conversation_data['message_count'] = 1
+            conversation_data['last_message_preview'] = initial_message[:self.PREVIEW_LENGTH]
         
         conversation_ref.set(conversation_data)
         return conversation_id
     
-    def add_message(self, conversation_id: str, role: str, content: str, metadata: Optional[Dict] = None) -> None:
+    def add_message(self, conversation_id: str, role: str, content: str, metadata: Optional[Dict] = None,
+                    expected_seq: Optional[int] = None) -> int:
         """
         대화에 메시지 추가
         
@@ -64,23 +73,118 @@ class FirestoreService:
             conversation_id: 대화 ID
             role: 메시지 역할 ('user' 또는 'assistant')
             content: 메시지 내용
-            metadata: 메시지 메타데이터 (프롬프트 등)
+            metadata: 메시지 메타데이터 (프롬프트 등, 하위 컬렉션에 별도 저장)
+            expected_seq: 주어지면 이 순번의 메시지가 이미 저장된 경우 다시 쓰지 않고 expected_seq 반환
+                          (write-behind 재반영 시 중복 방지)
+            
+        Returns:
+            저장된 메시지의 순번(seq, 메시지 배열 인덱스와 동일)
         """
         conversation_ref = self.db.collection(self.collection_name).document(conversation_id)
         
-        message = {
-            'role': role,
-            'content': content,
-            'timestamp': datetime.now()
-        }
+        def append_message(transaction) -> int:
+            snapshot = conversation_ref.get(field_paths=['message_count'], transaction=transaction)
+            seq = (snapshot.to_dict() or {}).get('message_count')
+            legacy_count = None
+            if seq is None:
+                # message_count가 없는 기존 대화는 메시지 배열 길이로 계산
+                legacy = conversation_ref.get(field_paths=['messages'], transaction=transaction)
+                seq = legacy_count = len((legacy.to_dict() or {}).get('messages', []))
+            if expected_seq is not None and seq > expected_seq:
+                return expected_seq
+            
+            message = {
+                'seq': seq,
+                'role': role,
+                'content': content,
+                'timestamp': datetime.now()
+            }
+            
+            if metadata:
+                # 대화 문서에는 표시만 남기고 본문은 seq로 주소 지정되는 문서에 저장
+                message['has_metadata'] = True
+                transaction.set(self._metadata_ref(conversation_id, seq), {
+                    **self._encode_metadata(metadata),
+                    'seq': seq,
+                    'created_at': datetime.now()
+                })
+            
+            updates = {
+                'messages': self.db.array_union([message]),
+                'message_count': seq + 1,
+                'last_message_preview': content[:self.PREVIEW_LENGTH],
+                'updated_at': datetime.now()
+            }
+            if legacy_count is not None:
+                # 이 순번 미만의 메시지는 메타데이터가 대화 문서에 들어 있음
+                updates['legacy_metadata_before'] = legacy_count
+            transaction.update(conversation_ref, updates)
+            return seq
         
-        if metadata:
-            message['metadata'] = metadata
+        return self.db.run_transaction(append_message)
+    
+    def get_message_metadata(self, conversation_id: str, seq: int,
+                             field_paths: Optional[List[str]] = None) -> Optional[Dict]:
+        """
+        특정 메시지의 메타데이터 가져오기 (단일 문서 조회)
+        
+        Args:
+            conversation_id: 대화 ID
+            seq: 메시지 순번
+            field_paths: 읽을 필드 (None이면 전체, 압축된 텍스트는 읽은 필드만 복원)
+            
+        Returns:
+            메타데이터 딕셔너리 또는 None
+        """
+        doc = self._metadata_ref(conversation_id, seq).get(field_paths=field_paths)
+        if doc.exists:
+            return self._decode_metadata(doc.to_dict() or {})
         
-        conversation_ref.update({
-            'messages': firestore.ArrayUnion([message]),
-            'updated_at': datetime.now()
-        })
+        # 하위 컬렉션 도입 전 메시지만 대화 문서에 메타데이터가 들어 있음
+        # (message_count가 없는 대화, 또는 legacy_metadata_before 미만의 seq)
+        # 그 외에는 user 메시지나 범위 밖 seq이므로 대화 문서 전체를 읽지 않음
+        conversation_ref = self.db.collection(self.collection_name).document(conversation_id)
+        counter = conversation_ref.get(field_paths=['message_count', 'legacy_metadata_before'])
+        if not counter.exists:
+            return None
+        counter = counter.to_dict() or {}
+        if counter.get('message_count') is not None and seq >= counter.get('legacy_metadata_before', 0):
+            return None
+        conversation = self.get_conversation(conversation_id)
+        if not conversation:
+            return None
+        messages = conversation.get('messages', [])
+        if 0 <= seq < len(messages) and messages[seq].get('role') == 'assistant':
+            metadata = messages[seq].get('metadata')
+            if metadata is not None and field_paths is not None:
+                metadata = {key: value for key, value in metadata.items() if key in field_paths}
+            return metadata
+        return None
+    
+    def _encode_metadata(self, metadata: Dict) -> Dict:
+        """저장 전 메타데이터의 큰 텍스트 필드 압축"""
+        encoded = self.codec.encode_fields(metadata, self.COMPRESSED_METADATA_FIELDS)
+        if isinstance(encoded.get('supervision'), dict):
+            encoded['supervision'] = self.codec.encode_fields(
+                encoded['supervision'], self.COMPRESSED_SUPERVISION_FIELDS
+            )
+        return encoded
+    
+    def _decode_metadata(self, metadata: Dict) -> Dict:
+        """읽은 메타데이터의 압축된 텍스트 복원"""
+        self.codec.decode_fields(metadata, self.COMPRESSED_METADATA_FIELDS)
+        if isinstance(metadata.get('supervision'), dict):
+            self.codec.decode_fields(metadata['supervision'], self.COMPRESSED_SUPERVISION_FIELDS)
+        return metadata
+    
+    def _metadata_ref(self, conversation_id: str, seq: int):
+        """메시지 메타데이터 문서 참조 (seq를 0으로 채워 정렬 순서 유지)"""
+        return (
+            self.db.collection(self.collection_name)
+            .document(conversation_id)
+            .collection(self.METADATA_SUBCOLLECTION)
+            .document(f"{seq:08d}")
+        )
     
     def get_conversation(self, conversation_id: str) -> Optional[Dict]:
         """
@@ -114,33 +218,88 @@ class FirestoreService:
             return conversation.get('messages', [])
         return []
     
-    def list_conversations(self, user_id: str, limit: int = 10) -> List[Dict]:
+    def get_messages(self, conversation_id: str, since: int = -1, limit: int = 50,
+                     exclude: Optional[List[str]] = None) -> Optional[List[Dict]]:
         """
-        사용자의 대화 목록 가져오기
+        since 이후의 메시지만 가져오기
+        
+        Args:
+            conversation_id: 대화 ID
+            since: 이 순번(seq) 이후의 메시지만 반환 (-1이면 처음부터)
+            limit: 최대 메시지 개수
+            exclude: 제외할 필드 경로 목록 (예: ["metadata.prompt"])
+            
+        Returns:
+            메시지 리스트 (seq 오름차순) 또는 None (대화가 없는 경우)
+        """
+        # 메시지 배열만 읽음 (대화 문서의 다른 필드 제외)
+        conversation_doc = (
+            self.db.collection(self.collection_name).document(conversation_id).get(field_paths=['messages'])
+        )
+        if not conversation_doc.exists:
+            return None
+        
+        messages = []
+        for index, message in enumerate((conversation_doc.to_dict() or {}).get('messages', [])):
+            # seq가 없는 기존 메시지는 배열 인덱스가 순번
+            message.setdefault('seq', index)
+            if message['seq'] > since:
+                messages.append(message)
+            if len(messages) >= limit:
+                break
+        
+        for path in exclude or []:
+            keys = path.split('.')
+            for message in messages:
+                target = message
+                for key in keys[:-1]:
+                    target = target.get(key) if isinstance(target, dict) else None
+                if isinstance(target, dict):
+                    target.pop(keys[-1], None)
+        
+        return messages
+    
+    def list_conversations(self, user_id: str, limit: int = 10,
+                           cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        사용자의 대화 목록 가져오기 (최신순, 요약 필드만)
+        
+        (user_id, updated_at desc) 복합 인덱스가 필요합니다 (firestore.indexes.json).
+        updated_at이 없는 대화는 결과에서 빠지므로 기존 데이터는
+        scripts/backfill_conversation_updated_at.py로 먼저 채워야 합니다.
         
         Args:
             user_id: 사용자 ID
             limit: 가져올 대화 개수
+            cursor: 이전 페이지의 next_cursor (마지막 대화 ID)
             
         Returns:
-            대화 목록
+            (대화 요약 목록, 다음 페이지 커서 또는 None)
         """
         conversations_ref = self.db.collection(self.collection_name)
-        # order_by는 복합 인덱스가 필요하므로 제거하고 Python에서 정렬
-        query = conversations_ref.where('user_id', '==', user_id).limit(limit * 2)  # 정렬을 위해 더 많이 가져옴
+        query = (
+            conversations_ref
+            .where('user_id', '==', user_id)
+            .order_by('updated_at', direction=self.db.DESCENDING)
+            .select(self.SUMMARY_FIELDS)
+        )
         
+        if cursor:
+            cursor_doc = conversations_ref.document(cursor).get(field_paths=['updated_at'])
+            if cursor_doc.exists:
+                query = query.start_after(cursor_doc)
+        
+        # 다음 페이지 존재 여부 확인을 위해 하나 더 가져옴
         conversations = []
-        for doc in query.stream():
+        for doc in query.limit(limit + 1).stream():
             conv_data = doc.to_dict()
             conv_data['id'] = doc.id
             conversations.append(conv_data)
         
-        # updated_at 기준으로 내림차순 정렬 (최신순)
-        conversations.sort(
-            key=lambda x: x.get('updated_at', datetime.min) if isinstance(x.get('updated_at'), datetime) else datetime.min,
-            reverse=True
-        )
+        next_cursor = None
+        if len(conversations) > limit:
+            conversations = conversations[:limit]
+            next_cursor = conversations[-1]['id']
         
-        # limit만큼만 반환
-        return conversations[:limit]
+        return conversations, next_cursor
 
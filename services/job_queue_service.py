@@ -0,0 +1,204 @@
+"""백그라운드 작업 큐 서비스 - 작업을 저장소에 먼저 기록하고 실행 (인스턴스 종료 시 재실행)"""
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from config import Config
+from services.firestore_service import FirestoreService
+from services.log_setup import log_context
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueService:
+    """
+    영속 작업 outbox
+
+    - submit()은 작업을 `background_jobs` 컬렉션에 pending으로 기록한 뒤 실행을 예약
+      (저장소 백엔드를 따르므로 Firestore 배포에서는 Firestore, sqlite/memory에서는 로컬 저장)
+    - 실행 전 트랜잭션으로 lease를 잡고(running), 끝나면 문서를 삭제
+    - 인스턴스가 중간에 종료되면 lease가 만료된 작업을 시작 시점(replay_unfinished) 또는 워커가 다시 실행
+    - 실패한 작업은 backoff(next_attempt_ts) 후 다시 실행하고, JOB_MAX_ATTEMPTS번 실패하면 failed로 남김
+      (inline 모드는 재시도 시각에 스레드 풀에 다시 넣고, 워커는 폴링에서 재시도 시각이 된 작업을 가져감)
+    - JOB_EXECUTION_MODE=worker이면 웹 프로세스는 기록만 하고, 별도 워커 프로세스(worker.py)가 실행
+    """
+
+    COLLECTION = "background_jobs"
+
+    # 재시도 간격 상한 (초)
+    MAX_BACKOFF = 300
+
+    def __init__(self, mode: Optional[str] = None):
+        """
+        Args:
+            mode: 'inline'(웹 프로세스 스레드 풀에서 실행) 또는 'worker'(워커 프로세스에서 실행)
+        """
+        self.firestore = FirestoreService()
+        self.mode = mode or Config.JOB_EXECUTION_MODE
+        self.lease_seconds = Config.JOB_LEASE_SECONDS
+        self.max_attempts = Config.JOB_MAX_ATTEMPTS
+        self.retry_backoff = Config.JOB_RETRY_BACKOFF_SECONDS
+        self.owner = f"{socket.gethostname()}-{os.getpid()}"
+
+        self._handlers: Dict[str, Callable[[str, Dict], None]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=Config.JOB_THREADS, thread_name_prefix="job")
+
+    def register(self, job_type: str, handler: Callable[[str, Dict], None]) -> None:
+        """
+        작업 처리기 등록
+
+        Args:
+            job_type: 작업 종류
+            handler: handler(conversation_id, payload) - 다시 실행되어도 안전해야 함
+        """
+        self._handlers[job_type] = handler
+
+    def submit(self, job_type: str, conversation_id: str, payload: Dict) -> str:
+        """
+        작업 기록 후 실행 예약
+
+        Args:
+            job_type: 작업 종류
+            conversation_id: 대화 ID
+            payload: 처리기에 전달할 데이터 (저장소에 그대로 저장되므로 직렬화 가능해야 함)
+
+        Returns:
+            작업 ID
+        """
+        job_ref = self._collection().document()
+        job_ref.set({
+            "type": job_type,
+            "conversation_id": conversation_id,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "created_at": datetime.now(),
+            "updated_at": datetime.now()
+        })
+
+        if self.mode == "inline":
+            self._executor.submit(self.run_job, job_ref.id)
+        return job_ref.id
+
+    def replay_unfinished(self) -> int:
+        """이전 인스턴스가 끝내지 못한 작업 재실행 예약 (시작 시 호출, 재시도 대기 중인 작업은 재시도 시각에)"""
+        job_ids = self._runnable_job_ids()
+        for job_id in job_ids:
+            self._executor.submit(self.run_job, job_id)
+
+        now = time.time()
+        waiting = 0
+        for snapshot in self._collection().where("status", "==", "pending").stream():
+            next_attempt_ts = snapshot.to_dict().get("next_attempt_ts", 0)
+            if next_attempt_ts > now:
+                self._schedule_retry(snapshot.id, next_attempt_ts - now)
+                waiting += 1
+
+        if job_ids or waiting:
+            logger.info(f"[JOB_QUEUE] 미완료 작업 {len(job_ids)}개 재실행, {waiting}개 재시도 예약")
+        return len(job_ids) + waiting
+
+    def run_worker(self, poll_interval: Optional[float] = None) -> None:
+        """워커 프로세스 메인 루프 (실행 가능한 작업을 계속 가져와 처리)"""
+        poll_interval = Config.JOB_POLL_INTERVAL if poll_interval is None else poll_interval
+        logger.info(f"[JOB_QUEUE] 워커 시작: owner={self.owner}, handlers={sorted(self._handlers)}")
+        while True:
+            job_ids = self._runnable_job_ids()
+            futures = [self._executor.submit(self.run_job, job_id) for job_id in job_ids]
+            for future in futures:
+                future.result()
+            if not job_ids:
+                time.sleep(poll_interval)
+
+    def run_job(self, job_id: str) -> None:
+        """작업 하나 실행 (lease를 잡지 못하면 다른 곳에서 실행 중이므로 건너뜀)"""
+        job = self._claim(job_id)
+        if job is None:
+            return
+
+        job_ref = self._collection().document(job_id)
+        handler = self._handlers.get(job.get("type"))
+        if handler is None:
+            logger.error(f"[JOB_QUEUE] 알 수 없는 작업 종류: {job.get('type')} (job_id={job_id})")
+            job_ref.update({"status": "failed", "error": "unknown job type", "updated_at": datetime.now()})
+            return
+
+        start = time.perf_counter()
+        try:
+            with log_context(conversation_id=job["conversation_id"], job_type=job.get("type"), job_id=job_id):
+                handler(job["conversation_id"], job.get("payload") or {})
+        except Exception as e:
+            failed = job["attempts"] >= self.max_attempts
+            backoff = min(self.retry_backoff * 2 ** (job["attempts"] - 1), self.MAX_BACKOFF)
+            logger.error(f"[JOB_QUEUE ERROR] type={job.get('type')} | job_id={job_id} | "
+                         f"attempts={job['attempts']} | "
+                         f"{'failed' if failed else f'retry_in={backoff}s'} | error={str(e)}")
+            job_ref.update({
+                "status": "failed" if failed else "pending",
+                "error": str(e),
+                "lease_until_ts": 0,
+                "next_attempt_ts": 0 if failed else time.time() + backoff,
+                "updated_at": datetime.now()
+            })
+            if not failed and self.mode == "inline":
+                self._schedule_retry(job_id, backoff)
+            return
+
+        latency = time.perf_counter() - start
+        job_ref.delete()
+        logger.info(f"[JOB_QUEUE] type={job.get('type')} | job_id={job_id} | {latency:.2f}s",
+                    extra={"stage": f"job.{job.get('type')}", "conversation_id": job["conversation_id"],
+                           "latency_ms": round(latency * 1000, 1)})
+
+    def _schedule_retry(self, job_id: str, delay: float) -> None:
+        """delay초 뒤에 작업을 스레드 풀에 다시 넣음 (그 전에 인스턴스가 종료되면 replay_unfinished가 처리)"""
+        timer = threading.Timer(delay, self._executor.submit, args=(self.run_job, job_id))
+        timer.daemon = True
+        timer.start()
+
+    def _claim(self, job_id: str) -> Optional[Dict]:
+        job_ref = self._collection().document(job_id)
+
+        def claim(transaction) -> Optional[Dict]:
+            snapshot = job_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return None
+            job = snapshot.to_dict()
+            if not self._is_runnable(job):
+                return None
+
+            job["attempts"] = job.get("attempts", 0) + 1
+            transaction.update(job_ref, {
+                "status": "running",
+                "owner": self.owner,
+                "attempts": job["attempts"],
+                # 저장소마다 datetime 시간대 처리가 달라 lease는 epoch 초로 비교
+                "lease_until_ts": time.time() + self.lease_seconds,
+                "updated_at": datetime.now()
+            })
+            return job
+
+        return self.firestore.db.run_transaction(claim)
+
+    def _runnable_job_ids(self) -> List[str]:
+        job_ids = []
+        for status in ("pending", "running"):
+            for snapshot in self._collection().where("status", "==", status).stream():
+                if self._is_runnable(snapshot.to_dict()):
+                    job_ids.append(snapshot.id)
+        return job_ids
+
+    @staticmethod
+    def _is_runnable(job: Dict) -> bool:
+        if job.get("status") == "pending":
+            # 실패 후 재시도 시각 전이면 아직 실행하지 않음
+            return job.get("next_attempt_ts", 0) <= time.time()
+        # 실행 중이던 인스턴스가 사라져 lease가 만료된 작업
+        return job.get("status") == "running" and job.get("lease_until_ts", 0) < time.time()
+
+    def _collection(self):
+        return self.firestore.db.collection(self.COLLECTION)
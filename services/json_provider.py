@@ -0,0 +1,146 @@
+"""
+JSON 응답 직렬화 - Flask 앱의 JSON provider
+
+- datetime(Firestore DatetimeWithNanoseconds 포함), protobuf Timestamp, Firestore sentinel/transform,
+  bytes, 모델 객체를 직렬화 중에 한 번에 변환 (라우트에서 미리 순회하며 isoformat()할 필요 없음)
+- orjson이 설치되어 있으면 사용하고, 없으면 표준 json으로 같은 결과를 만든다
+- ?fields=a,b.c 필드 마스크와 gzip 압축(Accept-Encoding, JSON_GZIP_MIN_BYTES 이상)을 응답 단계에서 처리
+"""
+import base64
+import gzip
+import json
+from datetime import date, datetime, time
+from typing import Any, Dict, Iterable, Optional
+
+from flask import Response, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+from config import Config
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성 - 없으면 표준 json 사용
+    orjson = None
+
+
+def json_default(value: Any) -> Any:
+    """기본 JSON 인코더가 처리하지 못하는 값 변환"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if hasattr(value, "ToDatetime"):
+        # protobuf Timestamp
+        return value.ToDatetime().isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode("ascii")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if type(value).__name__ == "Sentinel":
+        # firestore.SERVER_TIMESTAMP / DELETE_FIELD 등 (저장소가 채울 값이므로 응답에서는 null)
+        return None
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    # increment / array_union 변환 값은 안에 든 값으로
+    if hasattr(value, "values") and not callable(value.values):
+        return list(value.values)
+    if hasattr(value, "value") and not callable(value.value):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def parse_field_mask(paths: Iterable[str]) -> Dict[str, Optional[Dict]]:
+    """점 경로 목록을 마스크 트리로 변환 (값이 None이면 하위 전체 포함)"""
+    tree: Dict[str, Optional[Dict]] = {}
+    for path in paths:
+        parts = [part for part in path.strip().split(".") if part]
+        if not parts:
+            continue
+        node = tree
+        for part in parts[:-1]:
+            if part in node and node[part] is None:
+                # 상위 경로가 이미 전체 포함
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+def apply_field_mask(value: Any, mask: Optional[Dict[str, Optional[Dict]]]) -> Any:
+    """마스크에 포함된 필드만 남김 (리스트는 원소마다 적용)"""
+    if mask is None:
+        return value
+    if isinstance(value, list):
+        return [apply_field_mask(item, mask) for item in value]
+    if isinstance(value, dict):
+        return {key: apply_field_mask(value[key], sub) for key, sub in mask.items() if key in value}
+    return value
+
+
+class AppJSONProvider(DefaultJSONProvider):
+    """
+    앱 JSON provider (jsonify, request.get_json, SSE 이벤트 직렬화에서 사용)
+
+    DefaultJSONProvider와 같이 키를 정렬하지만, 한글은 \\uXXXX로 이스케이프하지 않고 UTF-8로 내보낸다.
+    """
+
+    ensure_ascii = False
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.use_orjson = orjson is not None and Config.JSON_USE_ORJSON
+        self.gzip_min_bytes = Config.JSON_GZIP_MIN_BYTES if Config.JSON_GZIP_ENABLED else None
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return self._dump_bytes(obj, **kwargs).decode("utf-8")
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        """
+        jsonify 응답 생성
+
+        - 요청에 ?fields=가 있으면 해당 필드만 포함 (오류 응답에는 적용하지 않음)
+        - 클라이언트가 gzip을 받을 수 있고 본문이 JSON_GZIP_MIN_BYTES 이상이면 압축
+        """
+        obj = self._prepare_response_obj(args, kwargs)
+
+        accepts_gzip = False
+        if has_request_context():
+            mask = parse_field_mask(request.args.get("fields", "").split(","))
+            if mask and not (isinstance(obj, dict) and "error" in obj):
+                obj = apply_field_mask(obj, mask)
+            accepts_gzip = "gzip" in request.accept_encodings
+
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = self._dump_bytes(obj, indent=2) if indent else self._dump_bytes(obj)
+        body += b"\n"
+
+        response = self._app.response_class(body, mimetype=self.mimetype)
+        if self.gzip_min_bytes is not None and len(body) >= self.gzip_min_bytes:
+            response.vary.add("Accept-Encoding")
+            if accepts_gzip:
+                response.set_data(gzip.compress(body, compresslevel=Config.JSON_GZIP_LEVEL))
+                response.headers["Content-Encoding"] = "gzip"
+        return response
+
+    def _dump_bytes(self, obj: Any, indent: Optional[int] = None, **kwargs: Any) -> bytes:
+        if self.use_orjson and not kwargs:
+            option = orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=json_default, option=option)
+
+        kwargs.setdefault("default", json_default)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        if indent:
+            kwargs.setdefault("indent", indent)
+        else:
+            kwargs.setdefault("separators", (",", ":"))
+        return json.dumps(obj, **kwargs).encode("utf-8")
+
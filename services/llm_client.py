@@ -0,0 +1,40 @@
+"""LLM 클라이언트 - ChatVertexAI를 처음 사용할 때 생성 (langchain / Vertex AI import도 그때 수행)"""
+import threading
+from typing import Any
+
+
+class LazyChatModel:
+    """
+    ChatVertexAI 지연 생성 래퍼
+
+    langchain_google_vertexai import가 수 초 걸리므로 서비스 생성(앱 import) 시점에는
+    설정만 보관하고, 첫 invoke/stream(또는 워밍업) 때 import와 클라이언트 생성을 한 번 수행한다.
+    그 외 속성 접근은 생성된 ChatVertexAI로 위임한다.
+    """
+
+    def __init__(self, **params: Any):
+        self._params = params
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        """생성된 ChatVertexAI (처음 접근 시 생성)"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from langchain_google_vertexai import ChatVertexAI
+                    self._model = ChatVertexAI(**self._params)
+        return self._model
+
+    def invoke(self, *args: Any, **kwargs: Any) -> Any:
+        return self.model.invoke(*args, **kwargs)
+
+    def stream(self, *args: Any, **kwargs: Any) -> Any:
+        return self.model.stream(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        # __init__ 이전(복사/피클 등)에는 위임하지 않음
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.model, name)
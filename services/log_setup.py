@@ -0,0 +1,155 @@
+"""
+로깅 설정 - 앱/워커 시작 시 한 번 호출 (모듈 import 시에는 핸들러나 로그 파일을 만들지 않음)
+
+- 요청 스레드는 QueueHandler로 레코드를 큐에 넣기만 하고, 콘솔/파일 쓰기는 QueueListener 스레드가 처리
+- LOG_FORMAT=json이면 한 줄 JSON(severity, message, conversation_id, stage, latency_ms 등)으로 기록
+  (Cloud Run에서는 stdout JSON을 Cloud Logging이 구조화 로그로 인식)
+- conversation_id는 요청/백그라운드 작업 단위로 묶은 로그 컨텍스트에서 자동으로 붙음
+- LLM 원본 출력 같은 큰 디버그 페이로드는 log_payload()로 LOG_PAYLOAD_SAMPLE_RATE 비율의 대화만 기록
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+from config import Config
+
+# 파일에 기록하는 로거 (서비스 계층의 상담 처리 단계별 로그)
+FILE_LOGGER_PREFIX = "services"
+
+# 메시지 앞의 [TAG]를 stage로 사용 (stage를 extra로 넘기지 않은 경우)
+_STAGE_PATTERN = re.compile(r"^\[([A-Z0-9_ ]+)\]")
+
+# LogRecord 기본 속성 (그 외 속성은 extra로 넘긴 필드)
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+# 현재 요청/작업의 로그 필드 (conversation_id 등)
+_log_context: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar("log_context", default={})
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """한 줄 JSON 로그 (Cloud Logging 필드명 severity 사용)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        entry: Dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "severity": record.levelname,
+            "logger": record.name,
+            "message": message
+        }
+        stage = getattr(record, "stage", None)
+        if stage is None:
+            match = _STAGE_PATTERN.match(message)
+            stage = match.group(1) if match else None
+        if stage:
+            entry["stage"] = stage
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key != "stage":
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """사람이 읽는 한 줄 로그 (log_payload의 페이로드는 메시지 뒤에 붙임)"""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        text = super().formatMessage(record)
+        payload = getattr(record, "payload", None)
+        return text if payload is None else f"{text} {payload}"
+
+
+class _ContextFilter(logging.Filter):
+    """로그를 남긴 스레드의 로그 컨텍스트 필드를 레코드에 추가 (큐에 넣기 전에 실행)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _log_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+def configure_logging() -> None:
+    """
+    루트 로거를 QueueHandler로 바꾸고 콘솔/날짜별 파일(LOG_DIR/counselor_YYYYMMDD.log) 쓰기는
+    백그라운드 QueueListener에서 처리
+
+    여러 번 호출해도 한 번만 적용된다. 파일에는 services.* 로거의 로그만 기록한다.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    structured = Config.LOG_FORMAT == "json"
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(JsonFormatter() if structured else TextFormatter(
+        '%(asctime)s - %(levelname)s - %(message)s', datefmt='%H:%M:%S'
+    ))
+    handlers = [console_handler]
+
+    if Config.LOG_FILE_ENABLED:
+        os.makedirs(Config.LOG_DIR, exist_ok=True)
+        log_file = os.path.join(Config.LOG_DIR, f'counselor_{datetime.now().strftime("%Y%m%d")}.log')
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler.addFilter(logging.Filter(FILE_LOGGER_PREFIX))
+        file_handler.setFormatter(JsonFormatter() if structured else TextFormatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S'
+        ))
+        handlers.append(file_handler)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(_ContextFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, Config.LOG_LEVEL.upper(), logging.INFO))
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    # 종료 시 큐에 남은 로그까지 기록
+    atexit.register(_listener.stop)
+
+
+def set_log_context(**fields: Any) -> None:
+    """현재 스레드(요청)의 로그 컨텍스트를 교체 (요청 시작 시 호출하므로 이전 요청 값이 남지 않음)"""
+    _log_context.set(fields)
+
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """with 블록 안의 로그에 필드 추가 (백그라운드 작업 등)"""
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+def log_payload(logger: logging.Logger, message: str, payload: Any, **fields: Any) -> None:
+    """
+    LLM 원본 출력 등 큰 디버그 페이로드 기록 (LOG_PAYLOAD_SAMPLE_RATE 비율만)
+
+    대화 ID로 샘플링하므로 선택된 대화는 모든 페이로드가 남는다. 0이면 기록하지 않는다.
+    """
+    rate = Config.LOG_PAYLOAD_SAMPLE_RATE
+    if rate <= 0:
+        return
+    if rate < 1:
+        conversation_id = fields.get("conversation_id") or _log_context.get().get("conversation_id")
+        bucket = zlib.crc32(conversation_id.encode("utf-8")) / 0xFFFFFFFF if conversation_id else random.random()
+        if bucket >= rate:
+            return
+    logger.info(message, extra={"payload": payload, **fields})
@@ -0,0 +1,374 @@
+"""도메인 모델 - 세션, Task, 메시지, Supervision 기록 (Firestore dict와 변환)"""
+import copy
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from services.text_codec import TextCodec
+
+
+class Task:
+    """상담 Task"""
+
+    __slots__ = (
+        "id", "part", "priority", "title", "target", "description", "completion_criteria",
+        "status", "template_id", "sufficient_at", "completed_at", "extra"
+    )
+
+    FIELDS = __slots__[:-1]
+
+    # 진행 상태 필드 (세션 문서의 task_state 맵에 Task별로 저장)
+    STATE_FIELDS = ("status", "sufficient_at", "completed_at")
+
+    def __init__(self, id: str, part: Optional[int] = None, priority: Optional[str] = None,
+                 title: Optional[str] = None, target: Optional[str] = None,
+                 description: Optional[str] = None, completion_criteria: Optional[str] = None,
+                 status: Optional[str] = "pending", template_id: Optional[str] = None,
+                 sufficient_at: Optional[str] = None, completed_at: Optional[str] = None,
+                 extra: Optional[Dict[str, Any]] = None):
+        self.id = id
+        self.part = part
+        self.priority = priority
+        self.title = title
+        self.target = target
+        self.description = description
+        self.completion_criteria = completion_criteria
+        self.status = status
+        self.template_id = template_id
+        self.sufficient_at = sufficient_at
+        self.completed_at = completed_at
+        # 모델에 없는 필드 (LLM이 만든 Task의 restrictions 등)
+        self.extra = extra or {}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Task":
+        task = cls.__new__(cls)
+        for field in cls.FIELDS:
+            setattr(task, field, data.get(field))
+        task.extra = {key: value for key, value in data.items() if key not in cls.FIELDS}
+        return task
+
+    def to_dict(self) -> Dict:
+        data = {field: getattr(self, field) for field in self.FIELDS if getattr(self, field) is not None}
+        data.update(self.extra)
+        return data
+
+    def definition(self) -> Dict:
+        """진행 상태를 뺀 Task 정의"""
+        data = self.to_dict()
+        for field in self.STATE_FIELDS:
+            data.pop(field, None)
+        return data
+
+    def state(self) -> Dict:
+        """진행 상태 (status와 상태별 타임스탬프)"""
+        return {field: getattr(self, field) for field in self.STATE_FIELDS if getattr(self, field) is not None}
+
+    def set_status(self, status: str) -> None:
+        """상태 변경 (sufficient/completed는 처음 도달한 시각 기록)"""
+        self.status = status
+        if status == "sufficient" and not self.sufficient_at:
+            self.sufficient_at = datetime.now().isoformat()
+        elif status == "completed" and not self.completed_at:
+            self.completed_at = datetime.now().isoformat()
+
+
+class Message:
+    """대화 메시지"""
+
+    __slots__ = ("role", "content", "timestamp", "seq", "metadata", "has_metadata")
+
+    def __init__(self, role: str, content: str, timestamp: Any = None, seq: Optional[int] = None,
+                 metadata: Optional[Dict] = None, has_metadata: bool = False):
+        self.role = role
+        self.content = content
+        self.timestamp = timestamp
+        self.seq = seq
+        self.metadata = metadata
+        self.has_metadata = has_metadata
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Message":
+        return cls(
+            data.get("role"),
+            data.get("content", ""),
+            data.get("timestamp"),
+            data.get("seq"),
+            data.get("metadata"),
+            data.get("has_metadata", False)
+        )
+
+    def to_dict(self) -> Dict:
+        data = {"role": self.role, "content": self.content, "timestamp": self.timestamp}
+        if self.seq is not None:
+            data["seq"] = self.seq
+        if self.metadata is not None:
+            data["metadata"] = self.metadata
+        if self.has_metadata:
+            data["has_metadata"] = True
+        return data
+
+
+class SupervisionEntry:
+    """Supervision 평가 기록"""
+
+    __slots__ = (
+        "message_index", "user_message", "counselor_response", "score", "feedback",
+        "improvements", "strengths", "needs_improvement", "timestamp"
+    )
+
+    # 저장 시 압축되는 텍스트 필드 (세션을 읽을 때는 압축된 채로 두고 조회하는 항목만 복원)
+    TEXT_FIELDS = ("feedback", "improvements", "strengths")
+
+    def __init__(self, message_index: int, user_message: str = "", counselor_response: str = "",
+                 score: int = 0, feedback: str = "", improvements: str = "", strengths: str = "",
+                 needs_improvement: bool = False, timestamp: Optional[str] = None):
+        self.message_index = message_index
+        self.user_message = user_message
+        self.counselor_response = counselor_response
+        self.score = score
+        self.feedback = feedback
+        self.improvements = improvements
+        self.strengths = strengths
+        self.needs_improvement = needs_improvement
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SupervisionEntry":
+        entry = cls.__new__(cls)
+        for field in cls.__slots__:
+            setattr(entry, field, data.get(field))
+        if entry.message_index is None:
+            entry.message_index = -1
+        return entry
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.__slots__ if getattr(self, field) is not None}
+
+    def decode_text(self) -> "SupervisionEntry":
+        """압축된 텍스트 필드를 제자리에서 복원"""
+        for field in self.TEXT_FIELDS:
+            setattr(self, field, TextCodec.decode(getattr(self, field)))
+        return self
+
+
+class Session:
+    """
+    상담 세션
+
+    - Task 목록과 함께 id / Part / 상태별 색인을 유지 (Task 변경은 메서드를 거쳐 색인 갱신)
+    - 모델에 없는 세션 필드(user_persona, 각종 로그 등)는 extra에 그대로 보관
+    - 마지막으로 저장된 상태를 기억해 changes()로 바뀐 부분만 계산 (SessionService.commit에서 사용)
+    - 저장이 충돌하면 최신 세션에 apply_changes()로 같은 변경을 다시 적용
+    """
+
+    __slots__ = (
+        "conversation_id", "session_type", "status", "current_part", "current_task", "current_module",
+        "previous_module", "module_change_reason", "message_count", "version", "revision", "part2_goal",
+        "part2_selected_keywords", "part2_task_update_count", "supervision_log", "extra",
+        "_tasks", "_by_id", "_by_part", "_by_status", "_persisted"
+    )
+
+    FIELDS = (
+        "conversation_id", "session_type", "status", "current_part", "current_task", "current_module",
+        "previous_module", "module_change_reason", "message_count", "version", "revision", "part2_goal",
+        "part2_selected_keywords", "part2_task_update_count"
+    )
+
+    # 변경 추적 대상 필드 (message_count는 서버 측 증가로만, version/revision은 저장 시 자동 증가)
+    TRACKED_FIELDS = tuple(
+        field for field in FIELDS if field not in ("conversation_id", "message_count", "version", "revision")
+    )
+
+    def __init__(self, conversation_id: str, tasks: Optional[Iterable[Task]] = None, **fields):
+        self.conversation_id = conversation_id
+        self.session_type = fields.pop("session_type", "first_session")
+        self.status = fields.pop("status", "active")
+        self.current_part = fields.pop("current_part", 1)
+        self.current_task = fields.pop("current_task", None)
+        self.current_module = fields.pop("current_module", None)
+        self.previous_module = fields.pop("previous_module", None)
+        self.module_change_reason = fields.pop("module_change_reason", None)
+        self.message_count = fields.pop("message_count", 0)
+        self.version = fields.pop("version", 0)
+        # 추적 필드/Task가 바뀔 때만 증가 (조건부 저장의 기준 값)
+        self.revision = fields.pop("revision", 0)
+        self.part2_goal = fields.pop("part2_goal", None)
+        self.part2_selected_keywords = fields.pop("part2_selected_keywords", None)
+        self.part2_task_update_count = fields.pop("part2_task_update_count", 0)
+        self.supervision_log: List[SupervisionEntry] = fields.pop("supervision_log", None) or []
+        self.extra = fields
+        self.replace_tasks(tasks or [])
+        self.mark_persisted()
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Session":
+        fields = dict(data)
+        conversation_id = fields.pop("conversation_id", None)
+        tasks = [Task.from_dict(task) for task in fields.pop("tasks", None) or []]
+        fields["supervision_log"] = [
+            SupervisionEntry.from_dict(entry) for entry in fields.get("supervision_log") or []
+        ]
+        for field in cls.FIELDS:
+            # 저장된 값이 None이면 기본값 사용
+            if field in fields and fields[field] is None:
+                del fields[field]
+        return cls(conversation_id, tasks, **fields)
+
+    def to_dict(self) -> Dict:
+        data = dict(self.extra)
+        for field in self.FIELDS:
+            data[field] = getattr(self, field)
+        data["tasks"] = self.task_dicts()
+        data["supervision_log"] = [entry.to_dict() for entry in self.supervision_log]
+        return data
+
+    # Task 조회
+
+    @property
+    def tasks(self) -> List[Task]:
+        return self._tasks
+
+    def task(self, task_id: Optional[str]) -> Optional[Task]:
+        """id로 Task 찾기"""
+        return self._by_id.get(task_id)
+
+    def tasks_in_part(self, part: int) -> List[Task]:
+        """Part에 속한 Task (저장 순서)"""
+        return self._by_part.get(part, [])
+
+    def tasks_with_status(self, status: str) -> List[Task]:
+        """상태별 Task (저장 순서)"""
+        return self._by_status.get(status, [])
+
+    def task_dicts(self) -> List[Dict]:
+        """저장/LLM 전달용 Task dict 목록"""
+        return [task.to_dict() for task in self._tasks]
+
+    # Task 변경
+
+    def replace_tasks(self, tasks: Iterable[Task]) -> None:
+        """Task 목록 교체 (색인 재구성)"""
+        self._tasks = list(tasks)
+        self._reindex()
+
+    def add_tasks(self, tasks: Iterable[Task]) -> None:
+        """Task 추가"""
+        self._tasks.extend(tasks)
+        self._reindex()
+
+    def set_task_status(self, task_id: str, status: str) -> Optional[Task]:
+        """Task 상태 변경 (상태 색인 갱신)"""
+        task = self._by_id.get(task_id)
+        if task is None or task.status == status:
+            return task
+        task.set_status(status)
+        self._by_status = self._group_by("status")
+        return task
+
+    def set_task_state(self, task_id: str, state: Dict) -> Optional[Task]:
+        """Task 진행 상태(status와 타임스탬프)를 그대로 설정"""
+        task = self._by_id.get(task_id)
+        if task is None:
+            return None
+        for field in Task.STATE_FIELDS:
+            setattr(task, field, state.get(field))
+        self._by_status = self._group_by("status")
+        return task
+
+    # 변경 추적
+
+    def mark_persisted(self) -> None:
+        """현재 상태를 저장된 상태로 기록"""
+        self._persisted = (
+            {field: copy.deepcopy(getattr(self, field)) for field in self.TRACKED_FIELDS},
+            [task.definition() for task in self._tasks],
+            {task.id: task.state() for task in self._tasks}
+        )
+
+    def changes(self) -> Dict[str, Any]:
+        """
+        마지막 저장 이후 바뀐 부분
+
+        Returns:
+            {"fields": 바뀐 세션 필드,
+             "task_states": 상태가 바뀐 Task의 {id: 상태},
+             "appended_tasks": 뒤에 추가된 Task 정의 목록,
+             "tasks_rewritten": 기존 Task 정의가 바뀌어 전체를 다시 써야 하는지 여부,
+             "task_definitions": 전체 Task 정의 목록 (tasks_rewritten일 때만, 아니면 None)}
+        """
+        persisted_fields, persisted_definitions, persisted_states = self._persisted
+
+        fields = {
+            field: getattr(self, field) for field in self.TRACKED_FIELDS
+            if getattr(self, field) != persisted_fields[field]
+        }
+
+        definitions = [task.definition() for task in self._tasks]
+        appended_tasks: List[Dict] = []
+        tasks_rewritten = False
+        if definitions[:len(persisted_definitions)] == persisted_definitions:
+            appended_tasks = definitions[len(persisted_definitions):]
+        else:
+            tasks_rewritten = True
+
+        task_states = {
+            task.id: task.state() for task in self._tasks
+            if persisted_states.get(task.id) != task.state()
+        }
+
+        return {
+            "fields": fields,
+            "task_states": task_states,
+            "appended_tasks": appended_tasks,
+            "tasks_rewritten": tasks_rewritten,
+            "task_definitions": definitions if tasks_rewritten else None
+        }
+
+    def apply_changes(self, changes: Dict[str, Any]) -> None:
+        """
+        다른 세션 객체에서 계산한 changes()를 이 세션(최신 저장 상태)에 다시 적용
+
+        필드와 Task 상태는 바뀐 것만 덮어쓰고, 추가된 Task는 아직 없는 ID만 추가한다.
+        Task 목록 전체가 바뀐 경우 정의는 변경 쪽을 따르되, 변경하지 않은 Task 상태는 최신 값을 유지한다.
+        """
+        for field, value in changes["fields"].items():
+            setattr(self, field, copy.deepcopy(value))
+
+        if changes["tasks_rewritten"]:
+            latest_states = {task.id: task.state() for task in self._tasks}
+            self.replace_tasks(
+                Task.from_dict({**definition, **latest_states.get(definition.get("id"), {})})
+                for definition in changes["task_definitions"]
+            )
+        else:
+            self.add_tasks(
+                Task.from_dict(definition) for definition in changes["appended_tasks"]
+                if definition.get("id") not in self._by_id
+            )
+
+        for task_id, state in changes["task_states"].items():
+            self.set_task_state(task_id, state)
+
+    def adopt(self, other: "Session") -> None:
+        """다른 세션 객체의 상태(저장 기준 포함)로 이 객체를 교체 (참조를 유지한 채 갱신)"""
+        for slot in self.__slots__:
+            setattr(self, slot, getattr(other, slot))
+
+    # Supervision
+
+    def supervision_for(self, message_index: int) -> Optional[SupervisionEntry]:
+        """message_index에 대한 가장 최근 Supervision 기록 (압축된 텍스트는 이때 복원)"""
+        for entry in reversed(self.supervision_log):
+            if entry.message_index == message_index:
+                return entry.decode_text()
+        return None
+
+    def _reindex(self) -> None:
+        self._by_id = {task.id: task for task in self._tasks}
+        self._by_part = self._group_by("part")
+        self._by_status = self._group_by("status")
+
+    def _group_by(self, field: str) -> Dict[Any, List[Task]]:
+        groups: Dict[Any, List[Task]] = {}
+        for task in self._tasks:
+            groups.setdefault(getattr(task, field), []).append(task)
+        return groups
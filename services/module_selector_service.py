@@ -1,10 +1,27 @@
 """Module Selector Service - Module 선택 및 업데이트"""
 import os
+import logging
 from typing import Dict, List, Optional
-from langchain_google_vertexai import ChatVertexAI
+from services.llm_client import LazyChatModel
+from services.structured_output import StructuredOutputError, choice_schema, decode_choice, invoke_structured
 from config import Config
 from services.module_service import ModuleService
 
+logger = logging.getLogger(__name__)
+
+
+def module_selection_schema(module_count: int) -> Dict:
+    """응답 스키마 (module은 목록 번호, 현재 Module을 유지하면 reason은 기다리지 않음)"""
+    return {
+        "type": "object",
+        "properties": {
+            "module": choice_schema(module_count),
+            "reason": {"type": "string"}
+        },
+        "required": ["module", "reason"],
+        "property_ordering": ["module", "reason"]
+    }
+
 
 class ModuleSelectorService:
     """Module Selector - Task와 상황에 맞는 Module 선택"""
@@ -13,7 +30,7 @@ class ModuleSelectorService:
         if Config.GOOGLE_APPLICATION_CREDENTIALS and os.path.exists(Config.GOOGLE_APPLICATION_CREDENTIALS):
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = Config.GOOGLE_APPLICATION_CREDENTIALS
         
-        self.llm = ChatVertexAI(
+        self.llm = LazyChatModel(
             model_name=Config.VERTEX_AI_MODEL,
             project=Config.PROJECT_ID,
             location=Config.LOCATION,
@@ -34,9 +51,8 @@ class ModuleSelectorService:
 3. Supervision 피드백 반영
 4. 대화 맥락 고려
 
-**응답 형식:**
-SELECTED_MODULE_ID: [module_id]
-CHANGE_REASON: [변경 이유 또는 None]"""
+**응답 형식 (JSON):**
+{"module": 선택한 Module 번호, "reason": "선택/변경 이유 (한 문장, 없으면 빈 문자열)"}"""
     
     def select_module(self, task: Dict, user_state: Dict, 
                      current_module_id: Optional[str] = None,
@@ -58,12 +74,8 @@ CHANGE_REASON: [변경 이유 또는 None]"""
                 "change_reason": str
             }
         """
-        # 사용 가능한 Module 목록
-        all_modules = self.module_service.get_all_modules()
-        modules_info = "\n".join([
-            f"- {m.get('id')}: {m.get('name')} - {m.get('description')}"
-            for m in all_modules
-        ])
+        # 사용 가능한 Module 목록 (카탈로그 캐시에 미리 렌더링된 번호 목록 사용)
+        module_ids, modules_info = self.module_service.get_module_choices()
         
         task_info = f"""
 Task 제목: {task.get('title', '')}
@@ -107,11 +119,7 @@ Supervision 피드백:
 사용 가능한 Module 목록:
 {modules_info}
 
-위 Module 중에서 시스템 프롬프트의 선택 기준에 따라 Task 목표와 사용자 상태에 가장 적합한 Module을 선택하세요.
-
-다음 형식으로 응답하세요:
-SELECTED_MODULE_ID: [module_id]
-CHANGE_REASON: [변경 이유 또는 None]"""
+위 Module 중에서 시스템 프롬프트의 선택 기준에 따라 Task 목표와 사용자 상태에 가장 적합한 Module을 번호로 선택하고 JSON으로 응답하세요."""
         
         messages = [
             ('system', self.get_system_prompt()),
@@ -119,20 +127,24 @@ CHANGE_REASON: [변경 이유 또는 None]"""
         ]
         
         try:
-            response = self.llm.invoke(messages)
-            response_text = response.content if hasattr(response, 'content') else str(response)
+            # 변경 이유는 Module이 바뀔 때만 사용
+            def keeps_module(fields: Dict) -> bool:
+                return "module" in fields and (
+                    current_module_id is None or decode_choice(fields["module"], module_ids) == current_module_id
+                )
             
-            # 응답 파싱
+            # 응답 파싱 (실패 시 아래 기본값 사용)
             selected_module_id = None
             change_reason = None
-            
-            for line in response_text.split('\n'):
-                if 'SELECTED_MODULE_ID:' in line.upper():
-                    selected_module_id = line.split(':', 1)[1].strip()
-                elif 'CHANGE_REASON:' in line.upper():
-                    change_reason = line.split(':', 1)[1].strip()
-                    if change_reason.lower() == 'none':
-                        change_reason = None
+            try:
+                result, _ = invoke_structured(
+                    "module_selector", self.llm, messages, module_selection_schema(len(module_ids)),
+                    ready=keeps_module
+                )
+                selected_module_id = decode_choice(result["module"], module_ids)
+                change_reason = result.get("reason", "").strip() or None
+            except StructuredOutputError as e:
+                logger.warning(f"[MODULE_SELECTOR] 출력 파싱 실패 ({e.reason}): {str(e)}")
             
             # Module ID 검증
             if not selected_module_id or not self.module_service.get_module(selected_module_id):
@@ -140,7 +152,7 @@ CHANGE_REASON: [변경 이유 또는 None]"""
                 if task.get('module_id'):
                     selected_module_id = task.get('module_id')
                 else:
-                    selected_module_id = all_modules[0].get('id') if all_modules else None
+                    selected_module_id = module_ids[0] if module_ids else None
             
             # Module 가이드라인 가져오기
             module_guidelines = ""
@@ -158,9 +170,9 @@ CHANGE_REASON: [변경 이유 또는 None]"""
             }
         
         except Exception as e:
-            print(f"Module Selector 오류: {str(e)}")
+            logger.error(f"[MODULE_SELECTOR] 오류: {str(e)}")
             # 기본값 반환
-            default_module_id = task.get('module_id') or (all_modules[0].get('id') if all_modules else None)
+            default_module_id = task.get('module_id') or (module_ids[0] if module_ids else None)
             return {
                 "module_id": default_module_id,
                 "module_guidelines": self.module_service.get_module_guidelines(default_module_id) if default_module_id else "",
@@ -1,7 +1,15 @@
 """Module 서비스 - 재사용 가능한 상담 도구/기법"""
-from typing import List, Dict, Optional
+import copy
+import threading
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
+from config import Config
 from services.firestore_service import FirestoreService
+from services.catalog_cache import CatalogCache
+
+# 프로세스 전역 Module 카탈로그 캐시 (여러 ModuleService 인스턴스가 공유)
+_catalog = None
+_catalog_lock = threading.Lock()
 
 
 class ModuleService:
@@ -11,134 +19,192 @@ class ModuleService:
         """Module 서비스 초기화"""
         self.firestore = FirestoreService()
         self.collection_name = "modules"
-        # 초기 모듈이 없으면 기본 모듈 생성
-        self._initialize_default_modules()
+        # 생성 시에는 저장소를 읽지 않음 (첫 catalog.get()에서 로드, 앱에서는 워밍업 단계)
+        self.catalog = self._get_catalog()
     
-    def _initialize_default_modules(self) -> None:
-        """기본 Module이 없으면 초기화"""
-        # Firestore에 기본 모듈이 있는지 확인
-        modules_ref = self.firestore.db.collection(self.collection_name)
-        existing_modules = list(modules_ref.stream())
-        
-        if len(existing_modules) == 0:
-            # 기본 모듈 생성
-            default_modules = [
-            {
-                "id": "rapport_building",
-                "name": "관계 형성",
-                "description": "사용자와 신뢰 관계를 구축하는 기법",
-                "guidelines": [
-                    "따뜻하고 친근한 톤 사용",
-                    "사용자의 감정에 공감하기",
-                    "편안한 분위기 조성",
-                    "사용자의 말을 경청하고 이해한다는 것을 보여주기"
-                ],
-                "applicable_to": ["first_session", "all_sessions"]
-            },
-            {
-                "id": "information_gathering",
-                "name": "정보 수집",
-                "description": "사용자의 배경, 상황, 요구사항을 파악하는 기법",
-                "guidelines": [
-                    "열린 질문 사용 (예: '어떻게 느끼세요?', '무엇이 도움이 될까요?')",
-                    "판단하지 않고 듣기",
-                    "중요한 정보를 자연스럽게 확인",
-                    "사용자의 페이스에 맞추기"
-                ],
-                "applicable_to": ["first_session", "all_sessions"]
-            },
-            {
-                "id": "goal_setting",
-                "name": "목표 설정",
-                "description": "상담 목표와 기대 결과를 설정하는 기법",
-                "guidelines": [
-                    "사용자와 함께 목표 설정",
-                    "구체적이고 달성 가능한 목표",
-                    "단기/장기 목표 구분",
-                    "목표 달성을 위한 단계 제시"
-                ],
-                "applicable_to": ["first_session", "all_sessions"]
-            },
-            {
-                "id": "trust_building",
-                "name": "신뢰 구축",
-                "description": "상담 과정에 대한 안내와 기대치를 설정하는 기법",
-                "guidelines": [
-                    "상담의 진행 방식 설명",
-                    "기대할 수 있는 것과 없는 것 명확히 하기",
-                    "비밀 보장과 안전한 공간 제공",
-                    "사용자의 선택권 존중"
-                ],
-                "applicable_to": ["first_session"]
-            },
-            {
-                "id": "empathy_expression",
-                "name": "공감 표현",
-                "description": "사용자의 감정을 이해하고 공감을 표현하는 기법",
-                "guidelines": [
-                    "사용자의 감정을 반영하기",
-                    "판단하지 않고 이해하기",
-                    "감정의 정당성 인정",
-                    "지지와 격려 제공"
-                ],
-                "applicable_to": ["all_sessions"]
-            },
-            {
-                "id": "questioning_technique",
-                "name": "질문 기법",
-                "description": "효과적인 질문을 통해 깊이 있는 대화를 이끌어내는 기법",
-                "guidelines": [
-                    "열린 질문 사용",
-                    "닫힌 질문은 필요한 경우에만",
-                    "사용자의 답변에 따라 후속 질문",
-                    "질문이 압박이 되지 않도록 주의"
-                ],
-                "applicable_to": ["all_sessions"]
-            }
-            ]
-            
-            # Firestore에 저장
-            for module in default_modules:
-                module_doc = {
-                    **module,
-                    "created_at": datetime.now(),
-                    "updated_at": datetime.now()
-                }
-                module_ref = self.firestore.db.collection(self.collection_name).document(module['id'])
-                module_ref.set(module_doc)
+    def _get_catalog(self) -> CatalogCache:
+        """프로세스 전역 Module 카탈로그 캐시 반환 (최초 1회 생성)"""
+        global _catalog
+        if _catalog is None:
+            with _catalog_lock:
+                if _catalog is None:
+                    _catalog = CatalogCache(
+                        self.firestore.db,
+                        self.collection_name,
+                        self._load_catalog,
+                        refresh_interval=Config.CATALOG_CACHE_REFRESH_INTERVAL,
+                        use_listener=Config.CATALOG_CACHE_LISTENER
+                    )
+        return _catalog
     
-    def get_module(self, module_id: str) -> Optional[Dict]:
-        """Module 가져오기"""
-        module_ref = self.firestore.db.collection(self.collection_name).document(module_id)
-        module_doc = module_ref.get()
+    def _load_catalog(self) -> Dict:
+        """
+        modules 컬렉션 전체를 읽어 카탈로그 스냅샷 생성
         
-        if module_doc.exists:
-            data = module_doc.to_dict()
+        Returns:
+            {
+                "modules": {module_id: module},  # 컬렉션 순서 유지
+                "modules_info": str  # Module Selector 프롬프트용 목록
+            }
+        """
+        modules = {}
+        for doc in self.firestore.db.collection(self.collection_name).stream():
+            data = doc.to_dict()
             # datetime 객체 제거 (JSON 직렬화를 위해)
             if 'created_at' in data and isinstance(data['created_at'], datetime):
                 data['created_at'] = data['created_at'].isoformat()
             if 'updated_at' in data and isinstance(data['updated_at'], datetime):
                 data['updated_at'] = data['updated_at'].isoformat()
-            return data
-        return None
+            modules[data.get('id', doc.id)] = data
+        
+        # 초기 모듈이 없으면 기본 모듈 생성
+        if not modules:
+            modules = self._create_default_modules()
+        
+        # Module Selector는 번호로 선택 (번호 순서 = modules 순서)
+        modules_info = "\n".join([
+            f"{index}. {m.get('id')}: {m.get('name')} - {m.get('description')}"
+            for index, m in enumerate(modules.values(), 1)
+        ])
+        
+        return {
+            "modules": modules,
+            "modules_info": modules_info
+        }
     
-    def get_all_modules(self) -> List[Dict]:
-        """모든 Module 목록 가져오기"""
-        modules_ref = self.firestore.db.collection(self.collection_name)
-        modules_docs = modules_ref.stream()
+    def _create_default_modules(self) -> Dict[str, Dict]:
+        """기본 Module 생성 (카탈로그 로드 시 modules 컬렉션이 비어 있을 때)"""
+        # 기본 모듈 생성
+        default_modules = [
+        {
+            "id": "rapport_building",
+            "name": "관계 형성",
+            "description": "사용자와 신뢰 관계를 구축하는 기법",
+            "guidelines": [
+                "따뜻하고 친근한 톤 사용",
+                "사용자의 감정에 공감하기",
+                "편안한 분위기 조성",
+                "사용자의 말을 경청하고 이해한다는 것을 보여주기"
+            ],
+            "applicable_to": ["first_session", "all_sessions"]
+        },
+        {
+            "id": "information_gathering",
+            "name": "정보 수집",
+            "description": "사용자의 배경, 상황, 요구사항을 파악하는 기법",
+            "guidelines": [
+                "열린 질문 사용 (예: '어떻게 느끼세요?', '무엇이 도움이 될까요?')",
+                "판단하지 않고 듣기",
+                "중요한 정보를 자연스럽게 확인",
+                "사용자의 페이스에 맞추기"
+            ],
+            "applicable_to": ["first_session", "all_sessions"]
+        },
+        {
+            "id": "goal_setting",
+            "name": "목표 설정",
+            "description": "상담 목표와 기대 결과를 설정하는 기법",
+            "guidelines": [
+                "사용자와 함께 목표 설정",
+                "구체적이고 달성 가능한 목표",
+                "단기/장기 목표 구분",
+                "목표 달성을 위한 단계 제시"
+            ],
+            "applicable_to": ["first_session", "all_sessions"]
+        },
+        {
+            "id": "trust_building",
+            "name": "신뢰 구축",
+            "description": "상담 과정에 대한 안내와 기대치를 설정하는 기법",
+            "guidelines": [
+                "상담의 진행 방식 설명",
+                "기대할 수 있는 것과 없는 것 명확히 하기",
+                "비밀 보장과 안전한 공간 제공",
+                "사용자의 선택권 존중"
+            ],
+            "applicable_to": ["first_session"]
+        },
+        {
+            "id": "empathy_expression",
+            "name": "공감 표현",
+            "description": "사용자의 감정을 이해하고 공감을 표현하는 기법",
+            "guidelines": [
+                "사용자의 감정을 반영하기",
+                "판단하지 않고 이해하기",
+                "감정의 정당성 인정",
+                "지지와 격려 제공"
+            ],
+            "applicable_to": ["all_sessions"]
+        },
+        {
+            "id": "questioning_technique",
+            "name": "질문 기법",
+            "description": "효과적인 질문을 통해 깊이 있는 대화를 이끌어내는 기법",
+            "guidelines": [
+                "열린 질문 사용",
+                "닫힌 질문은 필요한 경우에만",
+                "사용자의 답변에 따라 후속 질문",
+                "질문이 압박이 되지 않도록 주의"
+            ],
+            "applicable_to": ["all_sessions"]
+        }
+        ]
         
-        modules = []
-        for doc in modules_docs:
-            data = doc.to_dict()
-            # datetime 객체 제거 (JSON 직렬화를 위해)
-            if 'created_at' in data and isinstance(data['created_at'], datetime):
-                data['created_at'] = data['created_at'].isoformat()
-            if 'updated_at' in data and isinstance(data['updated_at'], datetime):
-                data['updated_at'] = data['updated_at'].isoformat()
-            modules.append(data)
+        # Firestore에 저장
+        modules = {}
+        for module in default_modules:
+            now = datetime.now()
+            module_doc = {
+                **module,
+                "created_at": now,
+                "updated_at": now
+            }
+            module_ref = self.firestore.db.collection(self.collection_name).document(module['id'])
+            module_ref.set(module_doc)
+            modules[module['id']] = {**module, "created_at": now.isoformat(), "updated_at": now.isoformat()}
         
         return modules
     
+    def get_module(self, module_id: str) -> Optional[Dict]:
+        """Module 가져오기 (카탈로그 캐시 사용)"""
+        module = self.catalog.get()["modules"].get(module_id)
+        # 호출자가 수정해도 캐시가 오염되지 않도록 복사본 반환
+        return copy.deepcopy(module) if module else None
+    
+    def get_all_modules(self) -> List[Dict]:
+        """모든 Module 목록 가져오기 (카탈로그 캐시 사용)"""
+        return copy.deepcopy(list(self.catalog.get()["modules"].values()))
+    
+    def get_modules(self, module_ids) -> Dict[str, Dict]:
+        """
+        여러 Module을 한 번에 가져오기 (카탈로그 캐시 사용)
+        
+        Args:
+            module_ids: Module ID 목록
+            
+        Returns:
+            {module_id: module} (존재하는 Module만 포함)
+        """
+        modules = self.catalog.get()["modules"]
+        return {
+            module_id: copy.deepcopy(modules[module_id])
+            for module_id in set(module_ids)
+            if module_id in modules
+        }
+    
+    def get_module_ids(self) -> List[str]:
+        """모든 Module ID 목록 가져오기"""
+        return list(self.catalog.get()["modules"].keys())
+    
+    def get_modules_info(self) -> str:
+        """Module Selector 프롬프트용 Module 목록 문자열 (카탈로그와 함께 메모이즈)"""
+        return self.catalog.get()["modules_info"]
+    
+    def get_module_choices(self) -> Tuple[List[str], str]:
+        """Module Selector용 (Module ID 목록, 번호 붙은 목록 문자열) - 같은 카탈로그 스냅샷에서 가져옴"""
+        catalog = self.catalog.get()
+        return list(catalog["modules"].keys()), catalog["modules_info"]
+    
     def get_modules_by_session_type(self, session_type: str) -> List[Dict]:
         """세션 타입에 맞는 Module 목록 가져오기"""
         all_modules = self.get_all_modules()
@@ -149,7 +215,7 @@ class ModuleService:
     
     def get_module_guidelines(self, module_id: str) -> str:
         """Module의 가이드라인을 문자열로 반환"""
-        module = self.get_module(module_id)
+        module = self.catalog.get()["modules"].get(module_id)
         if not module:
             return ""
         
@@ -162,8 +228,9 @@ class ModuleService:
         if not module_id:
             raise ValueError('Module ID가 필요합니다.')
         
-        # 중복 확인
-        if self.get_module(module_id):
+        # 중복 확인 (다른 인스턴스의 변경을 놓치지 않도록 Firestore에서 직접 확인)
+        module_ref = self.firestore.db.collection(self.collection_name).document(module_id)
+        if module_ref.get().exists:
             raise ValueError(f'Module ID "{module_id}"가 이미 존재합니다.')
         
         # Module 데이터 준비
@@ -178,8 +245,8 @@ class ModuleService:
         }
         
         # Firestore에 저장
-        module_ref = self.firestore.db.collection(self.collection_name).document(module_id)
         module_ref.set(module_doc)
+        self.catalog.invalidate()
         
         # datetime을 문자열로 변환하여 반환
         module_doc['created_at'] = module_doc['created_at'].isoformat()
@@ -211,6 +278,7 @@ class ModuleService:
         
         # Firestore 업데이트
         module_ref.update(update_data)
+        self.catalog.invalidate()
         
         # 업데이트된 데이터 가져오기
         updated_module = self.get_module(module_id)
@@ -226,4 +294,5 @@ class ModuleService:
         
         # Firestore에서 삭제
         module_ref.delete()
+        self.catalog.invalidate()
 
@@ -1,7 +1,7 @@
 """Part Manager Service - Part 관리 및 전환"""
 from typing import Dict, List, Optional
-from datetime import datetime
 from services.session_service import SessionService
+from services.models import Session
 
 
 class PartManagerService:
@@ -20,31 +20,29 @@ class PartManagerService:
         Returns:
             현재 Part 번호 (1, 2, 3)
         """
-        session = self.session_service.get_session(conversation_id)
+        session = self.session_service.get_session(conversation_id, decode_logs=False)
         if not session:
             return 1  # 기본값: Part 1
         
         return session.get('current_part', 1)
     
-    def check_part_transition(self, conversation_id: str) -> Optional[int]:
+    def check_part_transition(self, session: Session) -> Optional[int]:
         """
         Part 전환 여부 확인
         
+        저장소를 다시 읽지 않고 주어진 세션 모델 기준으로 판단한다
+        (저장 시 조건부 commit이 다른 곳의 변경과의 충돌을 처리).
+        
         Args:
-            conversation_id: 대화 ID
+            session: 세션 모델
             
         Returns:
             다음 Part 번호 (전환 가능 시) 또는 None
         """
-        session = self.session_service.get_session(conversation_id)
-        if not session:
-            return None
-        
-        current_part = session.get('current_part', 1)
-        tasks = session.get('tasks', [])
+        current_part = session.current_part
         
         # 현재 Part의 Task만 필터링
-        current_part_tasks = [t for t in tasks if t.get('part') == current_part]
+        current_part_tasks = session.tasks_in_part(current_part)
         
         if not current_part_tasks:
             return None
@@ -53,7 +51,7 @@ class PartManagerService:
         if current_part == 1:
             # Part 1 → Part 2: 모든 Task가 sufficient 이상
             all_sufficient = all(
-                t.get('status') in ['sufficient', 'completed'] 
+                t.status in ['sufficient', 'completed'] 
                 for t in current_part_tasks
             )
             if all_sufficient:
@@ -64,7 +62,7 @@ class PartManagerService:
             # 여기서는 간단히 모든 Task가 sufficient 이상이면 전환
             # 실제로는 LLM이 판단해야 함
             all_sufficient = all(
-                t.get('status') in ['sufficient', 'completed'] 
+                t.status in ['sufficient', 'completed'] 
                 for t in current_part_tasks
             )
             if all_sufficient:
@@ -73,7 +71,7 @@ class PartManagerService:
         elif current_part == 3:
             # Part 3 → 종료: 모든 Task 완료
             all_completed = all(
-                t.get('status') == 'completed' 
+                t.status == 'completed' 
                 for t in current_part_tasks
             )
             if all_completed:
@@ -81,6 +79,28 @@ class PartManagerService:
         
         return None
     
+    def advance_part(self, session: Session) -> Optional[int]:
+        """
+        전환 조건을 만족하면 세션 모델을 다음 Part로 전환 (저장은 호출자가 commit/mutate로)
+        
+        이전 Part의 sufficient Task는 completed로 바꾼다.
+        
+        Args:
+            session: 세션 모델
+            
+        Returns:
+            전환한 Part 번호 또는 None
+        """
+        next_part = self.check_part_transition(session)
+        if not next_part:
+            return None
+        
+        for task in list(session.tasks_in_part(session.current_part)):
+            if task.status == 'sufficient':
+                session.set_task_status(task.id, 'completed')
+        session.current_part = next_part
+        return next_part
+    
     def transition_to_part(self, conversation_id: str, part_number: int) -> None:
         """
         Part 전환
@@ -89,9 +109,7 @@ class PartManagerService:
             conversation_id: 대화 ID
             part_number: 전환할 Part 번호 (1, 2, 3)
         """
-        session_ref = self.session_service.firestore.db.collection("sessions").document(conversation_id)
-        session_ref.update({
-            "current_part": part_number,
-            "updated_at": datetime.now()
+        self.session_service.update_fields(conversation_id, {
+            "current_part": part_number
         })
     
@@ -1,7 +1,42 @@
 """페르소나 관리 서비스"""
+import copy
+import threading
+from types import MappingProxyType
 from typing import Dict, List, Optional
 from datetime import datetime
+from config import Config
 from services.firestore_service import FirestoreService
+from services.catalog_cache import CatalogCache
+
+# 기본 공통 키워드
+DEFAULT_COMMON_KEYWORDS = ["감정 인식", "자기 이해", "대인 관계", "자기 돌봄"]
+
+# 프로세스 전역 페르소나 설정 캐시 (여러 PersonaService 인스턴스가 공유)
+_config_cache = None
+_config_cache_lock = threading.Lock()
+
+
+class PersonaConfigSnapshot:
+    """페르소나, 공통 키워드, 상담 레벨의 불변 스냅샷 (관리자 수정 시 통째로 교체)"""
+    
+    __slots__ = ('personas', 'common_keywords', 'counseling_levels')
+    
+    def __init__(self, personas: Dict[str, Dict], common_keywords: List[str],
+                 counseling_levels: List[Dict]):
+        object.__setattr__(self, 'personas', MappingProxyType(personas))
+        object.__setattr__(self, 'common_keywords', tuple(common_keywords))
+        object.__setattr__(self, 'counseling_levels', tuple(counseling_levels))
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("PersonaConfigSnapshot은 수정할 수 없습니다.")
+    
+    def replace(self, **changes) -> "PersonaConfigSnapshot":
+        """일부 항목만 바꾼 새 스냅샷 (personas는 dict로 전달)"""
+        return PersonaConfigSnapshot(
+            changes.get('personas', dict(self.personas)),
+            changes.get('common_keywords', self.common_keywords),
+            changes.get('counseling_levels', self.counseling_levels)
+        )
 
 
 class PersonaService:
@@ -10,6 +45,64 @@ class PersonaService:
     def __init__(self):
         self.firestore = FirestoreService()
         self.collection_name = "personas"
+        self.config_cache = self._get_config_cache()
+    
+    def _get_config_cache(self) -> CatalogCache:
+        """프로세스 전역 페르소나 설정 캐시 반환 (최초 1회 생성)"""
+        global _config_cache
+        if _config_cache is None:
+            with _config_cache_lock:
+                if _config_cache is None:
+                    _config_cache = CatalogCache(
+                        self.firestore.db,
+                        "persona_config",
+                        self._load_config_snapshot,
+                        refresh_interval=Config.CATALOG_CACHE_REFRESH_INTERVAL,
+                        use_listener=Config.CATALOG_CACHE_LISTENER
+                    )
+        return _config_cache
+    
+    def _load_config_snapshot(self) -> PersonaConfigSnapshot:
+        """personas 컬렉션과 상담 레벨 문서를 읽어 설정 스냅샷 생성"""
+        personas = {}
+        common_keywords = list(DEFAULT_COMMON_KEYWORDS)
+        
+        for doc in self.firestore.db.collection(self.collection_name).stream():
+            data = doc.to_dict()
+            if doc.id == '_common':
+                common_keywords = (data or {}).get('keywords', common_keywords)
+                continue
+            if data:  # 데이터가 있는 경우만 추가
+                personas[doc.id] = data
+        
+        levels_doc = self.firestore.db.collection("counseling_levels").document("levels").get()
+        if levels_doc.exists:
+            counseling_levels = levels_doc.to_dict().get('levels', self._get_default_levels())
+        else:
+            counseling_levels = self._get_default_levels()
+        
+        return PersonaConfigSnapshot(personas, common_keywords, counseling_levels)
+    
+    def _refresh_config(self, **changes) -> None:
+        """
+        관리자 수정 후 바뀐 항목만 스냅샷에 반영 (다른 인스턴스는 version 확인 시 다시 로드)
+        
+        Args:
+            changes: PersonaConfigSnapshot.replace() 인자 (personas, common_keywords, counseling_levels)
+        """
+        self.config_cache.apply_update(lambda snapshot: snapshot.replace(**changes))
+    
+    def _set_persona(self, persona_id: str, persona: Optional[Dict]) -> None:
+        """페르소나 하나만 스냅샷에 반영 (None이면 제거)"""
+        def update(snapshot: PersonaConfigSnapshot) -> PersonaConfigSnapshot:
+            personas = dict(snapshot.personas)
+            if persona is None:
+                personas.pop(persona_id, None)
+            else:
+                personas[persona_id] = copy.deepcopy(persona)
+            return snapshot.replace(personas=personas)
+        
+        self.config_cache.apply_update(update)
     
     def create_persona(self, persona_data: Dict) -> Dict:
         """
@@ -32,9 +125,9 @@ class PersonaService:
         if not persona_id:
             raise ValueError("페르소나 ID가 필요합니다.")
         
-        # 기존 페르소나 확인
-        existing = self.get_persona(persona_id)
-        if existing:
+        # 기존 페르소나 확인 (다른 인스턴스의 변경을 놓치지 않도록 Firestore에서 직접 확인)
+        persona_ref = self.firestore.db.collection(self.collection_name).document(persona_id)
+        if persona_ref.get().exists:
             raise ValueError(f"페르소나 '{persona_id}'가 이미 존재합니다.")
         
         # 공통 키워드는 한 번만 저장 (첫 번째 페르소나 생성 시)
@@ -53,8 +146,8 @@ class PersonaService:
         }
         
         # Firestore에 저장
-        persona_ref = self.firestore.db.collection(self.collection_name).document(persona_id)
         persona_ref.set(persona_doc)
+        self._set_persona(persona_id, persona_doc)
         
         # 공통 키워드 추가하여 반환
         persona_doc['common_keywords'] = self.get_common_keywords()
@@ -71,13 +164,13 @@ class PersonaService:
         Returns:
             페르소나 데이터 또는 None
         """
-        persona_ref = self.firestore.db.collection(self.collection_name).document(persona_id)
-        persona_doc = persona_ref.get()
+        snapshot = self.config_cache.get()
+        persona = snapshot.personas.get(persona_id)
         
-        if persona_doc.exists:
-            data = persona_doc.to_dict()
+        if persona:
+            data = copy.deepcopy(persona)
             # 공통 키워드 추가
-            data['common_keywords'] = self.get_common_keywords()
+            data['common_keywords'] = list(snapshot.common_keywords)
             return data
         return None
     
@@ -88,21 +181,14 @@ class PersonaService:
         Returns:
             페르소나 목록
         """
-        personas_ref = self.firestore.db.collection(self.collection_name)
-        personas_docs = personas_ref.stream()
+        snapshot = self.config_cache.get()
+        common_keywords = list(snapshot.common_keywords)
         
         personas = []
-        common_keywords = self.get_common_keywords()
-        
-        for doc in personas_docs:
-            # _common 문서는 제외
-            if doc.id == '_common':
-                continue
-            
-            data = doc.to_dict()
-            if data:  # 데이터가 있는 경우만 추가
-                data['common_keywords'] = common_keywords
-                personas.append(data)
+        for persona in snapshot.personas.values():
+            data = copy.deepcopy(persona)
+            data['common_keywords'] = common_keywords
+            personas.append(data)
         
         # ID로 정렬
         personas.sort(key=lambda x: x.get('id', ''))
@@ -149,6 +235,7 @@ class PersonaService:
         # 업데이트된 데이터 반환
         updated_doc = persona_ref.get()
         data = updated_doc.to_dict()
+        self._set_persona(persona_id, data)
         data['common_keywords'] = self.get_common_keywords()
         
         return data
@@ -170,6 +257,7 @@ class PersonaService:
             raise ValueError(f"페르소나 '{persona_id}'를 찾을 수 없습니다.")
         
         persona_ref.delete()
+        self._set_persona(persona_id, None)
         return True
     
     def get_common_keywords(self) -> List[str]:
@@ -179,15 +267,8 @@ class PersonaService:
         Returns:
             공통 키워드 리스트
         """
-        common_ref = self.firestore.db.collection("personas").document("_common")
-        common_doc = common_ref.get()
-        
-        if common_doc.exists:
-            data = common_doc.to_dict()
-            return data.get('keywords', [])
-        
-        # 기본 공통 키워드 반환
-        return ["감정 인식", "자기 이해", "대인 관계", "자기 돌봄"]
+        # 문서가 없으면 스냅샷에 기본 공통 키워드가 들어 있음
+        return list(self.config_cache.get().common_keywords)
     
     def update_common_keywords(self, keywords: List[str]) -> List[str]:
         """
@@ -203,7 +284,7 @@ class PersonaService:
             raise ValueError("공통 키워드는 정확히 4개여야 합니다.")
         
         self._save_common_keywords(keywords)
-        return keywords
+        return self.get_common_keywords()
     
     def _save_common_keywords(self, keywords: List[str]):
         """공통 키워드를 Firestore에 저장"""
@@ -212,6 +293,7 @@ class PersonaService:
             "keywords": keywords,
             "updated_at": datetime.now()
         })
+        self._refresh_config(common_keywords=keywords)
     
     def initialize_default_personas(self):
         """기본 페르소나 타입 초기화 (16개)"""
@@ -315,7 +397,7 @@ class PersonaService:
         ]
         
         # 공통 키워드 저장
-        common_keywords = ["감정 인식", "자기 이해", "대인 관계", "자기 돌봄"]
+        common_keywords = list(DEFAULT_COMMON_KEYWORDS)
         self.update_common_keywords(common_keywords)
         
         # 각 페르소나 생성 (이미 존재하면 스킵)
@@ -341,14 +423,8 @@ class PersonaService:
         Returns:
             상담 레벨 목록 (1~5)
         """
-        levels_ref = self.firestore.db.collection("counseling_levels")
-        levels_doc = levels_ref.document("levels").get()
-        
-        if levels_doc.exists:
-            data = levels_doc.to_dict()
-            return data.get('levels', self._get_default_levels())
-        
-        return self._get_default_levels()
+        # 문서가 없으면 스냅샷에 기본 상담 레벨이 들어 있음
+        return copy.deepcopy(list(self.config_cache.get().counseling_levels))
     
     def update_counseling_levels(self, levels: List[Dict]) -> List[Dict]:
         """
@@ -373,6 +449,7 @@ class PersonaService:
             "levels": levels,
             "updated_at": datetime.now()
         })
+        self._refresh_config(counseling_levels=copy.deepcopy(levels))
         
         return levels
     
@@ -0,0 +1,173 @@
+"""프롬프트 저장 서비스 - 시스템 프롬프트를 내용 해시로 한 번만 저장"""
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from services.firestore_service import FirestoreService
+from services.text_codec import TextCodec
+
+logger = logging.getLogger(__name__)
+
+
+class PromptStoreService:
+    """
+    턴별 Counselor 프롬프트를 참조 + 변경분으로 저장
+
+    - 시스템 프롬프트는 `prompt_blobs/<sha256>` 문서에 한 번만 저장
+    - 턴 메타데이터에는 {system_hash, history_count, delta}만 남김
+      (history_count: 프롬프트에 포함된 대화 메시지 수, delta: 이번 턴에 새로 붙은 메시지)
+    - 디버그 조회 시 대화 메시지와 합쳐 전체 프롬프트를 다시 구성
+    """
+
+    COLLECTION = "prompt_blobs"
+
+    # 이미 저장한 해시를 기억하는 최대 개수 (넘으면 비움)
+    MAX_KNOWN_HASHES = 1000
+
+    # 복원한 턴별 프롬프트를 기억하는 최대 개수 (넘으면 비움)
+    MAX_CACHED_PROMPTS = 200
+
+    def __init__(self):
+        self.firestore = FirestoreService()
+        self.codec = TextCodec()
+        self._lock = threading.Lock()
+        self._known_hashes = set()
+        self._blob_cache: Dict[str, str] = {}
+        self._prompt_cache: Dict[Tuple[str, int], str] = {}
+
+    def build_ref(self, messages: List[Tuple[str, str]], history_count: int) -> Dict:
+        """
+        프롬프트 참조 생성 (시스템 프롬프트는 저장소에 기록)
+
+        Args:
+            messages: LLM에 전달한 (role, content) 목록 (첫 항목이 system)
+            history_count: messages에 포함된 대화 기록 메시지 수
+
+        Returns:
+            {"system_hash", "history_count", "delta"}
+        """
+        system_prompt = messages[0][1] if messages and messages[0][0] == "system" else ""
+        system_hash = self.save_blob(system_prompt)
+
+        # system + 대화 기록 이후에 붙은 메시지만 변경분으로 저장
+        delta = [
+            {"role": role, "content": content}
+            for role, content in messages[1 + history_count:]
+        ]
+
+        return {
+            "system_hash": system_hash,
+            "history_count": history_count,
+            "delta": delta
+        }
+
+    def save_blob(self, text: str) -> str:
+        """텍스트를 내용 해시로 저장하고 해시 반환 (이미 있으면 쓰지 않음)"""
+        blob_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+        with self._lock:
+            if blob_hash in self._known_hashes:
+                return blob_hash
+
+        blob_ref = self.firestore.db.collection(self.COLLECTION).document(blob_hash)
+        if not blob_ref.get(field_paths=["created_at"]).exists:
+            blob_ref.set({
+                "text": self.codec.encode(text),
+                "created_at": datetime.now()
+            })
+
+        with self._lock:
+            if len(self._known_hashes) >= self.MAX_KNOWN_HASHES:
+                self._known_hashes.clear()
+            self._known_hashes.add(blob_hash)
+        return blob_hash
+
+    def get_blob(self, blob_hash: str) -> Optional[str]:
+        """해시로 저장된 텍스트 가져오기"""
+        text = self._blob_cache.get(blob_hash)
+        if text is not None:
+            return text
+
+        doc = self.firestore.db.collection(self.COLLECTION).document(blob_hash).get()
+        if not doc.exists:
+            return None
+
+        text = self.codec.decode((doc.to_dict() or {}).get("text", ""))
+        with self._lock:
+            if len(self._blob_cache) >= self.MAX_KNOWN_HASHES:
+                self._blob_cache.clear()
+            self._blob_cache[blob_hash] = text
+        return text
+
+    def get_prompt(self, conversation_id: str, seq: int, prompt_ref: Dict) -> str:
+        """
+        턴 프롬프트 복원 (대화 메시지는 history_count개만 읽고, 결과는 seq별로 캐시)
+
+        한 턴의 프롬프트는 저장 후 바뀌지 않으므로 같은 seq는 다시 읽지 않는다.
+
+        Args:
+            conversation_id: 대화 ID
+            seq: assistant 메시지 순번
+            prompt_ref: 해당 턴 메타데이터의 prompt_ref
+
+        Returns:
+            표시용 전체 프롬프트 문자열
+        """
+        key = (conversation_id, seq)
+        prompt = self._prompt_cache.get(key)
+        if prompt is not None:
+            return prompt
+
+        history_count = prompt_ref.get("history_count", 0)
+        history = []
+        if history_count > 0:
+            history = self.firestore.get_messages(
+                conversation_id, limit=history_count, exclude=["metadata"]
+            ) or []
+        prompt = self.reconstruct(prompt_ref, history)
+
+        with self._lock:
+            if len(self._prompt_cache) >= self.MAX_CACHED_PROMPTS:
+                self._prompt_cache.clear()
+            self._prompt_cache[key] = prompt
+        return prompt
+
+    def reconstruct(self, prompt_ref: Dict, conversation_messages: List[Dict]) -> str:
+        """
+        참조와 대화 메시지로 전체 프롬프트 복원
+
+        Args:
+            prompt_ref: build_ref()가 만든 참조
+            conversation_messages: 대화 문서의 메시지 목록
+
+        Returns:
+            표시용 전체 프롬프트 문자열
+        """
+        system_prompt = self.get_blob(prompt_ref.get("system_hash", ""))
+        if system_prompt is None:
+            logger.warning(f"[PROMPT_STORE] 시스템 프롬프트 없음: {prompt_ref.get('system_hash')}")
+            system_prompt = ""
+
+        messages = [("system", system_prompt)]
+        history_count = prompt_ref.get("history_count", 0)
+        for msg in conversation_messages[:history_count]:
+            messages.append((msg.get("role"), msg.get("content", "")))
+        for msg in prompt_ref.get("delta", []):
+            messages.append((msg.get("role"), msg.get("content", "")))
+
+        return self.format_messages(messages)
+
+    @staticmethod
+    def format_messages(messages: List[Tuple[str, str]]) -> str:
+        """메시지를 표시용 문자열로 변환"""
+        prompt_parts = []
+        for role, content in messages:
+            if role == 'system':
+                prompt_parts.append(f"[System]\n{content}\n")
+            elif role == 'user':
+                prompt_parts.append(f"[User]\n{content}\n")
+            elif role == 'assistant':
+                prompt_parts.append(f"[Assistant]\n{content}\n")
+
+        return "\n".join(prompt_parts)
@@ -0,0 +1,141 @@
+"""세션 변경 이벤트 서비스 - 대화별 Server-Sent Events 구독 관리"""
+import queue
+import threading
+from typing import Dict, List, Optional
+from config import Config
+
+
+class SessionSubscription(queue.Queue):
+    """구독자별 delta 큐 (넘쳐서 delta를 버린 경우 needs_resync로 표시)"""
+
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize=maxsize)
+        self.needs_resync = False
+
+    def reset(self) -> None:
+        """밀린 delta를 버리고 재동기화 표시 해제 (호출 후 스냅샷을 다시 보내야 함)"""
+        self.needs_resync = False
+        while True:
+            try:
+                self.get_nowait()
+            except queue.Empty:
+                return
+
+
+class SessionEventService:
+    """
+    세션 변경 이벤트 pub/sub (프로세스 내)
+
+    SessionService가 세션을 커밋할 때 화면에 필요한 변경분(delta)만 발행하고,
+    /api/sessions/<id>/events 스트림이 이를 구독해 브라우저로 전달한다.
+    큐 항목 하나가 커밋 하나(세션 version +1)이며, 화면 필드가 없는 커밋은 빈 delta로 전달한다
+    (스트림이 version을 따라가 heartbeat에서 스냅샷을 다시 보내지 않도록).
+    SSE 스트림은 열려 있는 동안 워커 스레드를 하나씩 점유하므로 동시 구독 수를 제한한다.
+    """
+
+    # 그대로 전달하는 세션 필드
+    DELTA_FIELDS = (
+        "status",
+        "current_part",
+        "current_task",
+        "current_module",
+        "tasks",
+        "part2_goal",
+        "part2_selected_keywords"
+    )
+
+    # 구독자별 큐 최대 길이 (느린 클라이언트가 메모리를 잡아두지 않도록)
+    MAX_QUEUE_SIZE = 100
+
+    def __init__(self, max_subscriptions: int = 0):
+        """
+        Args:
+            max_subscriptions: 프로세스 전체 동시 구독 수 상한 (0이면 제한 없음)
+        """
+        self.max_subscriptions = max_subscriptions
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, List[SessionSubscription]] = {}
+        self._subscription_count = 0
+
+    def subscribe(self, conversation_id: str) -> Optional[SessionSubscription]:
+        """
+        대화의 세션 이벤트 구독 (반환된 큐에서 delta를 꺼내 사용)
+
+        Returns:
+            구독 또는 None (동시 구독 수 상한 초과)
+        """
+        subscription = SessionSubscription(self.MAX_QUEUE_SIZE)
+        with self._lock:
+            if self.max_subscriptions and self._subscription_count >= self.max_subscriptions:
+                return None
+            self._subscribers.setdefault(conversation_id, []).append(subscription)
+            self._subscription_count += 1
+        return subscription
+
+    def unsubscribe(self, conversation_id: str, subscription: SessionSubscription) -> None:
+        """구독 해제"""
+        with self._lock:
+            subscriptions = self._subscribers.get(conversation_id, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+                self._subscription_count -= 1
+            if not subscriptions:
+                self._subscribers.pop(conversation_id, None)
+
+    def has_subscribers(self, conversation_id: str) -> bool:
+        """구독자 존재 여부"""
+        return bool(self._subscribers.get(conversation_id))
+
+    def publish_session_update(self, conversation_id: str, fields: Dict) -> None:
+        """
+        세션 커밋 내용을 delta로 변환해 구독자에게 전달
+
+        Args:
+            conversation_id: 대화 ID
+            fields: 커밋된 세션 필드
+        """
+        if not self.has_subscribers(conversation_id):
+            return
+
+        # 화면 필드가 없는 커밋도 빈 delta로 전달 (스트림의 version 추적용)
+        delta = self.build_delta(fields) or {}
+
+        with self._lock:
+            subscriptions = list(self._subscribers.get(conversation_id, []))
+
+        for subscription in subscriptions:
+            try:
+                subscription.put_nowait(delta)
+            except queue.Full:
+                # delta를 버렸으므로 스트림이 스냅샷으로 다시 맞추도록 표시
+                subscription.needs_resync = True
+
+    def build_delta(self, fields: Dict) -> Optional[Dict]:
+        """커밋된 필드에서 화면 표시용 delta 생성 (로그는 마지막 항목만)"""
+        delta = {key: fields[key] for key in self.DELTA_FIELDS if key in fields}
+
+        supervision_log = fields.get("supervision_log")
+        if supervision_log:
+            entry = supervision_log[-1]
+            delta["supervision"] = {
+                key: value for key, value in entry.items()
+                if key not in ("user_message", "counselor_response")
+            }
+
+        completion_log = fields.get("completion_log")
+        if completion_log:
+            entry = completion_log[-1]
+            delta["completion"] = {
+                key: value for key, value in entry.items()
+                if key != "raw_output"
+            }
+
+        return delta or None
+
+
+_session_event_service = SessionEventService(max_subscriptions=Config.SESSION_EVENTS_MAX_STREAMS)
+
+
+def get_session_event_service() -> SessionEventService:
+    """프로세스 전역 세션 이벤트 서비스 반환"""
+    return _session_event_service
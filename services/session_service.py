@@ -1,14 +1,64 @@
 """상담 세션 관리 서비스"""
-from typing import Dict, List, Optional
+import json
+import logging
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional
 from datetime import datetime
+from config import Config
 from services.firestore_service import FirestoreService
+from services.session_event_service import get_session_event_service
+from services.text_codec import TextCodec
+from services.task_templates import compact_tasks, expand_tasks
+from services.models import Session, SupervisionEntry, Task
+
+logger = logging.getLogger(__name__)
+
+
+class SessionConflict(Exception):
+    """조건부 저장 시 세션이 읽은 뒤에 다른 곳에서 변경됨"""
 
 
 class SessionService:
     """상담 세션 상태 관리"""
     
+    # 세션 조회 API에서 반환하는 요약 필드 (대용량 로그 제외)
+    SUMMARY_FIELDS = [
+        "conversation_id",
+        "session_type",
+        "status",
+        "current_part",
+        "current_task",
+        "current_module",
+        "tasks",
+        "task_state",
+        "part2_goal",
+        "part2_selected_keywords",
+        "supervision_log",
+        "completion_log",
+        "message_count",
+        "version",
+        "created_at",
+        "updated_at"
+    ]
+    
+    # 로그 항목 중 압축 저장하는 텍스트 필드
+    COMPRESSED_LOG_FIELDS = {
+        "supervision_log": SupervisionEntry.TEXT_FIELDS,
+        "completion_log": ("raw_output", "completion_reason")
+    }
+    
+    # task_state 맵의 키로 점 경로 update에 바로 쓸 수 있는 Task ID
+    _FIELD_KEY_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+    
+    # 쓰면 revision이 증가하는 필드 (세션 모델이 읽고-수정-쓰는 상태, 로그 추가와 message_count 증가는 제외)
+    REVISION_FIELDS = frozenset(Session.TRACKED_FIELDS) | {"tasks", "task_state"}
+    
     def __init__(self):
         self.firestore = FirestoreService()
+        self.events = get_session_event_service()
+        self.codec = TextCodec()
+        self.metrics = get_session_write_metrics()
     
     def create_session(self, conversation_id: str, session_type: str = "first_session") -> Dict:
         """
@@ -40,7 +90,9 @@ class SessionService:
             "session_manager_log": [],  # Session Manager 평가 로그
             "completion_log": [],  # Task Completion Checker 로그
             "message_count": 0,
-            "part2_task_update_count": 0  # Part 2 Task 업데이트 횟수 (최대 2회)
+            "part2_task_update_count": 0,  # Part 2 Task 업데이트 횟수 (최대 2회)
+            "version": 0,  # 세션 변경 시마다 증가 (조회 API의 ETag)
+            "revision": 0  # Task/상태 필드 변경 시마다 증가 (조건부 저장 기준)
         }
         
         # Firestore에 세션 저장
@@ -63,35 +115,274 @@ class SessionService:
                     "counseling_level": 1
                 }
         """
-        session_ref = self.firestore.db.collection("sessions").document(conversation_id)
-        session_ref.update({
-            "user_persona": persona,
-            "updated_at": datetime.now()
+        self.update_fields(conversation_id, {
+            "user_persona": persona
         })
     
-    def get_session(self, conversation_id: str) -> Optional[Dict]:
-        """세션 가져오기"""
+    def get_session(self, conversation_id: str, decode_logs: bool = True) -> Optional[Dict]:
+        """
+        세션 가져오기
+        
+        Args:
+            conversation_id: 대화 ID
+            decode_logs: 로그(supervision_log, completion_log)의 압축된 텍스트도 복원할지 여부
+                         (로그 본문을 쓰지 않는 상담 턴 경로에서는 False)
+        """
         session_ref = self.firestore.db.collection("sessions").document(conversation_id)
         session_doc = session_ref.get()
         
         if session_doc.exists:
-            return session_doc.to_dict()
+            return self._decode_session(session_doc.to_dict(), decode_logs)
         return None
     
-    def update_tasks(self, conversation_id: str, tasks: List[Dict]) -> None:
-        """Task 목록 업데이트"""
+    def get_session_model(self, conversation_id: str) -> Optional[Session]:
+        """세션을 모델로 가져오기 (Supervision 기록은 supervision_for()로 조회할 때 복원)"""
+        session = self.get_session(conversation_id, decode_logs=False)
+        return Session.from_dict(session) if session else None
+    
+    def get_session_version(self, conversation_id: str) -> Optional[int]:
+        """
+        세션 version만 가져오기 (조건부 조회용 가벼운 읽기)
+        
+        Args:
+            conversation_id: 대화 ID
+            
+        Returns:
+            세션 version (세션이 없으면 None)
+        """
+        session_ref = self.firestore.db.collection("sessions").document(conversation_id)
+        session_doc = session_ref.get(field_paths=["version"])
+        
+        if not session_doc.exists:
+            return None
+        return (session_doc.to_dict() or {}).get("version", 0)
+    
+    def get_session_revision(self, conversation_id: str) -> Optional[int]:
+        """세션 revision만 가져오기 (캐시된 세션 모델이 최신인지 확인용)"""
         session_ref = self.firestore.db.collection("sessions").document(conversation_id)
-        session_ref.update({
-            "tasks": tasks,
+        session_doc = session_ref.get(field_paths=["revision"])
+        
+        if not session_doc.exists:
+            return None
+        return (session_doc.to_dict() or {}).get("revision", 0)
+    
+    def get_supervision_entry(self, conversation_id: str, message_index: int) -> Optional[SupervisionEntry]:
+        """
+        message_index에 대한 Supervision 기록만 가져오기 (supervision_log 필드만 읽음)
+        
+        Args:
+            conversation_id: 대화 ID
+            message_index: Supervision을 실행한 메시지 순번
+            
+        Returns:
+            가장 최근 Supervision 기록 또는 None
+        """
+        session_ref = self.firestore.db.collection("sessions").document(conversation_id)
+        session_doc = session_ref.get(field_paths=["supervision_log"])
+        
+        if not session_doc.exists:
+            return None
+        for entry in reversed((session_doc.to_dict() or {}).get("supervision_log") or []):
+            if entry.get("message_index") == message_index:
+                return SupervisionEntry.from_dict(entry).decode_text()
+        return None
+    
+    def get_session_summary(self, conversation_id: str, log_limit: int = 5) -> Optional[Dict]:
+        """
+        세션 요약 가져오기 (화면 표시에 필요한 필드만)
+        
+        Args:
+            conversation_id: 대화 ID
+            log_limit: 포함할 최근 로그 개수
+            
+        Returns:
+            요약된 세션 데이터 또는 None
+        """
+        session_ref = self.firestore.db.collection("sessions").document(conversation_id)
+        session_doc = session_ref.get(field_paths=self.SUMMARY_FIELDS)
+        
+        if not session_doc.exists:
+            return None
+        
+        session = self._decode_session(session_doc.to_dict(), decode_logs=False)
+        
+        # 최근 로그만 포함해 그 항목만 복원 (completion_log의 LLM 원본 출력은 제외)
+        session["completion_log"] = [
+            {k: v for k, v in entry.items() if k != "raw_output"}
+            for entry in session.get("completion_log", [])[-log_limit:]
+        ]
+        session["supervision_log"] = [
+            {k: v for k, v in entry.items() if k not in ("user_message", "counselor_response")}
+            for entry in session.get("supervision_log", [])[-log_limit:]
+        ]
+        for field, keys in self.COMPRESSED_LOG_FIELDS.items():
+            self.codec.decode_entries(session[field], keys)
+        return session
+    
+    def update_fields(self, conversation_id: str, fields: Dict, publish: Optional[Dict] = None,
+                      expected_revision: Optional[int] = None) -> None:
+        """
+        세션 필드 업데이트 (모든 세션 쓰기는 이 메서드를 거쳐 version을 증가시킴)
+        
+        Args:
+            conversation_id: 대화 ID
+            fields: 업데이트할 필드 (점 경로, increment/array_union 사용 가능)
+            publish: 세션 이벤트로 전달할 필드 (없으면 fields)
+            expected_revision: 주어지면 저장된 revision이 이 값일 때만 기록 (다르면 SessionConflict)
+        """
+        encoded = self._encode_session(fields)
+        updates = {
+            **encoded,
+            "version": self.firestore.db.increment(1),
             "updated_at": datetime.now()
+        }
+        if any(path.split(".", 1)[0] in self.REVISION_FIELDS for path in encoded):
+            updates["revision"] = self.firestore.db.increment(1)
+        
+        session_ref = self.firestore.db.collection("sessions").document(conversation_id)
+        if expected_revision is None:
+            session_ref.update(updates)
+        else:
+            def conditional_update(transaction) -> None:
+                snapshot = session_ref.get(field_paths=["revision"], transaction=transaction)
+                revision = (snapshot.to_dict() or {}).get("revision", 0) if snapshot.exists else None
+                if revision != expected_revision:
+                    raise SessionConflict(
+                        f"{conversation_id}: revision {expected_revision} → {revision}"
+                    )
+                transaction.update(session_ref, updates)
+            
+            self.firestore.db.run_transaction(conditional_update)
+        self.metrics.record(encoded)
+        
+        # 커밋된 변경분을 세션 이벤트 구독자(SSE)에게 전달 (압축 전 값, 커밋마다 version +1)
+        self.events.publish_session_update(conversation_id, fields if publish is None else publish)
+    
+    def commit(self, session: Session) -> bool:
+        """
+        세션 모델의 마지막 저장 이후 변경분만 저장
+        
+        - 바뀐 세션 필드만 기록
+        - Task 상태는 `task_state.<task id>` 필드 단위로 기록
+        - 뒤에 추가된 Task는 array_union으로 추가 (기존 정의가 바뀐 경우에만 tasks 전체를 다시 씀)
+        - 모델을 읽은 뒤 다른 곳에서 세션이 바뀌었으면 최신 세션을 다시 읽어 같은 변경을 적용한 뒤 재시도
+          (session 객체도 최신 상태로 갱신됨)
+        
+        Args:
+            session: 세션 모델
+            
+        Returns:
+            저장한 변경이 있었는지 여부
+        """
+        for attempt in range(1, Config.SESSION_COMMIT_MAX_ATTEMPTS + 1):
+            changes = session.changes()
+            try:
+                return self._commit_changes(session, changes)
+            except SessionConflict as e:
+                if attempt == Config.SESSION_COMMIT_MAX_ATTEMPTS:
+                    raise
+                logger.info(f"[SESSION] 저장 충돌, 최신 세션에 변경 재적용 ({attempt}): {str(e)}")
+                latest = self.get_session_model(session.conversation_id)
+                if latest is None:
+                    raise
+                latest.apply_changes(changes)
+                session.adopt(latest)
+        return False
+    
+    def mutate(self, conversation_id: str, mutation: Callable[[Session], Any],
+               session: Optional[Session] = None) -> Optional[Session]:
+        """
+        세션 읽기-수정-쓰기 (충돌하면 최신 세션을 다시 읽어 mutation부터 재실행)
+        
+        mutation은 최신 상태를 보고 판단해야 하므로 재실행되어도 안전해야 한다.
+        
+        Args:
+            conversation_id: 대화 ID
+            mutation: 세션 모델을 제자리에서 변경하는 함수
+            session: 첫 시도에 사용할 이미 읽은 세션 모델 (없으면 저장소에서 읽음)
+            
+        Returns:
+            저장된 세션 모델 (세션이 없으면 None)
+        """
+        for attempt in range(1, Config.SESSION_COMMIT_MAX_ATTEMPTS + 1):
+            if session is None:
+                session = self.get_session_model(conversation_id)
+                if session is None:
+                    return None
+            mutation(session)
+            try:
+                self._commit_changes(session, session.changes())
+                return session
+            except SessionConflict as e:
+                if attempt == Config.SESSION_COMMIT_MAX_ATTEMPTS:
+                    raise
+                logger.info(f"[SESSION] 저장 충돌, 최신 세션으로 재시도 ({attempt}): {str(e)}")
+                session = None
+        return None
+    
+    def _commit_changes(self, session: Session, changes: Dict) -> bool:
+        """changes를 session.revision 조건부로 저장 (충돌 시 SessionConflict)"""
+        fields = dict(changes["fields"])
+        task_states = changes["task_states"]
+        tasks_changed = changes["tasks_rewritten"] or changes["appended_tasks"] or task_states
+        if not fields and not tasks_changed:
+            return False
+        
+        updates = dict(fields)
+        if changes["tasks_rewritten"] or not all(self._FIELD_KEY_PATTERN.match(task_id) for task_id in task_states):
+            updates["tasks"] = session.task_dicts()
+        else:
+            if changes["appended_tasks"]:
+                updates["tasks"] = self.firestore.db.array_union(compact_tasks(changes["appended_tasks"]))
+            for task_id, state in task_states.items():
+                updates[f"task_state.{task_id}"] = state
+        
+        # 화면에는 전체 Task 목록을 전달
+        if tasks_changed:
+            fields["tasks"] = session.task_dicts()
+        self.update_fields(session.conversation_id, updates, publish=fields, expected_revision=session.revision)
+        session.revision += 1
+        session.mark_persisted()
+        return True
+    
+    def _encode_session(self, fields: Dict) -> Dict:
+        """저장 전 Task를 정의(고정 Task는 템플릿 참조)와 상태 맵으로 나누고 로그의 큰 텍스트 필드 압축"""
+        encoded = dict(fields)
+        if isinstance(encoded.get("tasks"), list):
+            tasks = [Task.from_dict(task) for task in encoded["tasks"]]
+            # ID가 없는 Task는 상태를 정의에 그대로 둠
+            encoded["tasks"] = compact_tasks([task.definition() if task.id else task.to_dict() for task in tasks])
+            encoded["task_state"] = {task.id: task.state() for task in tasks if task.id}
+        for field, keys in self.COMPRESSED_LOG_FIELDS.items():
+            if isinstance(encoded.get(field), list):
+                encoded[field] = self.codec.encode_entries(encoded[field], keys)
+        return encoded
+    
+    def _decode_session(self, session: Dict, decode_logs: bool = True) -> Dict:
+        """읽은 세션의 Task(템플릿 참조 + 상태 맵)와 압축된 로그 텍스트(decode_logs일 때) 복원"""
+        task_state = session.pop("task_state", None) or {}
+        if isinstance(session.get("tasks"), list):
+            session["tasks"] = [
+                {**task, **task_state.get(task.get("id"), {})}
+                for task in expand_tasks(session["tasks"])
+            ]
+        if not decode_logs:
+            return session
+        for field, keys in self.COMPRESSED_LOG_FIELDS.items():
+            if isinstance(session.get(field), list):
+                self.codec.decode_entries(session[field], keys)
+        return session
+    
+    def update_tasks(self, conversation_id: str, tasks: List[Dict]) -> None:
+        """Task 목록 업데이트"""
+        self.update_fields(conversation_id, {
+            "tasks": tasks
         })
     
     def set_current_task(self, conversation_id: str, task_id: str) -> None:
         """현재 실행 중인 task 설정"""
-        session_ref = self.firestore.db.collection("sessions").document(conversation_id)
-        session_ref.update({
-            "current_task": task_id,
-            "updated_at": datetime.now()
+        self.update_fields(conversation_id, {
+            "current_task": task_id
         })
     
     def update_task_status(self, conversation_id: str, task_id: str, status: str) -> None:
@@ -103,31 +394,13 @@ class SessionService:
             task_id: Task ID
             status: 새로운 상태 (pending, in_progress, sufficient, completed)
         """
-        session = self.get_session(conversation_id)
+        session = self.get_session_model(conversation_id)
         if not session:
             return
         
-        tasks = session.get("tasks", [])
-        
-        # Task 찾기
-        task = next((t for t in tasks if t.get("id") == task_id), None)
-        if task:
-            task["status"] = status
-            
-            # 상태별 타임스탬프 업데이트
-            if status == "sufficient" and not task.get("sufficient_at"):
-                task["sufficient_at"] = datetime.now().isoformat()
-            elif status == "completed" and not task.get("completed_at"):
-                task["completed_at"] = datetime.now().isoformat()
-            
-            # tasks 리스트 업데이트
-            tasks = [t if t.get("id") != task_id else task for t in tasks]
-            
-            session_ref = self.firestore.db.collection("sessions").document(conversation_id)
-            session_ref.update({
-                "tasks": tasks,
-                "updated_at": datetime.now()
-            })
+        # 상태별 타임스탬프는 모델에서 기록, 저장은 해당 Task 상태 필드만
+        if session.set_task_status(task_id, status):
+            self.commit(session)
     
     def update_session_status(self, conversation_id: str, status: str) -> None:
         """
@@ -137,73 +410,46 @@ class SessionService:
             conversation_id: 대화 ID
             status: 새로운 상태 (active, wrapping_up, completed)
         """
-        session_ref = self.firestore.db.collection("sessions").document(conversation_id)
-        session_ref.update({
-            "status": status,
-            "updated_at": datetime.now()
+        self.update_fields(conversation_id, {
+            "status": status
         })
     
     def add_session_manager_log(self, conversation_id: str, evaluation: Dict) -> None:
         """Session Manager 평가 로그 추가"""
-        session = self.get_session(conversation_id)
-        if not session:
-            return
-        
-        session_manager_log = session.get("session_manager_log", [])
-        session_manager_log.append({
+        self.append_log(conversation_id, "session_manager_log", {
             **evaluation,
             "timestamp": datetime.now().isoformat()
         })
-        
-        session_ref = self.firestore.db.collection("sessions").document(conversation_id)
-        session_ref.update({
-            "session_manager_log": session_manager_log,
-            "updated_at": datetime.now()
-        })
     
     def add_supervision_log(self, conversation_id: str, feedback: Dict) -> None:
         """Supervision 피드백 로그 추가"""
-        session = self.get_session(conversation_id)
-        if not session:
-            return
-        
-        supervision_log = session.get("supervision_log", [])
-        supervision_log.append({
+        self.append_log(conversation_id, "supervision_log", {
             **feedback,
             "timestamp": datetime.now().isoformat()
         })
-        
-        session_ref = self.firestore.db.collection("sessions").document(conversation_id)
-        session_ref.update({
-            "supervision_log": supervision_log,
-            "updated_at": datetime.now()
-        })
     
     def add_completion_log(self, conversation_id: str, completion_result: Dict) -> None:
         """Task Completion Checker 결과 로그 추가"""
-        session = self.get_session(conversation_id)
-        if not session:
-            return
-        
-        completion_log = session.get("completion_log", [])
-        completion_log.append({
+        self.append_log(conversation_id, "completion_log", {
             **completion_result,
             "timestamp": datetime.now().isoformat()
         })
-        
-        session_ref = self.firestore.db.collection("sessions").document(conversation_id)
-        session_ref.update({
-            "completion_log": completion_log,
-            "updated_at": datetime.now()
-        })
+    
+    def append_log(self, conversation_id: str, field: str, entry: Dict) -> None:
+        """로그 항목 추가 (세션을 읽지 않고 array_union으로 항목 하나만 기록, 같은 항목은 다시 추가되지 않음)"""
+        stored_entry = entry
+        if field in self.COMPRESSED_LOG_FIELDS:
+            stored_entry = self.codec.encode_entries([entry], self.COMPRESSED_LOG_FIELDS[field])[0]
+        self.update_fields(
+            conversation_id,
+            {field: self.firestore.db.array_union([stored_entry])},
+            publish={field: [entry]}
+        )
     
     def increment_message_count(self, conversation_id: str) -> None:
         """메시지 카운트 증가"""
-        from firebase_admin import firestore
-        session_ref = self.firestore.db.collection("sessions").document(conversation_id)
-        session_ref.update({
-            "message_count": firestore.Increment(1),
-            "updated_at": datetime.now()
+        self.update_fields(conversation_id, {
+            "message_count": self.firestore.db.increment(1)
         })
     
     def update_part2_goal(self, conversation_id: str, goal: str, selected_keywords: List[str]) -> None:
@@ -215,10 +461,84 @@ class SessionService:
             goal: Part 2 목표 (문자열)
             selected_keywords: 선택된 키워드 리스트 (최대 3~4개)
         """
-        session_ref = self.firestore.db.collection("sessions").document(conversation_id)
-        session_ref.update({
+        self.update_fields(conversation_id, {
             "part2_goal": goal,
-            "part2_selected_keywords": selected_keywords,
-            "updated_at": datetime.now()
+            "part2_selected_keywords": selected_keywords
         })
 
+    def save_part2_plan_draft(self, conversation_id: str, draft: Dict) -> None:
+        """
+        Part 1 → 2 전환 전에 미리 생성한 Part 2 계획 저장
+
+        세션 상태가 아니라 캐시이므로 revision을 바꾸지 않는다 (진행 중인 턴의 저장과 충돌하지 않음).
+
+        Args:
+            conversation_id: 대화 ID
+            draft: {"goal", "keywords", "tasks", "history_len"(생성에 사용한 대화 기록 길이), "created_at"}
+        """
+        self.update_fields(conversation_id, {"part2_plan_draft": draft})
+
+    def clear_part2_plan_draft(self, conversation_id: str) -> None:
+        """미리 생성한 Part 2 계획 삭제 (전환에 사용한 뒤)"""
+        self.update_fields(conversation_id, {"part2_plan_draft": None})
+
+
+
+class SessionWriteMetrics:
+    """
+    세션 쓰기량 집계 (프로세스 내)
+
+    커밋마다 기록한 필드 수와 크기(JSON 기준 추정 바이트)를 최상위 필드별로 누적한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._commits = 0
+        self._fields = 0
+        self._bytes = 0
+        self._by_field: Dict[str, Dict[str, int]] = {}
+
+    def record(self, encoded: Dict) -> None:
+        """커밋 하나의 쓰기 기록 (version/updated_at 제외)"""
+        sizes = {path: self._estimate_size(value) for path, value in encoded.items()}
+        with self._lock:
+            self._commits += 1
+            self._fields += len(sizes)
+            for path, size in sizes.items():
+                self._bytes += size
+                stats = self._by_field.setdefault(path.split(".", 1)[0], {"writes": 0, "bytes": 0})
+                stats["writes"] += 1
+                stats["bytes"] += size
+
+    def snapshot(self) -> Dict:
+        """현재까지의 집계"""
+        with self._lock:
+            return {
+                "commits": self._commits,
+                "fields": self._fields,
+                "bytes": self._bytes,
+                "avg_fields_per_commit": round(self._fields / self._commits, 2) if self._commits else 0,
+                "avg_bytes_per_commit": round(self._bytes / self._commits, 1) if self._commits else 0,
+                "by_field": {field: dict(stats) for field, stats in sorted(self._by_field.items())}
+            }
+
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        def default(obj):
+            # increment/array_union은 안에 든 값으로, bytes는 길이로 계산
+            if isinstance(obj, bytes):
+                return "x" * len(obj)
+            if hasattr(obj, "values"):
+                return list(obj.values)
+            if hasattr(obj, "value"):
+                return obj.value
+            return str(obj)
+        return len(json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=default).encode("utf-8"))
+
+
+_session_write_metrics = SessionWriteMetrics()
+
+
+def get_session_write_metrics() -> SessionWriteMetrics:
+    """프로세스 전역 세션 쓰기 집계 반환"""
+    return _session_write_metrics
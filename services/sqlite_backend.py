@@ -0,0 +1,160 @@
+"""SQLite 저장소 백엔드 - 단일 노드/온프레미스 배포용"""
+import logging
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from services.storage_backend import LocalBackend, LocalCollection, StorageBackend, dumps_document, loads_document
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    collection  TEXT NOT NULL,
+    id          TEXT NOT NULL,
+    parent      TEXT NOT NULL,
+    data        TEXT NOT NULL,
+    update_time TEXT NOT NULL,
+    PRIMARY KEY (collection, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_documents_parent ON documents (parent, collection);
+CREATE INDEX IF NOT EXISTS idx_documents_user_updated ON documents (
+    collection,
+    json_extract(data, '$.user_id'),
+    COALESCE(json_extract(data, '$.updated_at.__dt__'), json_extract(data, '$.updated_at'))
+);
+"""
+
+
+class SqliteBackend(LocalBackend):
+    """
+    SQLite(WAL) 문서 저장소
+
+    - 문서는 (컬렉션 경로, 문서 ID)를 기본 키로 JSON으로 저장
+      (메시지 메타데이터는 `conversations/<id>/message_meta` 컬렉션의 순번 ID로 바로 조회)
+    - 스레드별 연결을 쓰고, 모든 쿼리는 매개변수 바인딩으로 실행해 문장 캐시를 재사용
+    - 읽기-수정-쓰기와 트랜잭션은 BEGIN IMMEDIATE로 직렬화
+    - `==` 조건과 정렬은 json_extract 식으로 SQL에 넘겨 인덱스를 사용
+      ((user_id, updated_at) 대화 목록 조회용 식 인덱스 포함)
+    """
+
+    # SQL로 넘길 수 있는 필드 경로 (식 인덱스와 같은 문자열을 만들기 위해 리터럴로 삽입)
+    _FIELD_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+    # 리스너는 이 프로세스의 쓰기만 받으므로 (다른 프로세스의 쓰기는 감지 못함) 주기 확인을 사용하게 함
+    supports_listeners = False
+
+    def __init__(self, path: str, latency_ms: float = 0):
+        super().__init__(latency_ms)
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # isolation_level=None: 트랜잭션은 _atomic()에서 직접 시작/종료
+            connection = sqlite3.connect(
+                self.path,
+                timeout=30,
+                isolation_level=None,
+                check_same_thread=False,
+                cached_statements=256
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA busy_timeout=30000")
+            self._local.connection = connection
+            self._local.depth = 0
+        return connection
+
+    @contextmanager
+    def _atomic(self):
+        connection = self._connection()
+        if self._local.depth == 0:
+            connection.execute("BEGIN IMMEDIATE")
+        self._local.depth += 1
+        try:
+            yield
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                connection.execute("ROLLBACK")
+            raise
+        else:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                connection.execute("COMMIT")
+
+    def _load(self, collection_path: str, document_id: str) -> Tuple[Optional[Dict], Optional[datetime]]:
+        row = self._connection().execute(
+            "SELECT data, update_time FROM documents WHERE collection = ? AND id = ?",
+            (collection_path, document_id)
+        ).fetchone()
+        if row is None:
+            return None, None
+        return loads_document(row[0]), datetime.fromisoformat(row[1])
+
+    def _store(self, collection_path: str, document_id: str, data: Dict, update_time: datetime) -> None:
+        parent = collection_path.rsplit("/", 1)[0] if "/" in collection_path else ""
+        self._connection().execute(
+            "INSERT INTO documents (collection, id, parent, data, update_time) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (collection, id) DO UPDATE SET data = excluded.data, update_time = excluded.update_time",
+            (collection_path, document_id, parent, dumps_document(data), update_time.isoformat())
+        )
+
+    def _remove(self, collection_path: str, document_id: str) -> None:
+        self._connection().execute(
+            "DELETE FROM documents WHERE collection = ? AND id = ?",
+            (collection_path, document_id)
+        )
+
+    def _scan(self, query: LocalCollection) -> Tuple[Iterable[Tuple[str, Dict]], bool]:
+        sql = ["SELECT id, data FROM documents WHERE collection = ?"]
+        params: List = [query.path]
+
+        for field, op, value in query.filters:
+            if op == "==" and self._pushable(field) and isinstance(value, (str, int, float)):
+                sql.append(f"AND {self._value_expr(field)} = ?")
+                params.append(value)
+
+        ordered = all(self._pushable(field) for field, _ in query.orders)
+        if ordered and query.orders:
+            terms = [
+                f"{self._order_expr(field)} {'DESC' if direction == StorageBackend.DESCENDING else 'ASC'}"
+                for field, direction in query.orders
+            ]
+            # 문서 ID는 마지막 정렬 방향을 따름 (인덱스 순서 그대로 읽기 위해)
+            terms.append(f"id {terms[-1].rsplit(' ', 1)[1]}")
+            sql.append("ORDER BY " + ", ".join(terms))
+        else:
+            sql.append("ORDER BY id ASC")
+
+        cursor = self._connection().execute(" ".join(sql), params)
+        rows = ((document_id, loads_document(data)) for document_id, data in cursor)
+        return rows, ordered
+
+    def _child_collections(self, document_path: Optional[str]) -> List[str]:
+        rows = self._connection().execute(
+            "SELECT DISTINCT collection FROM documents WHERE parent = ? ORDER BY collection",
+            (document_path or "",)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def _pushable(self, field: str) -> bool:
+        return bool(self._FIELD_PATTERN.match(field))
+
+    @staticmethod
+    def _value_expr(field: str) -> str:
+        return f"json_extract(data, '$.{field}')"
+
+    @staticmethod
+    def _order_expr(field: str) -> str:
+        # datetime은 {"__dt__": ISO 문자열}로 저장되므로 태그 값을 우선 정렬 키로 사용
+        return f"COALESCE(json_extract(data, '$.{field}.__dt__'), json_extract(data, '$.{field}'))"
@@ -0,0 +1,578 @@
+"""저장소 백엔드 - Firestore 구현과 로컬(인메모리, SQLite) 구현"""
+import base64
+import copy
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class StorageBackend(ABC):
+    """
+    서비스들이 사용하는 문서 저장소 인터페이스
+
+    Firestore 클라이언트 API 중 실제로 쓰는 부분만 같은 형태로 제공한다.
+    - collection(name) → document(id) → get / set / update / delete / collection(s) / on_snapshot
+    - 컬렉션 쿼리: where / order_by / select / start_after / limit / stream
+    - run_transaction(fn): fn(transaction)을 트랜잭션 안에서 실행
+    - increment(n), array_union(values): 원자적 필드 변환 값
+    """
+
+    ASCENDING = "ASCENDING"
+    DESCENDING = "DESCENDING"
+
+    # document.on_snapshot()으로 다른 프로세스의 변경까지 받을 수 있는지 여부
+    supports_listeners = True
+
+    @abstractmethod
+    def collection(self, name: str):
+        """컬렉션 참조"""
+
+    @abstractmethod
+    def collections(self) -> List[Any]:
+        """최상위 컬렉션 목록 (내보내기/마이그레이션용)"""
+
+    @abstractmethod
+    def run_transaction(self, fn: Callable[[Any], Any]) -> Any:
+        """fn(transaction)을 트랜잭션 안에서 실행하고 fn의 반환값 반환"""
+
+    @abstractmethod
+    def increment(self, value: int = 1) -> Any:
+        """원자적 증가 필드 변환 값"""
+
+    @abstractmethod
+    def array_union(self, values: List) -> Any:
+        """원자적 배열 합집합 필드 변환 값"""
+
+
+class FirestoreBackend(StorageBackend):
+    """firebase_admin Firestore 클라이언트 백엔드"""
+
+    def __init__(self):
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+
+        # Firebase Admin SDK 초기화 (이미 초기화되어 있지 않은 경우만)
+        if not firebase_admin._apps:
+            cred_path = Config.GOOGLE_APPLICATION_CREDENTIALS
+            if cred_path and os.path.exists(cred_path):
+                cred = credentials.Certificate(cred_path)
+                firebase_admin.initialize_app(cred)
+            else:
+                # 파일이 없으면 기본 자격 증명 사용 (Cloud Run 등)
+                firebase_admin.initialize_app()
+
+        self._firestore = firestore
+        self.client = firestore.client()
+
+    def collection(self, name: str):
+        return self.client.collection(name)
+
+    def collections(self):
+        return list(self.client.collections())
+
+    def run_transaction(self, fn: Callable[[Any], Any]) -> Any:
+        return self._firestore.transactional(fn)(self.client.transaction())
+
+    def increment(self, value: int = 1) -> Any:
+        return self._firestore.Increment(value)
+
+    def array_union(self, values: List) -> Any:
+        return self._firestore.ArrayUnion(values)
+
+
+# ==================== 로컬 백엔드 공통 (인메모리 / SQLite) ====================
+
+class DocumentNotFound(Exception):
+    """update 대상 문서가 없을 때 (Firestore의 NotFound에 해당)"""
+
+
+class _Increment:
+    def __init__(self, value):
+        self.value = value
+
+
+class _ArrayUnion:
+    def __init__(self, values):
+        self.values = list(values)
+
+
+class LocalSnapshot:
+    """로컬 백엔드 문서 스냅샷"""
+
+    def __init__(self, reference: "LocalDocument", data: Optional[Dict],
+                 update_time: Optional[datetime] = None):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self.update_time = update_time
+        self._data = data
+
+    def to_dict(self) -> Optional[Dict]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field: str) -> Any:
+        return _get_path(self._data or {}, field)
+
+
+class LocalWatch:
+    """on_snapshot 등록 해제 핸들"""
+
+    def __init__(self, backend: "LocalBackend", path: str, callback):
+        self._backend = backend
+        self._path = path
+        self._callback = callback
+
+    def unsubscribe(self) -> None:
+        self._backend._remove_listener(self._path, self._callback)
+
+
+class LocalDocument:
+    """로컬 백엔드 문서 참조"""
+
+    def __init__(self, backend: "LocalBackend", collection_path: str, document_id: str):
+        self._backend = backend
+        self._collection_path = collection_path
+        self.id = document_id
+        self.path = f"{collection_path}/{document_id}"
+
+    def get(self, field_paths: Optional[Iterable[str]] = None, transaction=None) -> LocalSnapshot:
+        self._backend._delay()
+        data, update_time = self._backend._load(self._collection_path, self.id)
+        if data is not None and field_paths is not None:
+            data = _project(data, field_paths)
+        return LocalSnapshot(self, data, update_time)
+
+    def set(self, data: Dict, merge: bool = False) -> None:
+        self._backend._delay()
+        self._backend._write(self._collection_path, self.id, data, merge=merge)
+
+    def update(self, data: Dict) -> None:
+        self._backend._delay()
+        self._backend._write(self._collection_path, self.id, data, update=True)
+
+    def delete(self) -> None:
+        self._backend._delay()
+        self._backend._delete(self._collection_path, self.id)
+
+    def collection(self, name: str) -> "LocalCollection":
+        return LocalCollection(self._backend, f"{self.path}/{name}")
+
+    def collections(self) -> List["LocalCollection"]:
+        return [LocalCollection(self._backend, path) for path in self._backend._child_collections(self.path)]
+
+    def on_snapshot(self, callback) -> LocalWatch:
+        self._backend._add_listener(self.path, callback)
+        callback([self.get()], [], datetime.now())
+        return LocalWatch(self._backend, self.path, callback)
+
+
+class LocalCollection:
+    """로컬 백엔드 컬렉션 참조 및 쿼리 (쿼리 메서드는 새 객체를 반환)"""
+
+    OPERATORS = {
+        "==": lambda a, b: a == b,
+        "!=": lambda a, b: a != b,
+        "<": lambda a, b: a is not None and a < b,
+        "<=": lambda a, b: a is not None and a <= b,
+        ">": lambda a, b: a is not None and a > b,
+        ">=": lambda a, b: a is not None and a >= b,
+        "in": lambda a, b: a in b,
+        "array_contains": lambda a, b: isinstance(a, list) and b in a,
+    }
+
+    def __init__(self, backend: "LocalBackend", path: str):
+        self._backend = backend
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+        self.filters: List[Tuple[str, str, Any]] = []
+        self.orders: List[Tuple[str, str]] = []
+        self.fields: Optional[List[str]] = None
+        self.cursor: Optional[LocalSnapshot] = None
+        self.max_results: Optional[int] = None
+
+    def document(self, document_id: Optional[str] = None) -> LocalDocument:
+        return LocalDocument(self._backend, self.path, document_id or uuid.uuid4().hex[:20])
+
+    def _copy(self, **changes) -> "LocalCollection":
+        query = LocalCollection(self._backend, self.path)
+        query.__dict__.update(self.__dict__)
+        query.__dict__.update(changes)
+        return query
+
+    def where(self, field: str, op: str, value: Any) -> "LocalCollection":
+        if op not in self.OPERATORS:
+            raise ValueError(f"지원하지 않는 연산자: {op}")
+        return self._copy(filters=self.filters + [(field, op, value)])
+
+    def order_by(self, field: str, direction: str = StorageBackend.ASCENDING) -> "LocalCollection":
+        return self._copy(orders=self.orders + [(field, direction)])
+
+    def select(self, field_paths: Iterable[str]) -> "LocalCollection":
+        return self._copy(fields=list(field_paths))
+
+    def start_after(self, snapshot: LocalSnapshot) -> "LocalCollection":
+        return self._copy(cursor=snapshot)
+
+    def limit(self, count: int) -> "LocalCollection":
+        return self._copy(max_results=count)
+
+    def stream(self):
+        self._backend._delay()
+        rows, ordered = self._backend._scan(self)
+
+        # 백엔드가 먼저 걸렀더라도 모든 조건을 다시 확인 (값 타입에 따른 차이 방지)
+        rows = (
+            (document_id, data) for document_id, data in rows
+            if all(self.OPERATORS[op](_get_path(data, field), value) for field, op, value in self.filters)
+        )
+
+        if not ordered:
+            # 마지막 정렬 키부터 안정 정렬 (문서 ID가 최종 정렬 기준, 마지막 정렬 방향을 따름)
+            rows = sorted(
+                rows, key=lambda row: row[0],
+                reverse=bool(self.orders) and self.orders[-1][1] == StorageBackend.DESCENDING
+            )
+            for field, direction in reversed(self.orders):
+                rows.sort(
+                    key=lambda row: _sort_key(_get_path(row[1], field)),
+                    reverse=direction == StorageBackend.DESCENDING
+                )
+
+        count = 0
+        for document_id, data in rows:
+            if self.cursor is not None and not self._after_cursor(document_id, data):
+                continue
+            if self.max_results is not None and count >= self.max_results:
+                break
+            count += 1
+            if self.fields is not None:
+                data = _project(data, self.fields)
+            yield LocalSnapshot(self.document(document_id), data)
+
+
+    def _after_cursor(self, document_id: str, data: Dict) -> bool:
+        """
+        문서가 start_after 커서 뒤에 오는지 여부
+
+        Firestore처럼 커서 문서의 정렬 필드 값 튜플(마지막은 문서 ID)과 비교하므로,
+        커서 문서가 결과에 없거나(삭제, 조건 불일치) 값이 같은 문서가 여러 개여도 위치가 정해진다.
+        """
+        cursor_data = self.cursor.to_dict() or {}
+        last_direction = self.orders[-1][1] if self.orders else StorageBackend.ASCENDING
+        for field, direction in self.orders + [(None, last_direction)]:
+            if field is None:
+                value, cursor_value = document_id, self.cursor.id
+            else:
+                value = _sort_key(_get_path(data, field))
+                cursor_value = _sort_key(_get_path(cursor_data, field))
+            if value != cursor_value:
+                return (value > cursor_value) != (direction == StorageBackend.DESCENDING)
+        return False
+
+
+class LocalTransaction:
+    """로컬 백엔드 트랜잭션 (쓰기는 함수가 끝난 뒤 한 번에 적용)"""
+
+    def __init__(self, backend: "LocalBackend"):
+        self._backend = backend
+        self._writes: List[Tuple[str, LocalDocument, Optional[Dict], bool]] = []
+
+    def set(self, reference: LocalDocument, data: Dict, merge: bool = False) -> None:
+        self._writes.append(("set", reference, data, merge))
+
+    def update(self, reference: LocalDocument, data: Dict) -> None:
+        self._writes.append(("update", reference, data, False))
+
+    def delete(self, reference: LocalDocument) -> None:
+        self._writes.append(("delete", reference, None, False))
+
+    def _commit(self) -> None:
+        for kind, reference, data, merge in self._writes:
+            if kind == "delete":
+                self._backend._delete(reference._collection_path, reference.id)
+            else:
+                self._backend._write(
+                    reference._collection_path, reference.id, data,
+                    merge=merge, update=kind == "update"
+                )
+
+
+class LocalBackend(StorageBackend):
+    """
+    프로세스가 직접 데이터를 가진 백엔드의 공통 구현
+
+    문서 의미(merge, 점 경로 update, increment/array_union, 쿼리, 리스너)는 여기서 처리하고,
+    하위 클래스는 저장 기본 동작(_load, _store, _remove, _scan, _child_collections)과
+    원자성 구간(_atomic)만 제공한다.
+    """
+
+    def __init__(self, latency_ms: float = 0):
+        self.latency = latency_ms / 1000.0
+        self._listener_lock = threading.Lock()
+        self._listeners: Dict[str, List[Callable]] = {}
+
+    def collection(self, name: str) -> LocalCollection:
+        return LocalCollection(self, name)
+
+    def collections(self) -> List[LocalCollection]:
+        return [LocalCollection(self, path) for path in self._child_collections(None)]
+
+    def run_transaction(self, fn: Callable[[Any], Any]) -> Any:
+        with self._atomic():
+            transaction = LocalTransaction(self)
+            result = fn(transaction)
+            self._delay()
+            transaction._commit()
+            return result
+
+    def increment(self, value: int = 1) -> _Increment:
+        return _Increment(value)
+
+    def array_union(self, values: List) -> _ArrayUnion:
+        return _ArrayUnion(values)
+
+    # ----- 하위 클래스 구현 -----
+
+    @abstractmethod
+    def _atomic(self):
+        """읽기-수정-쓰기를 원자적으로 묶는 컨텍스트 (재진입 가능해야 함)"""
+
+    @abstractmethod
+    def _load(self, collection_path: str, document_id: str) -> Tuple[Optional[Dict], Optional[datetime]]:
+        """문서 (데이터, 수정 시각), 없으면 (None, None)"""
+
+    @abstractmethod
+    def _store(self, collection_path: str, document_id: str, data: Dict, update_time: datetime) -> None:
+        """문서 전체 저장"""
+
+    @abstractmethod
+    def _remove(self, collection_path: str, document_id: str) -> None:
+        """문서 삭제 (없으면 무시)"""
+
+    @abstractmethod
+    def _scan(self, query: LocalCollection) -> Tuple[Iterable[Tuple[str, Dict]], bool]:
+        """컬렉션 문서 (ID, 데이터) 목록과 query.orders대로 정렬되었는지 여부 반환"""
+
+    @abstractmethod
+    def _child_collections(self, document_path: Optional[str]) -> List[str]:
+        """문서(None이면 루트) 바로 아래 컬렉션 경로 목록"""
+
+    # ----- 공통 동작 -----
+
+    def _delay(self) -> None:
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def _write(self, collection_path: str, document_id: str, data: Dict,
+               merge: bool = False, update: bool = False) -> None:
+        with self._atomic():
+            current, _ = self._load(collection_path, document_id)
+            if update and current is None:
+                raise DocumentNotFound(f"{collection_path}/{document_id}")
+
+            base = current if current is not None and (merge or update) else {}
+            for key, value in data.items():
+                # update는 점(.)으로 구분된 중첩 필드 경로를 지원
+                path = key.split(".") if update else [key]
+                _apply_path(base, path, value, merge=merge)
+            self._store(collection_path, document_id, base, datetime.now())
+
+        self._notify(collection_path, document_id, base)
+
+    def _delete(self, collection_path: str, document_id: str) -> None:
+        with self._atomic():
+            self._remove(collection_path, document_id)
+
+        self._notify(collection_path, document_id, None)
+
+    def _add_listener(self, path: str, callback: Callable) -> None:
+        with self._listener_lock:
+            self._listeners.setdefault(path, []).append(callback)
+
+    def _remove_listener(self, path: str, callback: Callable) -> None:
+        with self._listener_lock:
+            callbacks = self._listeners.get(path, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def _notify(self, collection_path: str, document_id: str, data: Optional[Dict]) -> None:
+        with self._listener_lock:
+            listeners = list(self._listeners.get(f"{collection_path}/{document_id}", []))
+        if not listeners:
+            return
+
+        snapshot = LocalSnapshot(LocalDocument(self, collection_path, document_id), copy.deepcopy(data))
+        for callback in listeners:
+            try:
+                callback([snapshot], [], datetime.now())
+            except Exception as e:
+                logger.error(f"[STORAGE] 리스너 오류: {str(e)}")
+
+
+class MemoryBackend(LocalBackend):
+    """
+    프로세스 내 딕셔너리 저장소
+
+    GCP 자격 증명 없이 전체 파이프라인을 돌려보기 위한 백엔드.
+    latency_ms를 주면 모든 읽기/쓰기/쿼리마다 그만큼 지연해 원격 저장소를 흉내낸다.
+    """
+
+    def __init__(self, latency_ms: float = 0):
+        super().__init__(latency_ms)
+        self._lock = threading.RLock()
+        # 컬렉션 경로 → {문서 ID: (데이터, 수정 시각)}
+        self._data: Dict[str, Dict[str, Tuple[Dict, datetime]]] = {}
+
+    def _atomic(self):
+        return self._lock
+
+    def _load(self, collection_path: str, document_id: str) -> Tuple[Optional[Dict], Optional[datetime]]:
+        with self._lock:
+            entry = self._data.get(collection_path, {}).get(document_id)
+            if entry is None:
+                return None, None
+            return copy.deepcopy(entry[0]), entry[1]
+
+    def _store(self, collection_path: str, document_id: str, data: Dict, update_time: datetime) -> None:
+        with self._lock:
+            self._data.setdefault(collection_path, {})[document_id] = (copy.deepcopy(data), update_time)
+
+    def _remove(self, collection_path: str, document_id: str) -> None:
+        with self._lock:
+            self._data.get(collection_path, {}).pop(document_id, None)
+
+    def _scan(self, query: LocalCollection) -> Tuple[Iterable[Tuple[str, Dict]], bool]:
+        with self._lock:
+            rows = [
+                (document_id, copy.deepcopy(data))
+                for document_id, (data, _) in self._data.get(query.path, {}).items()
+            ]
+        return rows, False
+
+    def _child_collections(self, document_path: Optional[str]) -> List[str]:
+        depth = 0 if document_path is None else document_path.count("/") + 1
+        prefix = "" if document_path is None else f"{document_path}/"
+        with self._lock:
+            return sorted(
+                path for path, documents in self._data.items()
+                if documents and path.startswith(prefix) and path.count("/") == depth
+            )
+
+
+def dumps_document(data: Dict) -> str:
+    """문서를 JSON 문자열로 직렬화 (datetime, bytes는 태그로 보존)"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_encode_value)
+
+
+def loads_document(text: str) -> Dict:
+    """dumps_document()로 만든 JSON 문자열 복원"""
+    return json.loads(text, object_hook=_decode_value)
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__dt__": value.isoformat()}
+    if isinstance(value, bytes):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"직렬화할 수 없는 값: {type(value).__name__}")
+
+
+def _decode_value(obj: Dict) -> Any:
+    if len(obj) == 1:
+        if "__dt__" in obj:
+            return datetime.fromisoformat(obj["__dt__"])
+        if "__bytes__" in obj:
+            return base64.b64decode(obj["__bytes__"])
+    return obj
+
+
+def _get_path(data: Dict, field: str) -> Any:
+    value = data
+    for key in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _project(data: Dict, field_paths: Iterable[str]) -> Dict:
+    projected: Dict = {}
+    for field in field_paths:
+        keys = field.split(".")
+        value = data
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = projected
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = copy.deepcopy(value)
+    return projected
+
+
+def _apply_path(target: Dict, keys: List[str], value: Any, merge: bool = False) -> None:
+    for key in keys[:-1]:
+        if not isinstance(target.get(key), dict):
+            target[key] = {}
+        target = target[key]
+
+    key = keys[-1]
+    if isinstance(value, _Increment):
+        current = target.get(key)
+        target[key] = (current if isinstance(current, (int, float)) else 0) + value.value
+    elif isinstance(value, _ArrayUnion):
+        current = target.get(key)
+        current = list(current) if isinstance(current, list) else []
+        current.extend(item for item in value.values if item not in current)
+        target[key] = copy.deepcopy(current)
+    elif merge and isinstance(value, dict) and isinstance(target.get(key), dict):
+        for sub_key, sub_value in value.items():
+            _apply_path(target[key], [sub_key], sub_value, merge=True)
+    else:
+        target[key] = copy.deepcopy(value)
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    # 값이 없는 문서가 먼저 오도록 하고, 타입이 달라도 비교 가능하게 함
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, datetime):
+        return (2, value)
+    return (3, str(value))
+
+
+_backend: Optional[StorageBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_storage_backend() -> StorageBackend:
+    """Config.STORAGE_BACKEND에 따른 프로세스 전역 저장소 백엔드 반환"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if Config.STORAGE_BACKEND == "memory":
+                    logger.info(f"[STORAGE] 인메모리 백엔드 사용 (latency={Config.STORAGE_MEMORY_LATENCY_MS}ms)")
+                    _backend = MemoryBackend(latency_ms=Config.STORAGE_MEMORY_LATENCY_MS)
+                elif Config.STORAGE_BACKEND == "sqlite":
+                    from services.sqlite_backend import SqliteBackend
+                    logger.info(f"[STORAGE] SQLite 백엔드 사용 ({Config.SQLITE_PATH})")
+                    _backend = SqliteBackend(Config.SQLITE_PATH)
+                elif Config.STORAGE_BACKEND == "firestore":
+                    _backend = FirestoreBackend()
+                else:
+                    raise ValueError(f"알 수 없는 STORAGE_BACKEND: {Config.STORAGE_BACKEND}")
+    return _backend
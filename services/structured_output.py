@@ -0,0 +1,253 @@
+"""
+분류기 LLM의 구조화 출력 - 응답 스키마 지정, 스키마 검증 파싱, 파싱 실패 집계
+
+- 각 서비스는 Vertex AI response_schema로 JSON 출력을 강제하고(structured_output_params),
+  parse_structured_output()으로 스키마 검증까지 마친 dict를 받는다
+- 출력 토큰을 줄이기 위해 상태/우선순위 등은 1글자 코드, 목록에서 고르는 값은 번호(1부터)로 받는다
+- 서비스별 결과(ok / invalid_json / schema_error / llm_error)는 /admin/api/metrics에 노출
+- invoke_structured()에 ready 조건을 주면 스트리밍으로 받으면서 값이 끝난 필드를 파싱하고,
+  필요한 필드가 모이는 즉시 스트림을 닫는다 (이유/요약 같은 뒤쪽 필드는 버림).
+  필드 순서는 스키마의 property_ordering으로 고정한다
+
+스키마는 Vertex AI가 지원하는 부분만 사용한다: type, properties, required, enum, items,
+minimum, maximum, max_items, property_ordering
+"""
+import json
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from config import Config
+
+# 응답이 코드 블록으로 감싸져 온 경우 제거
+_CODE_FENCE_PATTERN = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+OUTCOMES = ("ok", "invalid_json", "schema_error", "llm_error")
+
+_decoder = json.JSONDecoder()
+_WHITESPACE_PATTERN = re.compile(r"[ \t\n\r]*")
+
+
+class StructuredOutputError(ValueError):
+    """LLM 출력이 JSON이 아니거나 스키마와 맞지 않음"""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason  # 'invalid_json' 또는 'schema_error'
+        self.text = ""  # 파싱하려던 LLM 출력
+
+
+def structured_output_params(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """LLM 클라이언트 생성/호출 인자 (JSON 출력 + 응답 스키마)"""
+    return {"response_mime_type": "application/json", "response_schema": schema}
+
+
+def validate_schema(value: Any, schema: Dict[str, Any], path: str = "$") -> None:
+    """스키마 검증 (맞지 않으면 StructuredOutputError)"""
+    expected = schema["type"]
+    if expected == "object":
+        if not isinstance(value, dict):
+            raise StructuredOutputError("schema_error", f"{path}: object가 아님")
+        for key in schema.get("required", ()):
+            if key not in value:
+                raise StructuredOutputError("schema_error", f"{path}.{key}: 필수 필드 없음")
+        for key, sub_schema in schema.get("properties", {}).items():
+            if key in value:
+                validate_schema(value[key], sub_schema, f"{path}.{key}")
+    elif expected == "array":
+        if not isinstance(value, list):
+            raise StructuredOutputError("schema_error", f"{path}: array가 아님")
+        if "max_items" in schema and len(value) > schema["max_items"]:
+            raise StructuredOutputError("schema_error", f"{path}: 항목 수 {len(value)} > {schema['max_items']}")
+        for index, item in enumerate(value):
+            validate_schema(item, schema["items"], f"{path}[{index}]")
+    elif expected == "string":
+        if not isinstance(value, str):
+            raise StructuredOutputError("schema_error", f"{path}: string이 아님")
+    elif expected == "integer":
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise StructuredOutputError("schema_error", f"{path}: integer가 아님")
+        if "minimum" in schema and value < schema["minimum"]:
+            raise StructuredOutputError("schema_error", f"{path}: {value} < {schema['minimum']}")
+        if "maximum" in schema and value > schema["maximum"]:
+            raise StructuredOutputError("schema_error", f"{path}: {value} > {schema['maximum']}")
+    elif expected == "boolean":
+        if not isinstance(value, bool):
+            raise StructuredOutputError("schema_error", f"{path}: boolean이 아님")
+    else:
+        raise ValueError(f"지원하지 않는 스키마 타입: {expected}")
+
+    if "enum" in schema and value not in schema["enum"]:
+        raise StructuredOutputError("schema_error", f"{path}: {value!r}는 {schema['enum']} 중 하나가 아님")
+
+
+def parse_structured_output(service: str, text: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    LLM 출력 JSON을 파싱하고 스키마 검증 (결과는 서비스별로 집계)
+
+    Raises:
+        StructuredOutputError: JSON이 아니거나 스키마와 맞지 않음
+    """
+    try:
+        try:
+            value = json.loads(_CODE_FENCE_PATTERN.sub("", text.strip()))
+        except json.JSONDecodeError as e:
+            raise StructuredOutputError("invalid_json", f"JSON 파싱 실패: {str(e)}")
+        validate_schema(value, schema)
+    except StructuredOutputError as e:
+        e.text = text
+        _structured_output_metrics.record(service, e.reason)
+        raise
+    _structured_output_metrics.record(service, "ok")
+    return value
+
+
+def parse_partial_object(text: str) -> Dict[str, Any]:
+    """스트리밍 중인 JSON 객체에서 값이 끝난 최상위 필드만 추출 (숫자는 뒤에 , 또는 }가 와야 끝난 것으로 봄)"""
+    fields: Dict[str, Any] = {}
+    text = _CODE_FENCE_PATTERN.sub("", text.lstrip())
+    pos = _WHITESPACE_PATTERN.match(text, 0).end()
+    if not text.startswith("{", pos):
+        return fields
+    pos += 1
+    while True:
+        pos = _WHITESPACE_PATTERN.match(text, pos).end()
+        if pos >= len(text) or text[pos] == "}":
+            return fields
+        try:
+            key, pos = _decoder.raw_decode(text, pos)
+            pos = _WHITESPACE_PATTERN.match(text, pos).end()
+            if text[pos:pos + 1] != ":":
+                return fields
+            pos = _WHITESPACE_PATTERN.match(text, pos + 1).end()
+            value, pos = _decoder.raw_decode(text, pos)
+        except ValueError:
+            return fields
+        pos = _WHITESPACE_PATTERN.match(text, pos).end()
+        if pos >= len(text) or text[pos] not in ",}":
+            return fields
+        fields[key] = value
+        if text[pos] == ",":
+            pos += 1
+
+
+def invoke_structured(service: str, llm, messages: Any, schema: Dict[str, Any],
+                      ready: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                      **kwargs: Any) -> Tuple[Dict[str, Any], str]:
+    """
+    구조화 출력 LLM 호출 후 스키마 검증한 (값, 원본 텍스트) 반환
+
+    ready가 있고 CLASSIFIER_EARLY_EXIT가 켜져 있으면 스트리밍으로 받아, 값이 끝난 필드가
+    ready(fields)를 만족하는 즉시 스트림을 닫고 그때까지의 필드만 반환한다 (뒤쪽 필드는 없음).
+    끝까지 만족하지 않으면 전체 응답을 파싱한다.
+
+    Raises:
+        StructuredOutputError: JSON이 아니거나 스키마와 맞지 않음
+        Exception: LLM 호출 오류 (llm_error로 집계됨)
+    """
+    params = {**structured_output_params(schema), **kwargs}
+    try:
+        if ready is None or not Config.CLASSIFIER_EARLY_EXIT:
+            response = llm.invoke(messages, **params)
+            text = response.content if hasattr(response, 'content') else str(response)
+        else:
+            text, fields = _stream_until_ready(llm.stream(messages, **params), schema, ready)
+            if fields is not None:
+                _structured_output_metrics.record(service, "ok")
+                _structured_output_metrics.record_early_exit(service)
+                return fields, text
+    except StructuredOutputError as e:
+        _structured_output_metrics.record(service, e.reason)
+        raise
+    except Exception:
+        _structured_output_metrics.record(service, "llm_error")
+        raise
+    return parse_structured_output(service, text, schema), text
+
+
+def _stream_until_ready(stream: Iterable, schema: Dict[str, Any],
+                        ready: Callable[[Dict[str, Any]], bool]) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """스트림을 읽다가 ready를 만족하면 닫고 (텍스트, 필드), 끝까지 읽으면 (텍스트, None)"""
+    text = ""
+    checked = 0
+    try:
+        for chunk in stream:
+            text += _chunk_text(chunk)
+            fields = parse_partial_object(text)
+            if len(fields) == checked:
+                continue
+            # 새로 끝난 필드만 검증 (잘못된 값이면 바로 실패)
+            try:
+                for key in list(fields)[checked:]:
+                    if key in schema.get("properties", {}):
+                        validate_schema(fields[key], schema["properties"][key], f"$.{key}")
+            except StructuredOutputError as e:
+                e.text = text
+                raise
+            checked = len(fields)
+            if ready(fields):
+                return text, fields
+        return text, None
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+
+
+def _chunk_text(chunk: Any) -> str:
+    content = chunk.content if hasattr(chunk, "content") else chunk
+    if isinstance(content, str):
+        return content
+    # 여러 part로 온 경우 텍스트만
+    return "".join(part if isinstance(part, str) else part.get("text", "") for part in content)
+
+
+class StructuredOutputMetrics:
+    """
+    구조화 출력 결과 집계 (프로세스 내)
+
+    서비스별로 LLM 호출 결과를 ok / invalid_json / schema_error / llm_error로 누적한다.
+    early_exit는 ok 중 필요한 필드만 받고 스트림을 닫은 횟수.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_service: Dict[str, Dict[str, int]] = {}
+
+    def record(self, service: str, outcome: str) -> None:
+        with self._lock:
+            stats = self._by_service.setdefault(service, dict.fromkeys(OUTCOMES + ("early_exit",), 0))
+            stats[outcome] += 1
+
+    def record_early_exit(self, service: str) -> None:
+        self.record(service, "early_exit")
+
+    def snapshot(self) -> Dict:
+        """현재까지의 집계 (parse_failure_rate는 LLM 응답을 받은 호출 중 파싱 실패 비율)"""
+        with self._lock:
+            result = {}
+            for service, stats in sorted(self._by_service.items()):
+                parsed = stats["ok"] + stats["invalid_json"] + stats["schema_error"]
+                failures = stats["invalid_json"] + stats["schema_error"]
+                result[service] = {
+                    **stats,
+                    "parse_failure_rate": round(failures / parsed, 4) if parsed else 0
+                }
+            return result
+
+
+_structured_output_metrics = StructuredOutputMetrics()
+
+
+def get_structured_output_metrics() -> StructuredOutputMetrics:
+    """프로세스 전역 구조화 출력 집계 반환"""
+    return _structured_output_metrics
+
+
+def choice_schema(count: int) -> Dict[str, Any]:
+    """목록 번호(1..count) 스키마"""
+    return {"type": "integer", "minimum": 1, "maximum": max(count, 1)}
+
+
+def decode_choice(value: int, options: list) -> Optional[Any]:
+    """목록 번호를 항목으로 변환 (범위 밖이면 None)"""
+    return options[value - 1] if 1 <= value <= len(options) else None
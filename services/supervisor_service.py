@@ -1,9 +1,25 @@
 """Supervisor LLM 서비스 - 상담 품질 모니터링 및 피드백"""
 import os
+import logging
 from typing import List, Dict, Optional
-from langchain_google_vertexai import ChatVertexAI
+from services.llm_client import LazyChatModel
+from services.structured_output import StructuredOutputError, invoke_structured, structured_output_params
 from config import Config
 
+logger = logging.getLogger(__name__)
+
+# 응답 스키마
+SUPERVISION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "integer", "minimum": 1, "maximum": 10},
+        "strengths": {"type": "string"},
+        "improvements": {"type": "string"},
+        "feedback": {"type": "string"}
+    },
+    "required": ["score", "strengths", "improvements", "feedback"]
+}
+
 
 class SupervisorService:
     """Supervisor LLM - 메인 상담사의 응답 품질 평가 및 피드백"""
@@ -13,13 +29,14 @@ class SupervisorService:
         if Config.GOOGLE_APPLICATION_CREDENTIALS and os.path.exists(Config.GOOGLE_APPLICATION_CREDENTIALS):
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = Config.GOOGLE_APPLICATION_CREDENTIALS
         
-        self.llm = ChatVertexAI(
+        self.llm = LazyChatModel(
             model_name=Config.VERTEX_AI_MODEL,
             project=Config.PROJECT_ID,
             location=Config.LOCATION,
             temperature=0.3,  # 평가는 더 엄격하고 객관적으로
             max_output_tokens=400,  # 충분한 피드백을 위해
-            model_kwargs={"thinking_budget": 0}  # Think budget을 0으로 설정하여 빠른 응답
+            model_kwargs={"thinking_budget": 0},  # Think budget을 0으로 설정하여 빠른 응답
+            **structured_output_params(SUPERVISION_SCHEMA)
         )
     
     def get_system_prompt(self) -> str:
@@ -94,54 +111,34 @@ class SupervisorService:
 
 위 상담사의 응답을 시스템 프롬프트의 평가 기준에 따라 엄격하게 평가하세요.
 
-다음 형식으로 응답하세요:
-SCORE: [1-10점]
-STRENGTHS: [잘한 점들 - 없으면 "없음"이라고 명시]
-IMPROVEMENTS: [개선할 점들 - 반드시 구체적으로 제시, 없으면 "없음"이라고 명시]
-FEEDBACK: [구체적인 피드백 - 문제점이 있으면 반드시 지적하고, 어떻게 개선할지 제시]"""
+다음 JSON으로 응답하세요:
+- score: 1-10점
+- strengths: 잘한 점들 - 없으면 "없음"이라고 명시
+- improvements: 개선할 점들 - 반드시 구체적으로 제시, 없으면 "없음"이라고 명시
+- feedback: 구체적인 피드백 - 문제점이 있으면 반드시 지적하고, 어떻게 개선할지 제시"""
 
             messages = [
                 ('system', self.get_system_prompt()),
                 ('user', prompt)
             ]
             
-            response = self.llm.invoke(messages)
-            response_text = response.content if hasattr(response, 'content') else str(response)
-            
-            # 응답 파싱
-            score = 6  # 기본값을 6으로 낮춤 (더 엄격한 평가)
-            strengths = ""
-            improvements = ""
-            feedback = ""
+            # 응답 파싱 (실패 시 개선 필요로 판단하지 않음)
+            try:
+                result, response_text = invoke_structured("supervisor", self.llm, messages, SUPERVISION_SCHEMA)
+            except StructuredOutputError as e:
+                logger.warning(f"[SUPERVISOR] 출력 파싱 실패 ({e.reason}): {str(e)}")
+                return {
+                    "score": 7,
+                    "strengths": "",
+                    "improvements": "",
+                    "feedback": f"평가 결과 파싱 실패: {str(e)}",
+                    "needs_improvement": False
+                }
             
-            current_section = None
-            for line in response_text.split('\n'):
-                line = line.strip()
-                if 'SCORE:' in line.upper():
-                    try:
-                        score_text = line.split('SCORE:')[1] if 'SCORE:' in line else line.split('score:')[1]
-                        score = int(score_text.strip().split()[0])
-                    except:
-                        pass
-                elif 'STRENGTHS:' in line.upper():
-                    current_section = 'strengths'
-                    strengths = line.split('STRENGTHS:')[1] if 'STRENGTHS:' in line else line.split('strengths:')[1]
-                    strengths = strengths.strip()
-                elif 'IMPROVEMENTS:' in line.upper():
-                    current_section = 'improvements'
-                    improvements = line.split('IMPROVEMENTS:')[1] if 'IMPROVEMENTS:' in line else line.split('improvements:')[1]
-                    improvements = improvements.strip()
-                elif 'FEEDBACK:' in line.upper():
-                    current_section = 'feedback'
-                    feedback = line.split('FEEDBACK:')[1] if 'FEEDBACK:' in line else line.split('feedback:')[1]
-                    feedback = feedback.strip()
-                elif current_section and line:
-                    if current_section == 'strengths':
-                        strengths += " " + line
-                    elif current_section == 'improvements':
-                        improvements += " " + line
-                    elif current_section == 'feedback':
-                        feedback += " " + line
+            score = result["score"]
+            strengths = result["strengths"]
+            improvements = result["improvements"]
+            feedback = result["feedback"]
             
             # 피드백이 비어있으면 improvements와 strengths를 조합
             if not feedback.strip():
@@ -161,7 +158,7 @@ FEEDBACK: [구체적인 피드백 - 문제점이 있으면 반드시 지적하
             }
             
         except Exception as e:
-            print(f"Supervision 평가 오류: {str(e)}")
+            logger.error(f"[SUPERVISOR] 오류: {str(e)}")
             return {
                 "score": 7,
                 "strengths": "",
@@ -1,9 +1,26 @@
 """Task Completion Checker Service - Task 완료 여부 판단"""
 import os
+import logging
 from typing import Dict, List, Optional
-from langchain_google_vertexai import ChatVertexAI
+from services.llm_client import LazyChatModel
+from services.structured_output import StructuredOutputError, invoke_structured, structured_output_params
 from config import Config
 
+logger = logging.getLogger(__name__)
+
+# 응답 스키마 (status는 1글자 코드, 미완료(N)면 reason은 기다리지 않음)
+COMPLETION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "status": {"type": "string", "enum": ["S", "C", "N"]},
+        "reason": {"type": "string"}
+    },
+    "required": ["status", "reason"],
+    "property_ordering": ["status", "reason"]
+}
+
+STATUS_CODES = {"S": "sufficient", "C": "completed", "N": None}
+
 
 class TaskCompletionCheckerService:
     """Task Completion Checker - Task 완료 여부 판단 및 상태 업데이트"""
@@ -12,13 +29,14 @@ class TaskCompletionCheckerService:
         if Config.GOOGLE_APPLICATION_CREDENTIALS and os.path.exists(Config.GOOGLE_APPLICATION_CREDENTIALS):
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = Config.GOOGLE_APPLICATION_CREDENTIALS
         
-        self.llm = ChatVertexAI(
+        self.llm = LazyChatModel(
             model_name=Config.VERTEX_AI_MODEL,
             project=Config.PROJECT_ID,
             location=Config.LOCATION,
             temperature=0.5,
             max_output_tokens=200,
-            model_kwargs={"thinking_budget": 0}
+            model_kwargs={"thinking_budget": 0},
+            **structured_output_params(COMPLETION_SCHEMA)
         )
     
     def get_system_prompt(self) -> str:
@@ -59,13 +77,10 @@ class TaskCompletionCheckerService:
 - Task의 핵심 목표가 아직 달성되지 않았거나
 - 사용자가 Task와 관련된 정보를 공유하기 시작했지만 아직 충분하지 않은 경우
 
-**응답 형식:**
-NEW_STATUS: [sufficient|completed|None]
-COMPLETION_REASON: [완료 이유 또는 None]
-
-**참고:**
-- `NEW_STATUS: sufficient` 또는 `NEW_STATUS: completed` → 완료로 간주
-- `NEW_STATUS: None` → 미완료"""
+**응답 형식 (JSON):**
+{"status": "S|C|N", "reason": "판단 이유 (한 문장)"}
+- `S`: sufficient, `C`: completed → 완료로 간주
+- `N`: 아직 완료되지 않음 (None)"""
     
     def check_completion(self, current_task: Dict, conversation_history: List[Dict]) -> Dict:
         """
@@ -113,11 +128,7 @@ Task ID: {current_task.get('id')}
 최근 대화:
 {conversation_context}
 
-위 정보를 바탕으로 시스템 프롬프트의 판단 기준에 따라 Task가 완료되었는지 판단하세요.
-
-다음 형식으로 응답하세요:
-NEW_STATUS: [sufficient|completed|None]
-COMPLETION_REASON: [완료 이유 또는 None]"""
+위 정보를 바탕으로 시스템 프롬프트의 판단 기준에 따라 Task가 완료되었는지 판단하고 JSON으로 응답하세요."""
         
         messages = [
             ('system', self.get_system_prompt()),
@@ -125,38 +136,32 @@ COMPLETION_REASON: [완료 이유 또는 None]"""
         ]
         
         try:
-            response = self.llm.invoke(messages)
-            response_text = response.content if hasattr(response, 'content') else str(response)
-            
-            # 응답 파싱
-            new_status = None
-            completion_reason = None
-            
-            for line in response_text.split('\n'):
-                if 'NEW_STATUS:' in line.upper():
-                    value = line.split(':', 1)[1].strip().lower()
-                    if value in ['sufficient', 'completed']:
-                        new_status = value
-                    elif value == 'none':
-                        new_status = None
-                elif 'COMPLETION_REASON:' in line.upper():
-                    completion_reason = line.split(':', 1)[1].strip()
-                    if completion_reason.lower() == 'none':
-                        completion_reason = None
-            
+            result, response_text = invoke_structured(
+                "task_completion_checker", self.llm, messages, COMPLETION_SCHEMA,
+                ready=lambda fields: fields.get("status") == "N"
+            )
+        except StructuredOutputError as e:
+            # 파싱 실패 시 미완료로 처리
+            logger.warning(f"[TASK_COMPLETION_CHECKER] 출력 파싱 실패 ({e.reason}): {str(e)}")
             return {
-                "new_status": new_status,
-                "completion_reason": completion_reason,
+                "new_status": None,
+                "completion_reason": None,
                 "task_id": current_task.get('id'),
-                "raw_output": response_text  # 디버깅용 원본 출력
+                "raw_output": e.text
             }
-        
         except Exception as e:
-            print(f"Task Completion Checker 오류: {str(e)}")
+            logger.error(f"[TASK_COMPLETION_CHECKER] 오류: {str(e)}")
             return {
                 "new_status": None,
                 "completion_reason": None,
                 "task_id": current_task.get('id'),
                 "raw_output": f"오류: {str(e)}"
             }
-
+        
+        new_status = STATUS_CODES[result["status"]]
+        return {
+            "new_status": new_status,
+            "completion_reason": result.get("reason", "").strip() or None,
+            "task_id": current_task.get('id'),
+            "raw_output": response_text  # 디버깅용 원본 출력
+        }
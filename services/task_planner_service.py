@@ -3,14 +3,83 @@ import os
 import json
 import logging
 from typing import List, Dict, Optional, Tuple
-from langchain_google_vertexai import ChatVertexAI
+from services.llm_client import LazyChatModel
 from config import Config
 from services.module_service import ModuleService
 from services.session_service import SessionService
 from services.persona_service import PersonaService
+from services.task_templates import INITIAL_TASK_TEMPLATES, PART3_TASK_TEMPLATES, instantiate_tasks
+from services.log_setup import log_payload
+from services.structured_output import StructuredOutputError, invoke_structured
 
 logger = logging.getLogger(__name__)
 
+# 우선순위 1글자 코드
+PRIORITY_CODES = {"H": "high", "M": "medium", "L": "low"}
+
+# 최대 Part 2 Task 수
+MAX_PART2_TASKS = 7
+
+# LLM이 만드는 Task 하나 (id/part/status는 코드에서 채움)
+PLAN_TASK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "priority": {"type": "string", "enum": list(PRIORITY_CODES)},
+        "title": {"type": "string"},
+        "target": {"type": "string"},
+        "description": {"type": "string"},
+        "criteria": {"type": "string"}
+    },
+    "required": ["priority", "title", "target", "description", "criteria"]
+}
+
+# Part 2 Task 업데이트 응답 (id는 유지할 기존 Task ID, 새 Task면 빈 문자열)
+PART2_UPDATE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "tasks": {
+            "type": "array",
+            "max_items": MAX_PART2_TASKS,
+            "items": {
+                **PLAN_TASK_SCHEMA,
+                "properties": {"id": {"type": "string"}, **PLAN_TASK_SCHEMA["properties"]},
+                "required": ["id", *PLAN_TASK_SCHEMA["required"]]
+            }
+        }
+    },
+    "required": ["tasks"]
+}
+
+
+def part2_plan_schema(keywords: List[str]) -> Dict:
+    """Part 2 목표/Task Plan 응답 스키마 (키워드는 페르소나 키워드 중에서만 선택)"""
+    keyword_schema = {"type": "string"}
+    if keywords:
+        keyword_schema["enum"] = list(dict.fromkeys(keywords))
+    return {
+        "type": "object",
+        "properties": {
+            "keywords": {"type": "array", "max_items": 1, "items": keyword_schema},
+            "goal": {"type": "string"},
+            "tasks": {"type": "array", "max_items": MAX_PART2_TASKS, "items": PLAN_TASK_SCHEMA}
+        },
+        "required": ["keywords", "goal", "tasks"]
+    }
+
+
+def decode_plan_task(item: Dict, task_id: str) -> Dict:
+    """LLM 출력 Task를 Part 2 Task로 변환"""
+    return {
+        "id": task_id,
+        "part": 2,
+        "priority": PRIORITY_CODES[item["priority"]],
+        "title": item["title"],
+        "target": item["target"],
+        "description": item["description"],
+        "completion_criteria": item["criteria"],
+        "status": "pending"
+    }
+
 
 class TaskPlannerService:
     """Task Planner LLM - 사용자 상태 분석 및 task 생성"""
@@ -20,7 +89,7 @@ class TaskPlannerService:
         if Config.GOOGLE_APPLICATION_CREDENTIALS and os.path.exists(Config.GOOGLE_APPLICATION_CREDENTIALS):
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = Config.GOOGLE_APPLICATION_CREDENTIALS
             
-        self.llm = ChatVertexAI(
+        self.llm = LazyChatModel(
             model_name=Config.VERTEX_AI_MODEL,
             project=Config.PROJECT_ID,
             location=Config.LOCATION,
@@ -60,30 +129,9 @@ Task 생성 시 고려사항:
         Returns:
             Task 목록 (구체적이고 완료 가능한 목표)
         """
-        if session_type == "first_session":
-            # 첫 회기 상담 기본 task 템플릿 (구체적 목표)
-            return [
-                {
-                    "id": "task_rapport_1",
-                    "part": 1,
-                    "priority": "high",
-                    "title": "환영 및 인사",
-                    "target": "사용자가 편안하게 느끼고 대화를 시작할 수 있는 분위기 조성",
-                    "description": "상담사는 사용자를 따뜻하게 환영하고, 가볍게 오늘 안부를 묻는다.",
-                    "completion_criteria": "사용자가 환영 인사에 응답하고 대화를 시작했을 때 완료",
-                    "status": "pending"
-                },
-                {
-                    "id": "task_rapport_2",
-                    "part": 1,
-                    "priority": "medium",
-                    "title": "관계 형성하기",
-                    "target": "사용자가 편안하게 느끼고 신뢰할 수 있는 관계 형성",
-                    "description": "상담사는 사용자가 어떤 대화를 원하는지 또는 어떤 고민을 가지고 있는지 파악한다.",
-                    "completion_criteria": "사용자가 3턴 이상 편안하게 대화를 이어가거나, 핵심 고민을 얘기함",
-                    "status": "pending"
-                }
-            ]
+        if session_type in INITIAL_TASK_TEMPLATES:
+            # 첫 회기 상담 기본 task 템플릿 (내용은 task_templates에 한 번만 정의, 세션에는 template_id로 저장)
+            return instantiate_tasks(INITIAL_TASK_TEMPLATES[session_type])
         else:
             return []
     
@@ -102,7 +150,7 @@ Task 생성 시 고려사항:
             - tasks: Part 2 Task 목록
         """
         # 1. 세션에서 페르소나 정보 조회
-        session = self.session_service.get_session(conversation_id)
+        session = self.session_service.get_session(conversation_id, decode_logs=False)
         if not session:
             logger.error(f"[PART2_GOAL] 세션을 찾을 수 없음: {conversation_id}")
             return "", [], []
@@ -169,93 +217,43 @@ Task 생성 시 고려사항:
 참고: 상담 레벨별 가이드:
 {level_guide_text}
 
-JSON 형식으로 반환하세요:
-{{
-  "selected_keywords": ["키워드"],
-  "part2_goal": "Part 2 목표 (구체적이고 측정 가능)",
-  "tasks": [
-    {{
-      "id": "task_part2_1",
-      "part": 2,
-      "priority": "high|medium|low",
-      "title": "Task 제목",
-      "target": "Task 목표",
-      "description": "Task 설명 (3문장 이하)",
-      "completion_criteria": "Task 완료 판단 기준",
-      "status": "pending"
-    }}
-  ]
-}}
-
-최대 7개의 Task를 생성하세요. JSON만 반환하고 다른 설명은 하지 마세요."""
+JSON으로 반환하세요:
+- keywords: 선택한 키워드 1개의 배열
+- goal: Part 2 목표 (구체적이고 측정 가능)
+- tasks: Task 목록 (최대 {MAX_PART2_TASKS}개, 진행 순서대로). 각 Task는
+  - priority: 우선순위 코드 (H: high, M: medium, L: low)
+  - title: Task 제목
+  - target: Task 목표
+  - description: Task 설명 (3문장 이하)
+  - criteria: Task 완료 판단 기준"""
         
         messages = [
             ('system', self.get_first_session_prompt()),
             ('user', prompt)
         ]
         
+        schema = part2_plan_schema(all_keywords)
         try:
-            response = self.llm.invoke(messages)
-            response_text = response.content if hasattr(response, 'content') else str(response)
-            
-            logger.info(f"[PART2_GOAL] LLM 응답 (처음 1000자): {response_text[:1000]}")
-            
-            # JSON 파싱
-            import re
-            
-            # JSON 객체 찾기
-            json_match = re.search(r'\{[\s\S]*\}', response_text, re.DOTALL)
-            
-            # 코드 블록 안의 JSON 찾기
-            if not json_match:
-                code_block_match = re.search(r'```(?:json)?\s*(\{[\s\S]*?\})', response_text, re.DOTALL)
-                if code_block_match:
-                    json_match = code_block_match
-            
-            if json_match:
-                try:
-                    json_text = json_match.group() if hasattr(json_match, 'group') else json_match
-                    # 코드 블록 마커 제거
-                    json_text = re.sub(r'```(?:json)?\s*', '', json_text)
-                    json_text = re.sub(r'```\s*', '', json_text)
-                    json_text = json_text.strip()
-                    
-                    result = json.loads(json_text)
-                    
-                    selected_keywords = result.get('selected_keywords', [])
-                    part2_goal = result.get('part2_goal', '')
-                    tasks = result.get('tasks', [])
-                    
-                    # tasks 검증 및 보완
-                    if not isinstance(tasks, list):
-                        logger.error(f"[PART2_GOAL] tasks가 리스트가 아님: {type(tasks)}")
-                        tasks = []
-                    
-                    for task in tasks:
-                        if 'part' not in task:
-                            task['part'] = 2
-                        if 'status' not in task:
-                            task['status'] = 'pending'
-                    
-                    logger.info(f"[PART2_GOAL] 파싱 성공: 목표={part2_goal[:100]}, 키워드={selected_keywords}, Task={len(tasks)}개")
-                    
-                    return part2_goal, selected_keywords, tasks
-                    
-                except json.JSONDecodeError as e:
-                    logger.error(f"[PART2_GOAL] JSON 파싱 실패: {str(e)}")
-                    json_text = json_match.group() if hasattr(json_match, 'group') else str(json_match)
-                    logger.error(f"[PART2_GOAL] JSON 텍스트: {json_text[:500]}")
-                    return "", [], []
-            else:
-                logger.error(f"[PART2_GOAL] JSON 객체를 찾을 수 없음")
-                logger.error(f"[PART2_GOAL] 전체 응답 텍스트: {response_text}")
-                return "", [], []
-        
+            result, response_text = invoke_structured("task_planner.part2_plan", self.llm, messages, schema)
+        except StructuredOutputError as e:
+            logger.error(f"[PART2_GOAL] 출력 파싱 실패 ({e.reason}): {str(e)}")
+            logger.error(f"[PART2_GOAL] 응답 텍스트: {e.text[:500]}")
+            return "", [], []
         except Exception as e:
             import traceback
             logger.error(f"[PART2_GOAL] 목표 수립 오류: {str(e)}")
             logger.error(f"[PART2_GOAL] Traceback: {traceback.format_exc()}")
             return "", [], []
+        
+        log_payload(logger, "[PART2_GOAL] LLM 응답 (처음 1000자):", response_text[:1000], conversation_id=conversation_id)
+        
+        selected_keywords = result["keywords"]
+        part2_goal = result["goal"].strip()
+        tasks = [decode_plan_task(item, f"task_part2_{index}") for index, item in enumerate(result["tasks"], 1)]
+        
+        logger.info(f"[PART2_GOAL] 파싱 성공: 목표={part2_goal[:100]}, 키워드={selected_keywords}, Task={len(tasks)}개")
+        
+        return part2_goal, selected_keywords, tasks
     
     def update_part2_tasks(self, conversation_history: List[Dict], current_tasks: List[Dict],
                           user_state: Dict, should_update: bool, part2_goal: Optional[str] = None,
@@ -331,12 +329,16 @@ Part 2 목표: {part2_goal}
 
 **중요:**
 - Part 2 목표가 있으면, 업데이트된 Task들이 해당 목표 달성에 기여하도록 하세요.
-- 기존 Task의 상태(status)를 보존하세요.
-  - 기존 Task ID를 유지하는 경우, 해당 Task의 status(sufficient, completed 등)를 그대로 유지하세요.
-  - 새로운 Task만 status: "pending"으로 설정하세요.
-  - 기존 Task의 status가 "sufficient" 또는 "completed"인 경우, 이를 반드시 보존하세요.
+- 기존 Task를 유지하거나 수정하는 경우 해당 Task의 ID를 그대로 사용하세요.
+
+업데이트된 Part 2 Task 목록을 JSON으로 반환하세요 (최대 {MAX_PART2_TASKS}개):
+- tasks: Task 목록. 각 Task는
+  - id: 유지하는 기존 Task의 ID (새 Task면 빈 문자열)
+  - priority: 우선순위 코드 (H: high, M: medium, L: low)
+  - title, target, description: Task 제목, 목표, 설명
+  - criteria: Task 완료 판단 기준
 
-JSON 형식으로 업데이트된 Part 2 Task 목록을 반환하세요. 최대 7개를 유지하세요."""
+상태(status)는 시스템이 기존 Task ID 기준으로 보존하므로 출력하지 마세요."""
         
         messages = [
             ('system', self.get_first_session_prompt()),
@@ -344,44 +346,35 @@ JSON 형식으로 업데이트된 Part 2 Task 목록을 반환하세요. 최대
         ]
         
         try:
-            import re
-            
-            response = self.llm.invoke(messages)
-            response_text = response.content if hasattr(response, 'content') else str(response)
-            
-            json_match = re.search(r'\[.*\]', response_text, re.DOTALL)
-            if json_match:
-                updated_part2_tasks = json.loads(json_match.group())
-                
-                # 기존 Task 상태 보존 로직
-                # 기존 Part 2 Task를 ID로 매핑
-                existing_task_map = {task.get('id'): task for task in part2_tasks}
-                
-                # 업데이트된 Task에 기존 상태 보존
-                for updated_task in updated_part2_tasks:
-                    task_id = updated_task.get('id')
-                    if task_id in existing_task_map:
-                        # 기존 Task가 있으면 상태 보존
-                        existing_status = existing_task_map[task_id].get('status')
-                        if existing_status in ['sufficient', 'completed']:
-                            updated_task['status'] = existing_status
-                            logger.info(f"[PART2_UPDATE] Task 상태 보존: task_id={task_id}, status={existing_status}")
-                        elif existing_status == 'in_progress' and updated_task.get('status') == 'pending':
-                            # in_progress 상태도 보존 (LLM이 pending으로 바꾸지 않도록)
-                            updated_task['status'] = existing_status
-                    else:
-                        # 새로운 Task는 part와 status 확인
-                        if 'part' not in updated_task:
-                            updated_task['part'] = 2
-                        if 'status' not in updated_task:
-                            updated_task['status'] = 'pending'
-                
-                return other_tasks + updated_part2_tasks
+            result, _ = invoke_structured("task_planner.part2_update", self.llm, messages, PART2_UPDATE_SCHEMA)
+        except StructuredOutputError as e:
+            logger.warning(f"[PART2_UPDATE] 출력 파싱 실패 ({e.reason}): {str(e)}")
             return current_tasks
-        
         except Exception as e:
-            print(f"Part 2 Task 업데이트 오류: {str(e)}")
+            logger.error(f"[PART2_UPDATE] Task 업데이트 오류: {str(e)}")
             return current_tasks
+        
+        # 기존 Task는 ID로 찾아 상태 보존, 새 Task는 사용하지 않은 ID로 pending 생성
+        existing_task_map = {task.get('id'): task for task in part2_tasks}
+        used_ids = {task.get('id') for task in current_tasks}
+        next_number = len(used_ids) + 1
+        updated_part2_tasks = []
+        for item in result["tasks"]:
+            task_id = item["id"].strip()
+            existing = existing_task_map.pop(task_id, None)
+            if existing is None:
+                while f"task_part2_{next_number}" in used_ids:
+                    next_number += 1
+                task_id = f"task_part2_{next_number}"
+                used_ids.add(task_id)
+            updated_task = decode_plan_task(item, task_id)
+            if existing is not None:
+                updated_task['status'] = existing.get('status', 'pending')
+                if updated_task['status'] in ['sufficient', 'completed']:
+                    logger.info(f"[PART2_UPDATE] Task 상태 보존: task_id={task_id}, status={updated_task['status']}")
+            updated_part2_tasks.append(updated_task)
+        
+        return other_tasks + updated_part2_tasks
     
     def create_part3_tasks(self) -> List[Dict]:
         """
@@ -390,36 +383,5 @@ JSON 형식으로 업데이트된 Part 2 Task 목록을 반환하세요. 최대
         Returns:
             Part 3 Task 목록
         """
-        return [
-            {
-                "id": "task_summary_1",
-                "part": 3,
-                "priority": "high",
-                "title": "상담 내용 요약하기",
-                "description": "오늘 상담에서 다룬 내용을 요약하고 정리",
-                "target": "상담사가 오늘 상담 내용을 이해하고 정리",
-                "completion_criteria": "사용자가 상담사의 말을 이해했을 때 완료",
-                "status": "pending"
-            },
-            {
-                "id": "task_goal_1",
-                "part": 3,
-                "priority": "high",
-                "title": "상담 목표 설정하기",
-                "description": "앞으로의 상담 목표를 설정",
-                "target": "구체적이고 달성 가능한 상담 목표 설정",
-                "completion_criteria": "상담 목표를 설정하고 사용자가 동의했을 때 완료",
-                "status": "pending"
-            },
-            {
-                "id": "task_next_1",
-                "part": 3,
-                "priority": "medium",
-                "title": "다음 상담 안내하기",
-                "description": "다음 상담 일정과 준비사항 안내",
-                "target": "다음 상담 계획을 수립하고 안내",
-                "completion_criteria": "다음 상담 안내를 완료했을 때 완료",
-                "status": "pending"
-            }
-        ]
+        return instantiate_tasks(PART3_TASK_TEMPLATES)
     
\ No newline at end of file
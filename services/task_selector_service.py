@@ -1,10 +1,28 @@
 """Task Selector LLM 서비스 - 다음 실행할 task 선택"""
 import os
+import logging
 from typing import List, Dict, Optional
-from langchain_google_vertexai import ChatVertexAI
+from services.llm_client import LazyChatModel
+from services.structured_output import (
+    StructuredOutputError, choice_schema, decode_choice, invoke_structured
+)
 from config import Config
 from services.module_service import ModuleService
 
+logger = logging.getLogger(__name__)
+
+
+def selection_schema(task_count: int) -> Dict:
+    """응답 스키마 (task는 목록 번호)"""
+    return {
+        "type": "object",
+        "properties": {
+            "task": choice_schema(task_count),
+            "guide": {"type": "string"}
+        },
+        "required": ["task", "guide"]
+    }
+
 
 class TaskSelectorService:
     """Task Selector LLM - 현재 컨텍스트에서 다음 task 선택"""
@@ -14,7 +32,7 @@ class TaskSelectorService:
         if Config.GOOGLE_APPLICATION_CREDENTIALS and os.path.exists(Config.GOOGLE_APPLICATION_CREDENTIALS):
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = Config.GOOGLE_APPLICATION_CREDENTIALS
             
-        self.llm = ChatVertexAI(
+        self.llm = LazyChatModel(
             model_name=Config.VERTEX_AI_MODEL,
             project=Config.PROJECT_ID,
             location=Config.LOCATION,
@@ -47,10 +65,8 @@ class TaskSelectorService:
 1. 선택한 task를 바탕으로 구체적인 실행 가이드를 제공하세요. (Module은 나중에 선택됩니다)
 2. **주의**: 앞의 대화에서 이미 다룬 내용을 가이드로 제공하는 것을 최대한 피해야 합니다.
 
-**응답 형식:**
-다음 형식으로 응답하세요:
-SELECTED_TASK_ID: [task_id]
-EXECUTION_GUIDE: [구체적인 실행 가이드 - 어떤 말투로, 어떤 질문을, 어떤 순서로 진행할지]"""
+**응답 형식 (JSON):**
+{"task": 선택한 task 번호, "guide": "구체적인 실행 가이드 - 어떤 말투로, 어떤 질문을, 어떤 순서로 진행할지"}"""
     
     def select_next_task(self, conversation_history: List[Dict], 
                         available_tasks: List[Dict], current_part: int, 
@@ -87,10 +103,10 @@ EXECUTION_GUIDE: [구체적인 실행 가이드 - 어떤 말투로, 어떤 질
                 for msg in recent_messages
             ])
             
-            # 사용 가능한 task 목록 (상태 정보 포함)
+            # 사용 가능한 task 목록 (상태 정보 포함, 번호로 선택)
             tasks_info = "\n".join([
-                f"- [{t.get('priority', 'medium')}] [{t.get('status', 'pending')}] {t.get('id')}: {t.get('title')} - {t.get('description')}"
-                for t in selectable_tasks
+                f"{index}. [{t.get('priority', 'medium')}] [{t.get('status', 'pending')}] {t.get('id')}: {t.get('title')} - {t.get('description')}"
+                for index, t in enumerate(selectable_tasks, 1)
             ])
             
             # 현재 진행 중인 Task 정보 추가 (참고용)
@@ -108,7 +124,7 @@ EXECUTION_GUIDE: [구체적인 실행 가이드 - 어떤 말투로, 어떤 질
 현재 Part {current_part}의 사용 가능한 task 목록:
 {tasks_info}
 
-위 task 중에서 시스템 프롬프트의 선택 기준에 따라 현재 상황에 가장 적합한 task를 선택하고, 선택한 task에 맞춰 현재 대화 맥락을 반영한 구체적인 실행 가이드를 생성하세요.
+위 task 중에서 시스템 프롬프트의 선택 기준에 따라 현재 상황에 가장 적합한 task를 번호로 선택하고, 선택한 task에 맞춰 현재 대화 맥락을 반영한 구체적인 실행 가이드를 생성하세요.
 **중요:** 매턴마다 대화 맥락과 사용자 상태를 새롭게 평가하여 가장 적합한 Task를 선택하세요. 현재 진행 중인 Task가 완료되지 않았어도, 상황에 따라 다른 Task로 전환할 수 있습니다."""
 
             messages = [
@@ -116,21 +132,18 @@ EXECUTION_GUIDE: [구체적인 실행 가이드 - 어떤 말투로, 어떤 질
                 ('user', prompt)
             ]
             
-            response = self.llm.invoke(messages)
-            response_text = response.content if hasattr(response, 'content') else str(response)
-            
-            # 응답 파싱
-            selected_task_id = None
+            # 응답 파싱 (실패 시 아래 상태/우선순위 기반 선택, LLM 호출 오류는 아래 except에서 처리)
+            selected_task = None
             execution_guide = ""
-            
-            for line in response_text.split('\n'):
-                if 'SELECTED_TASK_ID:' in line:
-                    selected_task_id = line.split('SELECTED_TASK_ID:')[1].strip()
-                elif 'EXECUTION_GUIDE:' in line:
-                    execution_guide = line.split('EXECUTION_GUIDE:')[1].strip()
-            
-            # Task 찾기
-            selected_task = next((t for t in selectable_tasks if t.get('id') == selected_task_id), None)
+            try:
+                result, response_text = invoke_structured(
+                    "task_selector", self.llm, messages, selection_schema(len(selectable_tasks))
+                )
+                selected_task = decode_choice(result["task"], selectable_tasks)
+                execution_guide = result["guide"].strip()
+            except StructuredOutputError as e:
+                logger.warning(f"[TASK_SELECTOR] 출력 파싱 실패 ({e.reason}): {str(e)}")
+                response_text = e.text
             
             if selected_task:
                 return {
@@ -170,7 +183,7 @@ EXECUTION_GUIDE: [구체적인 실행 가이드 - 어떤 말투로, 어떤 질
             }
             
         except Exception as e:
-            print(f"Task 선택 오류: {str(e)}")
+            logger.error(f"[TASK_SELECTOR] 오류: {str(e)}")
             # 오류 시 상태 우선순위로 선택 (pending > in_progress > sufficient)
             pending_tasks = [t for t in selectable_tasks if t.get('status') == 'pending']
             if pending_tasks:
@@ -0,0 +1,108 @@
+"""고정 Task 템플릿 - Part 1/Part 3 Task 내용을 한 곳에 두고 세션에는 template_id만 저장"""
+import copy
+import logging
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# 템플릿 ID는 "<task id>@v<버전>" 형식
+# 내용을 바꿀 때는 기존 항목을 수정하지 말고 새 버전을 추가 (기존 세션이 계속 이전 버전으로 복원되도록)
+TASK_TEMPLATES: Dict[str, Dict] = {
+    "task_rapport_1@v1": {
+        "id": "task_rapport_1",
+        "part": 1,
+        "priority": "high",
+        "title": "환영 및 인사",
+        "target": "사용자가 편안하게 느끼고 대화를 시작할 수 있는 분위기 조성",
+        "description": "상담사는 사용자를 따뜻하게 환영하고, 가볍게 오늘 안부를 묻는다.",
+        "completion_criteria": "사용자가 환영 인사에 응답하고 대화를 시작했을 때 완료"
+    },
+    "task_rapport_2@v1": {
+        "id": "task_rapport_2",
+        "part": 1,
+        "priority": "medium",
+        "title": "관계 형성하기",
+        "target": "사용자가 편안하게 느끼고 신뢰할 수 있는 관계 형성",
+        "description": "상담사는 사용자가 어떤 대화를 원하는지 또는 어떤 고민을 가지고 있는지 파악한다.",
+        "completion_criteria": "사용자가 3턴 이상 편안하게 대화를 이어가거나, 핵심 고민을 얘기함"
+    },
+    "task_summary_1@v1": {
+        "id": "task_summary_1",
+        "part": 3,
+        "priority": "high",
+        "title": "상담 내용 요약하기",
+        "description": "오늘 상담에서 다룬 내용을 요약하고 정리",
+        "target": "상담사가 오늘 상담 내용을 이해하고 정리",
+        "completion_criteria": "사용자가 상담사의 말을 이해했을 때 완료"
+    },
+    "task_goal_1@v1": {
+        "id": "task_goal_1",
+        "part": 3,
+        "priority": "high",
+        "title": "상담 목표 설정하기",
+        "description": "앞으로의 상담 목표를 설정",
+        "target": "구체적이고 달성 가능한 상담 목표 설정",
+        "completion_criteria": "상담 목표를 설정하고 사용자가 동의했을 때 완료"
+    },
+    "task_next_1@v1": {
+        "id": "task_next_1",
+        "part": 3,
+        "priority": "medium",
+        "title": "다음 상담 안내하기",
+        "description": "다음 상담 일정과 준비사항 안내",
+        "target": "다음 상담 계획을 수립하고 안내",
+        "completion_criteria": "다음 상담 안내를 완료했을 때 완료"
+    }
+}
+
+# 새 세션에 사용하는 템플릿 (현재 버전)
+INITIAL_TASK_TEMPLATES = {
+    "first_session": ["task_rapport_1@v1", "task_rapport_2@v1"]
+}
+PART3_TASK_TEMPLATES = ["task_summary_1@v1", "task_goal_1@v1", "task_next_1@v1"]
+
+
+def instantiate_tasks(template_ids: List[str]) -> List[Dict]:
+    """템플릿으로 새 Task 목록 생성 (status는 pending)"""
+    return [
+        {**copy.deepcopy(TASK_TEMPLATES[template_id]), "template_id": template_id, "status": "pending"}
+        for template_id in template_ids
+    ]
+
+
+def compact_tasks(tasks: List[Dict]) -> List[Dict]:
+    """
+    저장용으로 Task 목록 축약
+
+    template_id가 있는 Task는 템플릿과 값이 다른 필드(status, 타임스탬프 등)만 남기고,
+    템플릿이 없는 Task(Part 2 LLM 생성 Task, 기존 세션)는 그대로 둔다.
+    """
+    compacted = []
+    for task in tasks:
+        template = TASK_TEMPLATES.get(task.get("template_id"))
+        if template is None:
+            compacted.append(task)
+            continue
+        compacted.append({
+            key: value for key, value in task.items()
+            if key not in template or template[key] != value
+        })
+    return compacted
+
+
+def expand_tasks(tasks: List[Dict]) -> List[Dict]:
+    """읽은 Task 목록의 템플릿 참조를 전체 Task로 복원"""
+    expanded = []
+    for task in tasks:
+        template_id = task.get("template_id")
+        if template_id is None:
+            expanded.append(task)
+            continue
+
+        template = TASK_TEMPLATES.get(template_id)
+        if template is None:
+            logger.warning(f"[TASK_TEMPLATE] 알 수 없는 템플릿: {template_id}")
+            expanded.append({"id": template_id.split("@", 1)[0], **task})
+            continue
+        expanded.append({**copy.deepcopy(template), **task})
+    return expanded
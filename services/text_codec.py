@@ -0,0 +1,75 @@
+"""저장용 텍스트 압축 코덱 - 큰 텍스트 필드를 zlib 바이트로 저장"""
+import zlib
+from typing import Any, Dict, Iterable, List, Optional
+from config import Config
+
+
+class TextCodec:
+    """
+    Firestore에 저장하는 큰 텍스트 필드 압축/복원
+
+    - 임계값 이상인 문자열만 `MARKER + zlib 압축 데이터` 바이트로 저장
+    - 복원은 MARKER로 시작하는 바이트만 처리하므로 기존(압축 전) 문서도 그대로 읽힘
+    - MARKER에 형식 버전을 포함해 이후 압축 방식이 바뀌어도 구분 가능
+    """
+
+    MARKER = b"cbz1:"
+
+    def __init__(self, threshold: Optional[int] = None, enabled: Optional[bool] = None, level: int = 6):
+        """
+        Args:
+            threshold: 압축할 최소 크기 (UTF-8 바이트)
+            enabled: 압축 사용 여부 (False여도 복원은 수행)
+            level: zlib 압축 레벨
+        """
+        self.threshold = Config.TEXT_COMPRESSION_THRESHOLD if threshold is None else threshold
+        self.enabled = Config.TEXT_COMPRESSION_ENABLED if enabled is None else enabled
+        self.level = level
+
+    def encode(self, value: Any) -> Any:
+        """임계값 이상의 문자열이면 압축 바이트로, 아니면 그대로 반환"""
+        if not self.enabled or not isinstance(value, str):
+            return value
+
+        raw = value.encode("utf-8")
+        if len(raw) < self.threshold:
+            return value
+
+        compressed = self.MARKER + zlib.compress(raw, self.level)
+        # 압축 효과가 없으면 원문 유지
+        return compressed if len(compressed) < len(raw) else value
+
+    @classmethod
+    def decode(cls, value: Any) -> Any:
+        """압축 바이트면 문자열로 복원, 아니면 그대로 반환 (설정과 무관하므로 클래스에서도 호출 가능)"""
+        if isinstance(value, bytes) and value.startswith(cls.MARKER):
+            return zlib.decompress(value[len(cls.MARKER):]).decode("utf-8")
+        return value
+
+    def encode_fields(self, data: Dict, keys: Iterable[str]) -> Dict:
+        """딕셔너리의 지정된 키만 압축한 복사본 반환"""
+        encoded = dict(data)
+        for key in keys:
+            if key in encoded:
+                encoded[key] = self.encode(encoded[key])
+        return encoded
+
+    def decode_fields(self, data: Dict, keys: Iterable[str]) -> Dict:
+        """딕셔너리의 지정된 키를 제자리에서 복원"""
+        for key in keys:
+            if key in data:
+                data[key] = self.decode(data[key])
+        return data
+
+    def encode_entries(self, entries: List[Dict], keys: Iterable[str]) -> List[Dict]:
+        """로그 항목 목록의 지정된 키를 압축한 복사본 반환"""
+        keys = tuple(keys)
+        return [self.encode_fields(entry, keys) if isinstance(entry, dict) else entry for entry in entries]
+
+    def decode_entries(self, entries: List[Dict], keys: Iterable[str]) -> List[Dict]:
+        """로그 항목 목록의 지정된 키를 제자리에서 복원"""
+        keys = tuple(keys)
+        for entry in entries:
+            if isinstance(entry, dict):
+                self.decode_fields(entry, keys)
+        return entries
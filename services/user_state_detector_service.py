@@ -2,11 +2,30 @@
 import os
 import logging
 from typing import Dict, List
-from langchain_google_vertexai import ChatVertexAI
+from services.llm_client import LazyChatModel
+from services.structured_output import StructuredOutputError, invoke_structured, structured_output_params
 from config import Config
+from services.log_setup import log_payload
 
 logger = logging.getLogger(__name__)
 
+# 응답 스키마 (emotion은 1글자 코드, 상태 플래그가 모두 나오면 summary는 기다리지 않음)
+USER_STATE_FLAGS = ("resistance", "emotion", "topic_change", "circular")
+USER_STATE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "resistance": {"type": "boolean"},
+        "emotion": {"type": "string", "enum": ["P", "N", "U", "X"]},
+        "topic_change": {"type": "boolean"},
+        "circular": {"type": "boolean"},
+        "summary": {"type": "string"}
+    },
+    "required": ["resistance", "emotion", "topic_change", "circular", "summary"],
+    "property_ordering": [*USER_STATE_FLAGS, "summary"]
+}
+
+EMOTION_CODES = {"P": "positive", "N": "negative", "U": "neutral", "X": None}
+
 
 class UserStateDetectorService:
     """User State Detector - 사용자 저항, 감정, 주제 변경 등 감지"""
@@ -15,13 +34,14 @@ class UserStateDetectorService:
         if Config.GOOGLE_APPLICATION_CREDENTIALS and os.path.exists(Config.GOOGLE_APPLICATION_CREDENTIALS):
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = Config.GOOGLE_APPLICATION_CREDENTIALS
         
-        self.llm = ChatVertexAI(
+        self.llm = LazyChatModel(
             model_name=Config.VERTEX_AI_MODEL,
             project=Config.PROJECT_ID,
             location=Config.LOCATION,
             temperature=0.5,
             max_output_tokens=300,
-            model_kwargs={"thinking_budget": 0}
+            model_kwargs={"thinking_budget": 0},
+            **structured_output_params(USER_STATE_SCHEMA)
         )
     
     def get_system_prompt(self) -> str:
@@ -33,12 +53,9 @@ class UserStateDetectorService:
 3. **주제 변경 (Topic Change)**: 대화 주제가 바뀌었는지
 4. **빙빙 도는 대화 (Circular Conversation)**: 같은 주제를 반복하는지
 
-**응답 형식:**
-RESISTANCE_DETECTED: [True|False]
-EMOTION_CHANGE: [positive|negative|neutral|None]
-TOPIC_CHANGE: [True|False]
-CIRCULAR_CONVERSATION: [True|False]
-USER_STATE_SUMMARY: [상태 요약]"""
+**응답 형식 (JSON):**
+{"resistance": true|false, "emotion": "P|N|U|X", "topic_change": true|false, "circular": true|false, "summary": "상태 요약 (한 문장)"}
+- emotion: `P` 긍정적, `N` 부정적, `U` 중립, `X` 변화 없음"""
     
     def detect_state(self, conversation_history: List[Dict]) -> Dict:
         """
@@ -67,14 +84,7 @@ USER_STATE_SUMMARY: [상태 요약]"""
 
 {conversation_context}
 
-위 대화를 분석하여 시스템 프롬프트의 감지 기준에 따라 사용자의 상태를 감지하세요.
-
-다음 형식으로 응답하세요:
-RESISTANCE_DETECTED: [True|False]
-EMOTION_CHANGE: [positive|negative|neutral|None]
-TOPIC_CHANGE: [True|False]
-CIRCULAR_CONVERSATION: [True|False]
-USER_STATE_SUMMARY: [상태 요약]"""
+위 대화를 분석하여 시스템 프롬프트의 감지 기준에 따라 사용자의 상태를 감지하고 JSON으로 응답하세요."""
         
         messages = [
             ('system', self.get_system_prompt()),
@@ -82,37 +92,32 @@ USER_STATE_SUMMARY: [상태 요약]"""
         ]
         
         try:
-            response = self.llm.invoke(messages)
-            response_text = response.content if hasattr(response, 'content') else str(response)
+            # 응답 파싱 (스키마 검증 실패 시 상태 변화 없음으로 처리)
+            try:
+                parsed, response_text = invoke_structured(
+                    "user_state_detector", self.llm, messages, USER_STATE_SCHEMA,
+                    ready=lambda fields: all(flag in fields for flag in USER_STATE_FLAGS)
+                )
+            except StructuredOutputError as e:
+                logger.warning(f"[USER_STATE_DETECTOR] 출력 파싱 실패 ({e.reason}): {str(e)}")
+                return {
+                    "resistance_detected": False,
+                    "emotion_change": None,
+                    "topic_change": False,
+                    "circular_conversation": False,
+                    "user_state_summary": ""
+                }
             
-            logger.debug(f"[USER_STATE_DETECTOR] LLM 응답: {response_text[:500]}")
+            log_payload(logger, "[USER_STATE_DETECTOR] LLM 응답:", response_text[:500])
             
-            # 응답 파싱
             result = {
-                "resistance_detected": False,
-                "emotion_change": None,
-                "topic_change": False,
-                "circular_conversation": False,
-                "user_state_summary": ""
+                "resistance_detected": parsed["resistance"],
+                "emotion_change": EMOTION_CODES[parsed["emotion"]],
+                "topic_change": parsed["topic_change"],
+                "circular_conversation": parsed["circular"],
+                "user_state_summary": parsed.get("summary", "").strip()
             }
             
-            for line in response_text.split('\n'):
-                if 'RESISTANCE_DETECTED:' in line.upper():
-                    value = line.split(':', 1)[1].strip().lower()
-                    result["resistance_detected"] = value == 'true'
-                elif 'EMOTION_CHANGE:' in line.upper():
-                    value = line.split(':', 1)[1].strip().lower()
-                    if value in ['positive', 'negative', 'neutral']:
-                        result["emotion_change"] = value
-                elif 'TOPIC_CHANGE:' in line.upper():
-                    value = line.split(':', 1)[1].strip().lower()
-                    result["topic_change"] = value == 'true'
-                elif 'CIRCULAR_CONVERSATION:' in line.upper():
-                    value = line.split(':', 1)[1].strip().lower()
-                    result["circular_conversation"] = value == 'true'
-                elif 'USER_STATE_SUMMARY:' in line.upper():
-                    result["user_state_summary"] = line.split(':', 1)[1].strip()
-            
             logger.info(f"[USER_STATE_DETECTOR] 파싱 결과: resistance={result['resistance_detected']}, "
                        f"emotion={result['emotion_change']}, topic_change={result['topic_change']}, "
                        f"circular={result['circular_conversation']}")
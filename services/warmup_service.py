@@ -0,0 +1,123 @@
+"""
+인스턴스 시작 시 워밍업 - 첫 요청이 부담하던 1회성 비용을 준비 완료 보고 전에 처리
+
+1. 무거운 모듈 import (langchain / Vertex AI / Firebase 클라이언트)
+2. 저장소 연결 (첫 읽기로 TLS/gRPC 채널 수립)
+3. Module 카탈로그 / 페르소나 설정 캐시 적재 (modules가 비어 있으면 기본 Module 생성도 여기서)
+4. LLM 클라이언트마다 짧은 호출로 Vertex AI 연결 수립
+
+/ready는 워밍업이 끝난 뒤에만 "warm"을 반환하므로 Cloud Run 시작 프로브로 사용한다 (cloudbuild.yaml).
+"""
+import importlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 워밍업에서 미리 import하는 모듈 (Firebase 클라이언트는 firestore 백엔드일 때만)
+WARMUP_IMPORTS = ("langchain_google_vertexai",)
+FIRESTORE_IMPORTS = ("google.cloud.firestore", "firebase_admin")
+
+
+class WarmupService:
+    """워밍업 실행 및 준비 상태 관리"""
+
+    def __init__(self, counselor_service, module_service, persona_service, firestore_service):
+        self.counselor_service = counselor_service
+        self.module_service = module_service
+        self.persona_service = persona_service
+        self.firestore = firestore_service
+
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._state = "pending"  # pending, warming, warm
+        self._started_at: Optional[float] = None
+        self._duration: Optional[float] = None
+        self._steps: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def is_warm(self) -> bool:
+        return self._state == "warm"
+
+    def start(self) -> None:
+        """백그라운드 스레드에서 워밍업 시작 (WARMUP_ENABLED=false면 바로 준비 완료)"""
+        with self._lock:
+            if self._state != "pending":
+                return
+            if not Config.WARMUP_ENABLED:
+                self._state = "warm"
+                self._duration = 0.0
+                return
+            self._state = "warming"
+            self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+            self._thread.start()
+
+    def run(self) -> None:
+        """워밍업 단계 실행 (단계가 실패해도 기록만 하고 계속 진행)"""
+        self._state = "warming"
+        self._started_at = time.time()
+        start = time.perf_counter()
+
+        self._step("imports", self._import_modules)
+        self._step("storage", self._touch_storage)
+        self._step("module_catalog", lambda: self.module_service.catalog.get())
+        self._step("persona_config", lambda: self.persona_service.config_cache.get())
+        if Config.WARMUP_LLM_PING:
+            self._step("llm", self._ping_llms)
+
+        self._duration = time.perf_counter() - start
+        self._state = "warm"
+        failed = [name for name, step in self._steps.items() if "error" in step]
+        logger.info(f"[WARMUP] 완료: {self._duration:.2f}s | "
+                    + " | ".join(f"{name}={step['seconds']:.2f}s" for name, step in self._steps.items())
+                    + (f" | 실패={failed}" if failed else ""))
+
+    def status(self) -> Dict[str, Any]:
+        """준비 상태와 단계별 소요 시간"""
+        return {
+            "status": self._state,
+            "started_at": self._started_at,
+            "duration": round(self._duration, 3) if self._duration is not None else None,
+            "steps": {name: dict(step) for name, step in self._steps.items()}
+        }
+
+    def _step(self, name: str, fn: Callable[[], Any]) -> None:
+        start = time.perf_counter()
+        step: Dict[str, Any] = {}
+        try:
+            fn()
+        except Exception as e:
+            logger.warning(f"[WARMUP] {name} 실패: {str(e)}")
+            step["error"] = str(e)
+        step["seconds"] = round(time.perf_counter() - start, 3)
+        self._steps[name] = step
+
+    def _import_modules(self) -> None:
+        module_names = WARMUP_IMPORTS
+        if Config.STORAGE_BACKEND == "firestore":
+            module_names += FIRESTORE_IMPORTS
+        for module_name in module_names:
+            importlib.import_module(module_name)
+
+    def _touch_storage(self) -> None:
+        # 존재 여부와 관계없이 문서 하나를 읽어 연결 수립
+        self.firestore.db.collection("cache_versions").document("warmup").get()
+
+    def _ping_llms(self) -> None:
+        """LLM 클라이언트마다 짧은 호출 (병렬 실행, 클라이언트별 연결 수립)"""
+        clients = self.counselor_service.llm_clients()
+
+        def ping(llm) -> None:
+            llm.invoke([("user", "ping")], max_output_tokens=1)
+
+        with ThreadPoolExecutor(max_workers=len(clients) or 1) as executor:
+            futures = [
+                executor.submit(self._step, f"llm.{name}", lambda llm=llm: ping(llm))
+                for name, llm in clients.items()
+            ]
+            for future in futures:
+                future.result()
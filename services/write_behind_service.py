@@ -0,0 +1,340 @@
+"""쓰기 지연(write-behind) 서비스 - 상담사 응답과 턴 종료 세션 쓰기를 로컬 outbox로 넘겨 백그라운드에서 기록"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+from config import Config
+from services.firestore_service import FirestoreService
+from services.session_service import SessionService
+from services.storage_backend import dumps_document, loads_document
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindDelayed(RuntimeError):
+    """밀린 쓰기가 timeout 안에 반영되지 않음 (저장소 장애 등, 잠시 후 다시 시도 가능)"""
+
+
+class ConversationBlocked(RuntimeError):
+    """메시지 쓰기가 dead_letter로 옮겨져 대화가 멈춤 (requeue_dead_letter()로 다시 반영할 때까지)"""
+
+
+class WriteBehindService:
+    """
+    상담사 메시지 write-behind outbox
+
+    - /chat은 응답을 바로 반환하고, 상담사 메시지와 턴 메타데이터, 턴 종료 시의 세션 쓰기
+      (message_count, Task 완료 판단 로그)는 로컬 SQLite outbox에 기록
+    - 백그라운드 writer 스레드가 대화별로 들어온 순서대로 저장소에 반영 (다른 대화의 실패 항목에 막히지 않음)
+    - 실패한 항목은 backoff 후 재시도하고, WRITE_BEHIND_MAX_ATTEMPTS번 실패하면 dead_letter 테이블로 옮김
+      (메시지가 옮겨지면 순번이 비므로 그 대화의 남은 항목도 함께 옮기고 대화를 막음.
+      새 턴은 ConversationBlocked로 거부되며 requeue_dead_letter()로 다시 반영하면 풀림)
+    - 프로세스가 재시작되면 남은 항목부터 다시 반영 (이미 저장된 메시지는 순번으로 확인해 다시 쓰지 않음)
+    - 같은 대화의 다음 턴(또는 조회)은 flush_conversation()으로 밀린 쓰기를 먼저 반영한 뒤 진행
+
+    outbox가 인스턴스 로컬 파일이므로 단일 인스턴스에서만 사용할 수 있고, 인스턴스가 교체되어도
+    남는 디스크에 있어야 한다 (Cloud Run의 로컬 디스크는 메모리라 교체 시 미반영 응답이 사라짐,
+    WRITE_BEHIND_DURABLE_DISK 참고).
+    """
+
+    # 재시도 간격 상한 (초)
+    MAX_BACKOFF = 30
+
+    def __init__(self, firestore_service: FirestoreService, session_service: SessionService, path: str):
+        """
+        Args:
+            firestore_service: 메시지 저장에 사용할 FirestoreService
+            session_service: 세션 쓰기에 사용할 SessionService
+            path: outbox SQLite 파일 경로
+        """
+        self.firestore = firestore_service
+        self.session_service = session_service
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=FULL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "conversation_id TEXT NOT NULL, "
+            "payload TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt_at REAL NOT NULL DEFAULT 0, "
+            "created_at TEXT NOT NULL)"
+        )
+        # 이전 버전에서 만든 outbox 파일
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(outbox)")}
+        if "next_attempt_at" not in columns:
+            self._connection.execute("ALTER TABLE outbox ADD COLUMN next_attempt_at REAL NOT NULL DEFAULT 0")
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS outbox_conversation ON outbox (conversation_id, id)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS dead_letter ("
+            "id INTEGER PRIMARY KEY, "
+            "conversation_id TEXT NOT NULL, "
+            "payload TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL, "
+            "error TEXT, "
+            "created_at TEXT NOT NULL, "
+            "failed_at TEXT NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS blocked_conversations ("
+            "conversation_id TEXT PRIMARY KEY, "
+            "reason TEXT, "
+            "blocked_at TEXT NOT NULL)"
+        )
+        self._blocked = {
+            row[0] for row in self._connection.execute("SELECT conversation_id FROM blocked_conversations")
+        }
+
+        # 대화별 미반영 항목 수 (재시작 시 남은 항목 포함)
+        self._pending: Dict[str, int] = {}
+        for conversation_id, count in self._connection.execute(
+            "SELECT conversation_id, COUNT(*) FROM outbox GROUP BY conversation_id"
+        ):
+            self._pending[conversation_id] = count
+        if self._pending:
+            logger.info(f"[WRITE_BEHIND] 미반영 항목 {sum(self._pending.values())}개 재처리")
+
+        self._writer = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._writer.start()
+
+    def enqueue_message(self, conversation_id: str, role: str, content: str,
+                        metadata: Optional[Dict] = None, expected_seq: Optional[int] = None) -> Optional[int]:
+        """
+        메시지 저장을 outbox에 기록 (즉시 반환)
+
+        Args:
+            conversation_id: 대화 ID
+            role: 메시지 역할
+            content: 메시지 내용
+            metadata: 메시지 메타데이터
+            expected_seq: 저장 시 부여될 것으로 예상되는 순번 (직전 메시지 순번 + 1)
+
+        Returns:
+            expected_seq (응답에 바로 쓸 순번)
+        """
+        self._enqueue(conversation_id, {
+            "kind": "message",
+            "role": role,
+            "content": content,
+            "metadata": metadata,
+            "expected_seq": expected_seq
+        })
+        return expected_seq
+
+    def enqueue_session_fields(self, conversation_id: str, fields: Dict) -> None:
+        """
+        세션 필드 쓰기를 outbox에 기록 (즉시 반환)
+
+        다시 반영되어도 결과가 같도록 increment 같은 변환 값 대신 최종 값을 넘긴다.
+        """
+        self._enqueue(conversation_id, {"kind": "session_fields", "fields": fields})
+
+    def enqueue_session_log(self, conversation_id: str, field: str, entry: Dict) -> None:
+        """
+        세션 로그 항목 추가를 outbox에 기록 (즉시 반환)
+
+        timestamp를 포함한 항목을 그대로 array_union으로 추가하므로 다시 반영되어도 한 번만 남는다.
+        """
+        entry = {**entry, "timestamp": entry.get("timestamp") or datetime.now().isoformat()}
+        self._enqueue(conversation_id, {"kind": "session_log", "field": field, "entry": entry})
+
+    def has_pending(self, conversation_id: str) -> bool:
+        """대화에 아직 반영되지 않은 쓰기가 있는지 여부"""
+        return self._pending.get(conversation_id, 0) > 0
+
+    def is_blocked(self, conversation_id: str) -> bool:
+        """메시지 쓰기가 dead_letter로 옮겨져 대화가 멈췄는지 여부"""
+        return conversation_id in self._blocked
+
+    def flush_conversation(self, conversation_id: str, timeout: float = 10.0,
+                           for_write: bool = False) -> None:
+        """
+        대화의 밀린 쓰기가 모두 반영될 때까지 대기
+
+        Args:
+            conversation_id: 대화 ID
+            timeout: 최대 대기 시간 (초)
+            for_write: 이 대화에 새로 쓰기 전인지 여부 (멈춘 대화면 ConversationBlocked)
+
+        Raises:
+            WriteBehindDelayed: timeout 안에 반영되지 않은 경우 (저장소 장애 등)
+            ConversationBlocked: for_write이고 대화가 멈춘 경우
+        """
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                if for_write and conversation_id in self._blocked:
+                    raise ConversationBlocked(f"이전 응답을 저장하지 못해 대화가 중단되었습니다: {conversation_id}")
+                if self._pending.get(conversation_id, 0) == 0:
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise WriteBehindDelayed(f"이전 응답 저장이 지연되고 있습니다: {conversation_id}")
+                self._changed.wait(remaining)
+
+    def requeue_dead_letter(self, conversation_id: str) -> int:
+        """
+        대화의 dead_letter 항목을 원래 순서대로 outbox에 다시 넣고 대화 차단 해제 (저장소 복구 후 운영자가 호출)
+
+        Returns:
+            다시 넣은 항목 수
+        """
+        with self._changed:
+            rows = self._connection.execute(
+                "SELECT id, payload, created_at FROM dead_letter WHERE conversation_id = ? ORDER BY id",
+                (conversation_id,)
+            ).fetchall()
+            for entry_id, payload, created_at in rows:
+                self._connection.execute(
+                    "INSERT INTO outbox (id, conversation_id, payload, created_at) VALUES (?, ?, ?, ?)",
+                    (entry_id, conversation_id, payload, created_at)
+                )
+                self._connection.execute("DELETE FROM dead_letter WHERE id = ?", (entry_id,))
+            self._connection.execute(
+                "DELETE FROM blocked_conversations WHERE conversation_id = ?", (conversation_id,)
+            )
+            self._blocked.discard(conversation_id)
+            if rows:
+                self._pending[conversation_id] = self._pending.get(conversation_id, 0) + len(rows)
+            self._changed.notify_all()
+        logger.info(f"[WRITE_BEHIND] conversation_id={conversation_id[:8]}... | dead_letter {len(rows)}개 다시 반영")
+        return len(rows)
+
+    def _enqueue(self, conversation_id: str, payload: Dict) -> None:
+        with self._changed:
+            created_at = datetime.now().isoformat()
+            cursor = self._connection.execute(
+                "INSERT INTO outbox (conversation_id, payload, created_at) VALUES (?, ?, ?)",
+                (conversation_id, dumps_document(payload), created_at)
+            )
+            self._pending[conversation_id] = self._pending.get(conversation_id, 0) + 1
+            if conversation_id in self._blocked:
+                # 차단 중에 끝난 턴의 쓰기는 앞 항목 뒤에 그대로 쌓아 둠 (requeue_dead_letter()에서 함께 반영)
+                self._move_to_dead_letter(cursor.lastrowid, conversation_id, dumps_document(payload), 0,
+                                          None, created_at)
+            self._changed.notify_all()
+
+    def _run(self) -> None:
+        """대화별 첫 항목 중 재시도 시각이 된 것부터 저장소에 반영 (writer 스레드)"""
+        while True:
+            with self._changed:
+                now = time.time()
+                row = self._connection.execute(
+                    "SELECT id, conversation_id, payload, attempts, created_at FROM outbox "
+                    "WHERE id IN (SELECT MIN(id) FROM outbox GROUP BY conversation_id) AND next_attempt_at <= ? "
+                    "ORDER BY id LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is None:
+                    # 다음 재시도 시각까지 (새 항목이 들어오면 바로) 대기
+                    next_attempt_at = self._connection.execute(
+                        "SELECT MIN(next_attempt_at) FROM outbox"
+                    ).fetchone()[0]
+                    self._changed.wait(5 if next_attempt_at is None else min(max(next_attempt_at - now, 0.05), 5))
+                    continue
+
+            entry_id, conversation_id, payload, attempts, created_at = row
+            payload_data = loads_document(payload)
+            try:
+                self._apply(conversation_id, payload_data)
+            except Exception as e:
+                attempts += 1
+                if attempts >= Config.WRITE_BEHIND_MAX_ATTEMPTS:
+                    with self._changed:
+                        if payload_data.get("kind", "message") == "message":
+                            self._block_conversation(conversation_id, entry_id, attempts, str(e))
+                        else:
+                            logger.error(f"[WRITE_BEHIND ERROR] conversation_id={conversation_id[:8]}... | "
+                                         f"attempts={attempts} | dead_letter로 이동 | error={str(e)}")
+                            self._move_to_dead_letter(entry_id, conversation_id, payload, attempts,
+                                                      str(e), created_at)
+                    continue
+
+                # 같은 대화의 뒤 항목은 이 항목이 반영될 때까지 기다림 (다른 대화는 계속 진행)
+                backoff = min(2 ** (attempts - 1), self.MAX_BACKOFF)
+                logger.error(f"[WRITE_BEHIND ERROR] conversation_id={conversation_id[:8]}... | "
+                             f"attempts={attempts} | retry_in={backoff}s | error={str(e)}")
+                with self._changed:
+                    self._connection.execute(
+                        "UPDATE outbox SET attempts = ?, next_attempt_at = ? WHERE id = ?",
+                        (attempts, time.time() + backoff, entry_id)
+                    )
+                continue
+
+            with self._changed:
+                self._remove(entry_id, conversation_id)
+
+    def _move_to_dead_letter(self, entry_id: int, conversation_id: str, payload: str, attempts: int,
+                             error: Optional[str], created_at: str) -> None:
+        """outbox 항목을 dead_letter로 이동 (self._changed를 잡은 상태에서 호출)"""
+        self._connection.execute(
+            "INSERT INTO dead_letter (id, conversation_id, payload, attempts, error, created_at, failed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (entry_id, conversation_id, payload, attempts, error, created_at, datetime.now().isoformat())
+        )
+        self._remove(entry_id, conversation_id)
+
+    def _block_conversation(self, conversation_id: str, entry_id: int, attempts: int, error: str) -> None:
+        """
+        메시지 항목이 최대 시도 횟수를 넘김 → 대화의 남은 항목을 모두 dead_letter로 옮기고 대화 차단
+        (뒤 항목을 계속 반영하면 빠진 순번 뒤에 메시지가 쌓이므로, self._changed를 잡은 상태에서 호출)
+        """
+        rows = self._connection.execute(
+            "SELECT id, payload, attempts, created_at FROM outbox WHERE conversation_id = ? ORDER BY id",
+            (conversation_id,)
+        ).fetchall()
+        for row_id, row_payload, row_attempts, row_created_at in rows:
+            self._move_to_dead_letter(
+                row_id, conversation_id, row_payload, attempts if row_id == entry_id else row_attempts,
+                error if row_id == entry_id else None, row_created_at
+            )
+        self._connection.execute(
+            "INSERT OR REPLACE INTO blocked_conversations (conversation_id, reason, blocked_at) VALUES (?, ?, ?)",
+            (conversation_id, error, datetime.now().isoformat())
+        )
+        self._blocked.add(conversation_id)
+        logger.error(f"[WRITE_BEHIND ERROR] conversation_id={conversation_id[:8]}... | attempts={attempts} | "
+                     f"메시지 저장 실패로 대화 차단, {len(rows)}개 항목 dead_letter로 이동 | error={error}")
+
+    def _remove(self, entry_id: int, conversation_id: str) -> None:
+        """outbox에서 항목 삭제 (self._changed를 잡은 상태에서 호출)"""
+        self._connection.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+        remaining = self._pending.get(conversation_id, 1) - 1
+        if remaining > 0:
+            self._pending[conversation_id] = remaining
+        else:
+            self._pending.pop(conversation_id, None)
+        self._changed.notify_all()
+
+    def _apply(self, conversation_id: str, payload: Dict) -> None:
+        kind = payload.get("kind", "message")
+        if kind == "session_fields":
+            self.session_service.update_fields(conversation_id, payload["fields"])
+            return
+        if kind == "session_log":
+            self.session_service.append_log(conversation_id, payload["field"], payload["entry"])
+            return
+
+        # 이 순번까지 이미 저장되어 있으면(반영 후 삭제 전에 종료된 경우) 다시 쓰지 않음
+        expected_seq = payload.get("expected_seq")
+        seq = self.firestore.add_message(
+            conversation_id,
+            payload["role"],
+            payload["content"],
+            metadata=payload.get("metadata"),
+            expected_seq=expected_seq
+        )
+        if expected_seq is not None and seq != expected_seq:
+            logger.warning(f"[WRITE_BEHIND] conversation_id={conversation_id[:8]}... | "
+                           f"순번 불일치 expected={expected_seq} actual={seq}")
@@ -10,8 +10,16 @@ const newConversationBtn = document.getElementById('new-conversation-btn');
 const conversationIdDisplay = document.getElementById('conversation-id-display');
 const sidebar = document.getElementById('sidebar');
 
-// 세션 정보 업데이트 인터벌
+// 세션 정보 업데이트 인터벌 (SSE를 사용할 수 없을 때만 폴링)
 let sessionUpdateInterval = null;
+// 세션 변경 이벤트 스트림 (SSE)
+let sessionEventSource = null;
+// 마지막으로 받은 세션 상태 (delta 적용 대상)
+let sessionState = null;
+// 마지막으로 받은 세션 ETag (변경이 없으면 서버가 304 반환)
+let sessionEtag = null;
+// 메시지 순번별 프롬프트 (conversationId:seq -> 응답, 클릭할 때만 가져옴)
+const promptCache = new Map();
 
 // 페르소나 선택 관련 변수
 let selectedPersonaType = null;
@@ -135,24 +143,14 @@ async function sendMessage() {
         // 타이핑 인디케이터 제거
         removeTypingIndicator(typingIndicator);
         
-        // 대화 기록 가져와서 메시지 인덱스 확인
-        try {
-            const convResponse = await fetch(`${API_BASE_URL}/api/conversations/${conversationId}`);
-            if (convResponse.ok) {
-                const conversation = await convResponse.json();
-                const messages = conversation.messages || [];
-                const messageIndex = messages.length - 1; // 방금 추가된 메시지의 인덱스
-                addMessage('assistant', data.response, messageIndex);
-            } else {
-                addMessage('assistant', data.response);
-            }
-        } catch (error) {
-            console.error('대화 기록 가져오기 오류:', error);
-            addMessage('assistant', data.response);
-        }
+        // 응답에 포함된 순번으로 프롬프트 보기 연결 (대화 전체를 다시 받지 않음)
+        const messageIndex = typeof data.message_seq === 'number' ? data.message_seq : null;
+        addMessage('assistant', data.response, messageIndex);
         
-        // 세션 정보 즉시 업데이트
-        updateSessionInfo();
+        // 세션 정보 즉시 업데이트 (SSE 연결 중이면 변경분이 푸시되므로 생략)
+        if (!sessionEventSource) {
+            updateSessionInfo();
+        }
         
     } catch (error) {
         console.error('메시지 전송 오류:', error);
@@ -211,6 +209,14 @@ function addMessage(role, content, messageIndex = null) {
 async function showPrompt(messageIndex) {
     if (!conversationId) return;
     
+    // 한 번 가져온 프롬프트는 다시 요청하지 않음
+    const cacheKey = `${conversationId}:${messageIndex}`;
+    const cached = promptCache.get(cacheKey);
+    if (cached) {
+        showPromptModal(cached.prompt || '프롬프트 정보가 없습니다.', cached.current_task, cached.current_part, cached.current_module, cached.supervision, cached.task_selector_output || null);
+        return;
+    }
+    
     try {
         const response = await fetch(`${API_BASE_URL}/api/conversations/${conversationId}/messages/${messageIndex}/prompt`);
         
@@ -226,6 +232,7 @@ async function showPrompt(messageIndex) {
         }
         
         const data = await response.json();
+        promptCache.set(cacheKey, data);
         const prompt = data.prompt || '프롬프트 정보가 없습니다.';
         const taskSelectorOutput = data.task_selector_output || null;
         
@@ -429,11 +436,53 @@ function showError(message) {
 
 // 세션 정보 업데이트 시작
 function startSessionUpdates() {
-    // 기존 인터벌 정리
+    stopSessionUpdates();
+    
+    if (!window.EventSource) {
+        startSessionPolling();
+        return;
+    }
+    
+    // 서버 푸시로 세션 변경 수신 (연결이 끊기면 브라우저가 자동 재연결)
+    const streamConversationId = conversationId;
+    sessionEventSource = new EventSource(`${API_BASE_URL}/api/sessions/${conversationId}/events`);
+    
+    sessionEventSource.addEventListener('snapshot', (event) => {
+        if (streamConversationId !== conversationId) return;
+        sessionState = JSON.parse(event.data);
+        renderSession(sessionState);
+    });
+    
+    sessionEventSource.addEventListener('delta', (event) => {
+        if (streamConversationId !== conversationId) return;
+        applySessionDelta(JSON.parse(event.data));
+    });
+    
+    sessionEventSource.onerror = () => {
+        // 재연결을 포기한 경우(예: 404)에만 폴링으로 대체
+        if (sessionEventSource && sessionEventSource.readyState === EventSource.CLOSED) {
+            sessionEventSource = null;
+            startSessionPolling();
+        }
+    };
+}
+
+// 세션 정보 업데이트 중지
+function stopSessionUpdates() {
+    if (sessionEventSource) {
+        sessionEventSource.close();
+        sessionEventSource = null;
+    }
     if (sessionUpdateInterval) {
         clearInterval(sessionUpdateInterval);
+        sessionUpdateInterval = null;
     }
-    
+    sessionEtag = null;
+    sessionState = null;
+}
+
+// 폴링으로 세션 정보 업데이트 (SSE 미지원 시 대체 경로)
+function startSessionPolling() {
     // 즉시 한 번 실행
     updateSessionInfo();
     
@@ -445,12 +494,51 @@ function startSessionUpdates() {
     }, 2000);
 }
 
+// 세션 delta 적용
+function applySessionDelta(delta) {
+    if (!sessionState) return;
+    
+    Object.keys(delta).forEach(key => {
+        if (key === 'supervision') {
+            sessionState.supervision_log = (sessionState.supervision_log || []).concat([delta.supervision]).slice(-5);
+        } else if (key === 'completion') {
+            sessionState.completion_log = (sessionState.completion_log || []).concat([delta.completion]).slice(-5);
+        } else {
+            sessionState[key] = delta[key];
+        }
+    });
+    
+    renderSession(sessionState);
+}
+
+// 세션 정보 화면 반영
+function renderSession(session) {
+    // Part 진행 상태 표시
+    updatePartProgress(session);
+    
+    // Part별 콘텐츠 동적 표시
+    updatePartContent(session);
+    
+    // Task Completion Checker 로그 표시 (우측 패널)
+    updateCompletionLog(session);
+}
+
 // 세션 정보 업데이트
 async function updateSessionInfo() {
     if (!conversationId) return;
     
     try {
-        const response = await fetch(`${API_BASE_URL}/api/sessions/${conversationId}`);
+        const requestedConversationId = conversationId;
+        const headers = sessionEtag ? { 'If-None-Match': sessionEtag } : {};
+        const response = await fetch(`${API_BASE_URL}/api/sessions/${conversationId}`, {
+            headers: headers,
+            cache: 'no-store'
+        });
+        
+        // 변경 없음
+        if (response.status === 304) {
+            return;
+        }
         
         if (!response.ok) {
             return;
@@ -458,14 +546,14 @@ async function updateSessionInfo() {
         
         const session = await response.json();
         
-        // Part 진행 상태 표시
-        updatePartProgress(session);
-        
-        // Part별 콘텐츠 동적 표시
-        updatePartContent(session);
+        // 응답을 기다리는 동안 대화가 바뀌었으면 무시
+        if (requestedConversationId !== conversationId) {
+            return;
+        }
+        sessionEtag = response.headers.get('ETag');
+        sessionState = session;
         
-        // Task Completion Checker 로그 표시 (우측 패널)
-        updateCompletionLog(session);
+        renderSession(session);
         
     } catch (error) {
         console.error('세션 정보 업데이트 오류:', error);
@@ -717,29 +805,38 @@ function updateCompletionLog(session) {
 }
 
 // 대화 기록 불러오기 (선택사항)
+// 메시지 본문만 페이지 단위로 받고, 프롬프트는 클릭할 때 메시지별로 가져옴
 async function loadConversationHistory() {
     if (!conversationId) return;
     
     try {
-        const response = await fetch(`${API_BASE_URL}/api/conversations/${conversationId}`);
-        
-        if (!response.ok) {
-            return;
-        }
-        
-        const conversation = await response.json();
-        const messages = conversation.messages || [];
-        
         // 환영 메시지 제거
         const welcomeMessage = chatMessages.querySelector('.welcome-message');
         if (welcomeMessage) {
             welcomeMessage.remove();
         }
         
-        // 메시지 표시
-        messages.forEach(msg => {
-            addMessage(msg.role, msg.content);
-        });
+        let since = -1;
+        while (true) {
+            const response = await fetch(`${API_BASE_URL}/api/conversations/${conversationId}/messages?since=${since}&limit=100&exclude=metadata`);
+            
+            if (!response.ok) {
+                return;
+            }
+            
+            const data = await response.json();
+            const messages = data.messages || [];
+            
+            // 메시지 표시 (assistant 메시지는 순번으로 프롬프트 보기 연결)
+            messages.forEach(msg => {
+                addMessage(msg.role, msg.content, msg.role === 'assistant' ? msg.seq : null);
+            });
+            
+            if (messages.length < 100) {
+                break;
+            }
+            since = data.last_seq;
+        }
         
     } catch (error) {
         console.error('대화 기록 불러오기 오류:', error);
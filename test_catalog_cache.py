@@ -0,0 +1,121 @@
+"""CatalogCache 테스트 (인메모리 저장소 백엔드 사용)"""
+from services.catalog_cache import CatalogCache
+from services.storage_backend import MemoryBackend
+
+
+class CountingLoader:
+    """호출될 때마다 새 스냅샷(호출 횟수)을 반환하는 loader"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {"loaded": self.calls}
+
+
+def test_get_loads_once_and_reuses_snapshot():
+    """처음 get()에서만 로드하고 이후에는 같은 스냅샷 반환"""
+    loader = CountingLoader()
+    cache = CatalogCache(MemoryBackend(), "modules", loader, refresh_interval=60)
+
+    assert cache.get() == {"loaded": 1}
+    assert cache.get() == {"loaded": 1}
+    assert loader.calls == 1
+    assert cache.version == 0
+
+
+def test_invalidate_bumps_remote_version_and_reloads():
+    """invalidate()는 원격 version을 올리고 다음 get()에서 다시 로드"""
+    loader = CountingLoader()
+    cache = CatalogCache(MemoryBackend(), "modules", loader, refresh_interval=60)
+    cache.get()
+
+    cache.invalidate()
+
+    assert cache.get() == {"loaded": 2}
+    assert cache.version == 1
+
+
+def test_other_instance_change_detected_on_version_check():
+    """다른 인스턴스의 invalidate()는 version 확인 시점에 감지"""
+    db = MemoryBackend()
+    loader = CountingLoader()
+    cache = CatalogCache(db, "modules", loader, refresh_interval=0)
+    other = CatalogCache(db, "modules", CountingLoader(), refresh_interval=0)
+    cache.get()
+
+    # version이 그대로면 다시 로드하지 않음
+    cache.get()
+    assert loader.calls == 1
+
+    other.invalidate()
+    cache.get()
+    assert loader.calls == 2
+    assert cache.version == 1
+
+
+def test_version_not_checked_within_refresh_interval():
+    """refresh_interval 안에서는 원격 version을 확인하지 않음"""
+    db = MemoryBackend()
+    loader = CountingLoader()
+    cache = CatalogCache(db, "modules", loader, refresh_interval=60)
+    cache.get()
+
+    CatalogCache(db, "modules", CountingLoader()).invalidate()
+
+    assert cache.get() == {"loaded": 1}
+
+
+def test_invalidate_without_bump_keeps_remote_version():
+    """bump_version=False면 로컬 스냅샷만 버림"""
+    db = MemoryBackend()
+    loader = CountingLoader()
+    cache = CatalogCache(db, "modules", loader, refresh_interval=60)
+    cache.get()
+
+    cache.invalidate(bump_version=False)
+
+    assert cache.get() == {"loaded": 2}
+    assert cache.version == 0
+
+
+def test_apply_update_patches_snapshot_without_reload():
+    """로컬 스냅샷이 최신이면 변경분만 반영하고 다시 로드하지 않음"""
+    db = MemoryBackend()
+    loader = CountingLoader()
+    cache = CatalogCache(db, "modules", loader, refresh_interval=0)
+    cache.get()
+
+    cache.apply_update(lambda snapshot: {**snapshot, "patched": True})
+
+    assert cache.get() == {"loaded": 1, "patched": True}
+    assert loader.calls == 1
+    assert cache.version == 1
+    # 다른 인스턴스도 증가한 version으로 갱신을 감지
+    assert db.collection(CatalogCache.VERSION_COLLECTION).document("modules").get().to_dict()["version"] == 1
+
+
+def test_apply_update_invalidates_when_another_instance_changed_first():
+    """증가 직전 version이 로컬 version과 다르면 반영하지 않고 다시 로드"""
+    db = MemoryBackend()
+    loader = CountingLoader()
+    cache = CatalogCache(db, "modules", loader, refresh_interval=60)
+    cache.get()
+    CatalogCache(db, "modules", CountingLoader()).invalidate()
+
+    cache.apply_update(lambda snapshot: {**snapshot, "patched": True})
+
+    assert cache.get() == {"loaded": 2}
+    assert cache.version == 2
+
+
+def test_apply_update_without_snapshot_loads_on_next_get():
+    """로드된 스냅샷이 없으면 update를 호출하지 않고 다음 get()에서 로드"""
+    loader = CountingLoader()
+    cache = CatalogCache(MemoryBackend(), "modules", loader, refresh_interval=60)
+
+    cache.apply_update(lambda snapshot: snapshot.fail())
+
+    assert cache.get() == {"loaded": 1}
+    assert cache.version == 1
@@ -0,0 +1,107 @@
+"""JobQueueService 테스트 (lease, 재시도 backoff, 실패 처리) - 인메모리 저장소 백엔드 사용"""
+import time
+
+import pytest
+
+from config import Config
+from services import storage_backend
+from services.job_queue_service import JobQueueService
+from services.storage_backend import MemoryBackend
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    monkeypatch.setattr(storage_backend, "_backend", MemoryBackend())
+    monkeypatch.setattr(Config, "JOB_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(Config, "JOB_RETRY_BACKOFF_SECONDS", 10)
+    # 워커 모드: submit()은 기록만 하고 실행은 테스트에서 run_job()으로
+    return JobQueueService(mode="worker")
+
+
+def _job(queue, job_id):
+    snapshot = queue._collection().document(job_id).get()
+    return snapshot.to_dict() if snapshot.exists else None
+
+
+def test_successful_job_is_deleted(queue):
+    calls = []
+    queue.register("summary", lambda conversation_id, payload: calls.append((conversation_id, payload)))
+
+    job_id = queue.submit("summary", "c1", {"seq": 3})
+    assert _job(queue, job_id)["status"] == "pending"
+    assert queue._runnable_job_ids() == [job_id]
+
+    queue.run_job(job_id)
+
+    assert calls == [("c1", {"seq": 3})]
+    assert _job(queue, job_id) is None
+
+
+def test_failed_job_waits_for_backoff(queue):
+    def fail(conversation_id, payload):
+        raise RuntimeError("LLM 오류")
+    queue.register("summary", fail)
+    job_id = queue.submit("summary", "c1", {})
+
+    before = time.time()
+    queue.run_job(job_id)
+
+    job = _job(queue, job_id)
+    assert job["status"] == "pending"
+    assert job["attempts"] == 1
+    assert job["error"] == "LLM 오류"
+    assert before + 10 <= job["next_attempt_ts"] <= time.time() + 10
+    # 재시도 시각 전에는 실행 대상이 아니고 run_job도 건너뜀
+    assert queue._runnable_job_ids() == []
+    queue.run_job(job_id)
+    assert _job(queue, job_id)["attempts"] == 1
+
+    # 두 번째 실패는 backoff가 두 배
+    queue._collection().document(job_id).update({"next_attempt_ts": 0})
+    before = time.time()
+    queue.run_job(job_id)
+    assert _job(queue, job_id)["next_attempt_ts"] >= before + 20
+
+
+def test_job_fails_after_max_attempts(queue):
+    def fail(conversation_id, payload):
+        raise RuntimeError("LLM 오류")
+    queue.register("summary", fail)
+    job_id = queue.submit("summary", "c1", {})
+
+    for _ in range(3):
+        queue._collection().document(job_id).update({"next_attempt_ts": 0})
+        queue.run_job(job_id)
+
+    job = _job(queue, job_id)
+    assert job["status"] == "failed"
+    assert job["attempts"] == 3
+    assert queue._runnable_job_ids() == []
+
+
+def test_running_job_is_skipped_until_lease_expires(queue):
+    calls = []
+    queue.register("summary", lambda conversation_id, payload: calls.append(conversation_id))
+    job_id = queue.submit("summary", "c1", {})
+    job_ref = queue._collection().document(job_id)
+
+    # 다른 인스턴스가 실행 중 (lease 유효)
+    job_ref.update({"status": "running", "owner": "other", "attempts": 1, "lease_until_ts": time.time() + 60})
+    queue.run_job(job_id)
+    assert calls == []
+    assert queue._runnable_job_ids() == []
+
+    # 그 인스턴스가 사라져 lease 만료
+    job_ref.update({"lease_until_ts": time.time() - 1})
+    assert queue._runnable_job_ids() == [job_id]
+    queue.run_job(job_id)
+    assert calls == ["c1"]
+    assert _job(queue, job_id) is None
+
+
+def test_unknown_job_type_is_marked_failed(queue):
+    job_id = queue.submit("missing", "c1", {})
+
+    queue.run_job(job_id)
+
+    assert _job(queue, job_id)["status"] == "failed"
@@ -0,0 +1,197 @@
+"""도메인 모델 테스트 (Session, Task, Message, SupervisionEntry)"""
+from services.models import Message, Session, SupervisionEntry, Task
+from services.text_codec import TextCodec
+
+
+def _session_dict():
+    return {
+        "conversation_id": "c1",
+        "current_part": 1,
+        "current_task": "task_rapport_1",
+        "message_count": 4,
+        "revision": 3,
+        "user_persona": {"type": "A"},
+        "tasks": [
+            {"id": "task_rapport_1", "part": 1, "title": "환영 및 인사", "status": "completed",
+             "template_id": "task_rapport_1@v1"},
+            {"id": "task_rapport_2", "part": 1, "title": "관계 형성하기", "status": "in_progress"},
+            {"id": "task_summary_1", "part": 3, "title": "상담 내용 요약하기", "status": "pending", "note": "추가 필드"}
+        ],
+        "supervision_log": [
+            {"message_index": 1, "score": 8, "feedback": "좋음"},
+            {"message_index": 3, "score": 5, "feedback": "첫 평가"},
+            {"message_index": 3, "score": 6, "feedback": "재평가"}
+        ]
+    }
+
+
+def test_session_round_trip_keeps_unknown_fields():
+    session = Session.from_dict(_session_dict())
+
+    data = session.to_dict()
+
+    assert data["conversation_id"] == "c1"
+    assert data["user_persona"] == {"type": "A"}
+    assert data["tasks"] == _session_dict()["tasks"]
+    assert data["supervision_log"] == _session_dict()["supervision_log"]
+    assert session.extra == {"user_persona": {"type": "A"}}
+
+
+def test_none_fields_use_defaults():
+    session = Session.from_dict({"conversation_id": "c1", "current_part": None, "status": None})
+
+    assert session.current_part == 1
+    assert session.status == "active"
+    assert session.tasks == []
+
+
+def test_task_indexes_follow_status_changes():
+    session = Session.from_dict(_session_dict())
+
+    assert [task.id for task in session.tasks_in_part(1)] == ["task_rapport_1", "task_rapport_2"]
+    assert session.task("task_summary_1").extra == {"note": "추가 필드"}
+
+    task = session.set_task_status("task_rapport_2", "sufficient")
+
+    assert task.sufficient_at is not None
+    assert [task.id for task in session.tasks_with_status("sufficient")] == ["task_rapport_2"]
+    assert session.tasks_with_status("in_progress") == []
+    assert session.set_task_status("missing", "completed") is None
+
+
+def test_task_definition_and_state_split():
+    task = Task.from_dict({"id": "t1", "part": 2, "title": "목표", "status": "completed",
+                           "completed_at": "2026-01-01T00:00:00", "note": "x"})
+
+    assert task.state() == {"status": "completed", "completed_at": "2026-01-01T00:00:00"}
+    assert "status" not in task.definition()
+    assert task.definition()["note"] == "x"
+
+
+def test_supervision_for_returns_latest_entry_and_decodes_text():
+    feedback = "공감 표현은 적절했으나 핵심 감정을 더 구체적으로 반영할 필요가 있음. " * 5
+    data = _session_dict()
+    data["supervision_log"][-1]["feedback"] = TextCodec(threshold=0, enabled=True).encode(feedback)
+    session = Session.from_dict(data)
+
+    # 조회 전에는 압축된 채로 보관
+    assert isinstance(session.supervision_log[-1].feedback, bytes)
+
+    entry = session.supervision_for(3)
+
+    assert entry.score == 6
+    assert entry.feedback == feedback
+    assert session.supervision_for(2) is None
+
+
+def test_supervision_entry_defaults_message_index():
+    entry = SupervisionEntry.from_dict({"score": 7})
+
+    assert entry.message_index == -1
+    assert entry.to_dict() == {"message_index": -1, "score": 7}
+
+
+def test_message_round_trip():
+    data = {"role": "assistant", "content": "안녕", "timestamp": None, "seq": 1, "has_metadata": True}
+
+    assert Message.from_dict(data).to_dict() == data
+
+
+def test_new_session_has_no_changes():
+    changes = Session.from_dict(_session_dict()).changes()
+
+    assert changes == {
+        "fields": {}, "task_states": {}, "appended_tasks": [], "tasks_rewritten": False, "task_definitions": None
+    }
+
+
+def test_changes_track_fields_states_and_appended_tasks():
+    session = Session.from_dict(_session_dict())
+
+    session.current_task = "task_rapport_2"
+    session.message_count = 6  # 서버 측 증가로만 반영하므로 추적하지 않음
+    session.set_task_status("task_rapport_2", "completed")
+    session.add_tasks([Task("p2_a", part=2, title="회의 긴장 줄이기")])
+    changes = session.changes()
+
+    assert changes["fields"] == {"current_task": "task_rapport_2"}
+    assert set(changes["task_states"]) == {"task_rapport_2", "p2_a"}
+    assert changes["task_states"]["task_rapport_2"]["status"] == "completed"
+    assert [task["id"] for task in changes["appended_tasks"]] == ["p2_a"]
+    assert not changes["tasks_rewritten"]
+
+    session.mark_persisted()
+    assert session.changes()["fields"] == {}
+    assert session.changes()["task_states"] == {}
+
+
+def test_changes_detect_nested_field_mutation():
+    session = Session.from_dict({**_session_dict(), "part2_selected_keywords": ["회의"]})
+
+    session.part2_selected_keywords.append("지적")
+
+    assert session.changes()["fields"] == {"part2_selected_keywords": ["회의", "지적"]}
+
+
+def test_replacing_tasks_rewrites_definitions():
+    session = Session.from_dict(_session_dict())
+
+    session.replace_tasks([session.task("task_rapport_1"), Task("p2_a", part=2, title="회의 긴장 줄이기")])
+    changes = session.changes()
+
+    assert changes["tasks_rewritten"]
+    assert changes["appended_tasks"] == []
+    assert [task["id"] for task in changes["task_definitions"]] == ["task_rapport_1", "p2_a"]
+
+
+def test_apply_changes_merges_into_latest_session():
+    mine = Session.from_dict(_session_dict())
+    mine.current_task = "task_rapport_2"
+    mine.set_task_status("task_rapport_2", "completed")
+    mine.add_tasks([Task("p2_a", part=2, title="회의 긴장 줄이기")])
+
+    # 그 사이 다른 요청이 저장한 최신 세션
+    latest = Session.from_dict({**_session_dict(), "revision": 4})
+    latest.set_task_status("task_summary_1", "in_progress")
+    latest.add_tasks([Task("p2_a", part=2, title="회의 긴장 줄이기")])
+    latest.mark_persisted()
+
+    latest.apply_changes(mine.changes())
+
+    assert latest.current_task == "task_rapport_2"
+    assert latest.task("task_rapport_2").status == "completed"
+    assert latest.task("task_summary_1").status == "in_progress"
+    assert [task.id for task in latest.tasks].count("p2_a") == 1
+    assert latest.changes()["fields"] == {"current_task": "task_rapport_2"}
+
+
+def test_apply_rewritten_tasks_keeps_latest_states():
+    """Task 목록 전체가 바뀌어도 이쪽에서 바꾸지 않은 Task 상태는 최신 값 유지"""
+    mine = Session.from_dict(_session_dict())
+    mine.replace_tasks([mine.task("task_rapport_2"), mine.task("task_summary_1")])
+
+    latest = Session.from_dict(_session_dict())
+    latest.set_task_status("task_summary_1", "sufficient")
+    latest.mark_persisted()
+
+    latest.apply_changes(mine.changes())
+
+    assert [task.id for task in latest.tasks] == ["task_rapport_2", "task_summary_1"]
+    assert latest.task("task_summary_1").status == "sufficient"
+    assert latest.tasks_with_status("sufficient") == [latest.task("task_summary_1")]
+
+
+def test_set_task_state_and_adopt():
+    session = Session.from_dict(_session_dict())
+
+    task = session.set_task_state("task_summary_1", {"status": "completed", "completed_at": "2026-01-01T00:00:00"})
+
+    assert task.completed_at == "2026-01-01T00:00:00"
+    assert session.tasks_with_status("pending") == []
+    assert session.set_task_state("missing", {"status": "completed"}) is None
+
+    other = Session.from_dict({**_session_dict(), "revision": 9})
+    session.adopt(other)
+    assert session.revision == 9
+    assert session.task("task_summary_1").status == "pending"
+    assert session.changes()["task_states"] == {}
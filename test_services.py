@@ -1,8 +1,8 @@
 """서비스 테스트 스크립트"""
 import sys
 from config import Config
-from services.llm_service import LLMService
 from services.firestore_service import FirestoreService
+from services.llm_client import LazyChatModel
 
 def test_config():
     """설정 테스트"""
@@ -38,11 +38,16 @@ def test_llm():
     """LLM 서비스 테스트"""
     print("=== LLM 서비스 테스트 ===")
     try:
-        llm_service = LLMService()
-        print("[OK] LLM 서비스 초기화 성공")
+        llm = LazyChatModel(
+            model_name=Config.VERTEX_AI_MODEL,
+            project=Config.PROJECT_ID,
+            location=Config.LOCATION,
+            max_output_tokens=200
+        )
+        print("[OK] LLM 클라이언트 초기화 성공")
         
         # 간단한 테스트 메시지
-        response = llm_service.chat("안녕하세요! 간단히 자기소개 해주세요.")
+        response = llm.invoke([("user", "안녕하세요! 간단히 자기소개 해주세요.")]).content
         print(f"[OK] LLM 응답 성공")
         print(f"응답: {response[:100]}...")
         
@@ -0,0 +1,84 @@
+"""SessionService 저장 테스트 (변경분 저장, 충돌 시 재적용) - 인메모리 저장소 백엔드 사용"""
+import pytest
+
+from config import Config
+from services import storage_backend
+from services.models import Task
+from services.session_service import SessionConflict, SessionService
+from services.storage_backend import MemoryBackend
+from services.task_templates import INITIAL_TASK_TEMPLATES, instantiate_tasks
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(storage_backend, "_backend", MemoryBackend())
+    service = SessionService()
+    service.create_session("c1")
+    service.update_tasks("c1", instantiate_tasks(INITIAL_TASK_TEMPLATES["first_session"]))
+    return service
+
+
+def test_commit_writes_only_changes(service):
+    session = service.get_session_model("c1")
+    first_task = session.tasks[0].id
+    session.current_task = first_task
+    session.set_task_status(first_task, "in_progress")
+
+    assert service.commit(session)
+    assert not service.commit(session)
+
+    saved = service.get_session_model("c1")
+    assert saved.current_task == first_task
+    assert saved.task(first_task).status == "in_progress"
+    assert saved.revision == session.revision == 2
+
+
+def test_commit_reapplies_changes_after_conflict(service):
+    """다른 요청이 먼저 저장하면 최신 세션에 같은 변경을 다시 적용해 양쪽 변경을 모두 유지"""
+    session = service.get_session_model("c1")
+    first_task, second_task = session.tasks[0].id, session.tasks[1].id
+
+    other = service.get_session_model("c1")
+    other.set_task_status(second_task, "sufficient")
+    other.add_tasks([Task("p2_a", part=2, title="회의 긴장 줄이기")])
+    service.commit(other)
+
+    session.current_task = first_task
+    session.set_task_status(first_task, "completed")
+    assert service.commit(session)
+
+    saved = service.get_session_model("c1")
+    assert saved.current_task == first_task
+    assert saved.task(first_task).status == "completed"
+    assert saved.task(second_task).status == "sufficient"
+    assert saved.task("p2_a") is not None
+    assert saved.revision == 3
+    # 호출한 쪽의 객체도 최신 상태로 갱신
+    assert session.task("p2_a") is not None
+    assert session.changes()["task_states"] == {}
+
+
+def test_commit_gives_up_after_max_attempts(service, monkeypatch):
+    monkeypatch.setattr(Config, "SESSION_COMMIT_MAX_ATTEMPTS", 1)
+    session = service.get_session_model("c1")
+    service.update_fields("c1", {"current_task": "other"}, expected_revision=1)
+
+    session.current_part = 2
+    with pytest.raises(SessionConflict):
+        service.commit(session)
+
+
+def test_mutate_reruns_on_latest_session(service):
+    stale = service.get_session_model("c1")
+    service.update_fields("c1", {"part2_task_update_count": 1}, expected_revision=1)
+    seen = []
+
+    def bump(session):
+        seen.append(session.part2_task_update_count)
+        session.part2_task_update_count += 1
+
+    result = service.mutate("c1", bump, session=stale)
+
+    assert seen == [0, 1]
+    assert result.part2_task_update_count == 2
+    assert service.get_session_model("c1").part2_task_update_count == 2
@@ -0,0 +1,196 @@
+"""로컬 저장소 백엔드 테스트 (문서 의미, 쿼리, 커서, 트랜잭션)"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.catalog_cache import CatalogCache
+from services.sqlite_backend import SqliteBackend
+from services.storage_backend import DocumentNotFound, MemoryBackend, StorageBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        return SqliteBackend(str(tmp_path / "documents.sqlite3"))
+    return MemoryBackend()
+
+
+def _seed_conversations(backend):
+    """user_id별 updated_at이 겹치는 대화 문서 (정렬 동률과 다른 사용자 포함)"""
+    base = datetime(2026, 1, 1)
+    collection = backend.collection("conversations")
+    for index, (user_id, minutes) in enumerate([("u", 0), ("u", 1), ("u", 1), ("u", 1), ("u", 2), ("v", 3)]):
+        collection.document(f"d{index}").set({
+            "user_id": user_id,
+            "updated_at": base + timedelta(minutes=minutes),
+            "message_count": index
+        })
+    return collection
+
+
+def test_storage_backend_is_abstract():
+    with pytest.raises(TypeError):
+        StorageBackend()
+
+
+def test_set_merge_and_dotted_update(backend):
+    document = backend.collection("sessions").document("s1")
+    document.set({"status": "active", "task_state": {"t1": {"status": "pending"}}})
+
+    document.set({"current_part": 2}, merge=True)
+    document.update({"task_state.t1.status": "completed", "task_state.t2": {"status": "pending"}})
+
+    assert document.get().to_dict() == {
+        "status": "active",
+        "current_part": 2,
+        "task_state": {"t1": {"status": "completed"}, "t2": {"status": "pending"}}
+    }
+
+
+def test_update_missing_document_raises(backend):
+    with pytest.raises(DocumentNotFound):
+        backend.collection("sessions").document("missing").update({"status": "active"})
+
+
+def test_increment_and_array_union(backend):
+    document = backend.collection("sessions").document("s1")
+    document.set({"version": 1, "logs": [{"a": 1}]})
+
+    document.update({"version": backend.increment(2), "logs": backend.array_union([{"a": 1}, {"b": 2}])})
+
+    assert document.get().to_dict() == {"version": 3, "logs": [{"a": 1}, {"b": 2}]}
+
+
+def test_get_with_field_paths_projects_fields(backend):
+    document = backend.collection("sessions").document("s1")
+    document.set({"version": 1, "revision": 4, "user_persona": {"type": "A", "keywords": ["x"]}})
+
+    snapshot = document.get(field_paths=["revision", "user_persona.type"])
+
+    assert snapshot.exists
+    assert snapshot.to_dict() == {"revision": 4, "user_persona": {"type": "A"}}
+
+
+def test_query_filters_orders_limits_and_selects(backend):
+    collection = _seed_conversations(backend)
+
+    query = (
+        collection.where("user_id", "==", "u")
+        .order_by("updated_at", direction=StorageBackend.DESCENDING)
+        .select(["message_count"])
+    )
+
+    results = list(query.stream())
+    assert [snapshot.id for snapshot in results] == ["d4", "d3", "d2", "d1", "d0"]
+    assert results[0].to_dict() == {"message_count": 4}
+    assert [snapshot.id for snapshot in query.limit(2).stream()] == ["d4", "d3"]
+
+
+def test_start_after_pages_through_ties(backend):
+    """정렬 값이 같은 문서가 여러 개여도 (정렬 값, 문서 ID) 기준으로 빠짐없이 페이지 이동"""
+    collection = _seed_conversations(backend)
+    query = collection.where("user_id", "==", "u").order_by("updated_at", direction=StorageBackend.DESCENDING)
+
+    seen = []
+    cursor = None
+    while True:
+        page = query if cursor is None else query.start_after(cursor)
+        ids = [snapshot.id for snapshot in page.limit(2).stream()]
+        seen.extend(ids)
+        if len(ids) < 2:
+            break
+        cursor = collection.document(ids[-1]).get(field_paths=["updated_at"])
+
+    assert seen == ["d4", "d3", "d2", "d1", "d0"]
+
+
+def test_start_after_uses_cursor_values_when_cursor_document_is_gone(backend):
+    """커서 문서가 삭제되어도 Firestore처럼 커서의 정렬 값 뒤부터 반환"""
+    collection = _seed_conversations(backend)
+    query = collection.where("user_id", "==", "u").order_by("updated_at", direction=StorageBackend.DESCENDING)
+    cursor = collection.document("d2").get(field_paths=["updated_at"])
+
+    collection.document("d2").delete()
+
+    assert [snapshot.id for snapshot in query.start_after(cursor).stream()] == ["d1", "d0"]
+
+
+def test_start_after_cursor_outside_filter(backend):
+    """필터에 맞지 않는 문서를 커서로 써도 값 기준으로 위치가 정해짐"""
+    collection = _seed_conversations(backend)
+    query = collection.where("user_id", "==", "u").order_by("updated_at")
+    cursor = collection.document("d5").get(field_paths=["updated_at"])
+
+    assert list(query.start_after(cursor).stream()) == []
+
+
+def test_transaction_returns_result_and_applies_writes_together(backend):
+    counter = backend.collection("counters").document("c1")
+    counter.set({"value": 1})
+
+    def bump(transaction):
+        value = counter.get(transaction=transaction).to_dict()["value"]
+        transaction.update(counter, {"value": value + 1})
+        transaction.set(backend.collection("counters").document("c2"), {"value": value})
+        return value
+
+    assert backend.run_transaction(bump) == 1
+    assert counter.get().to_dict() == {"value": 2}
+    assert backend.collection("counters").document("c2").get().to_dict() == {"value": 1}
+
+
+def test_failed_transaction_writes_nothing(backend):
+    counter = backend.collection("counters").document("c1")
+    counter.set({"value": 1})
+
+    def fail(transaction):
+        transaction.update(counter, {"value": 100})
+        raise RuntimeError("abort")
+
+    with pytest.raises(RuntimeError):
+        backend.run_transaction(fail)
+    assert counter.get().to_dict() == {"value": 1}
+
+
+def test_subcollections(backend):
+    conversation = backend.collection("conversations").document("c1")
+    conversation.set({"user_id": "u"})
+    conversation.collection("message_meta").document("00000001").set({"seq": 1})
+
+    assert [collection.id for collection in conversation.collections()] == ["message_meta"]
+    assert [collection.id for collection in backend.collections()] == ["conversations"]
+
+
+def test_on_snapshot_receives_changes_until_unsubscribed():
+    """Firestore처럼 등록 시 현재 상태(문서가 없으면 None)를 먼저 전달"""
+    backend = MemoryBackend()
+    document = backend.collection("cache_versions").document("modules")
+    received = []
+    watch = document.on_snapshot(lambda snapshots, changes, read_time: received.extend(
+        snapshot.to_dict() for snapshot in snapshots
+    ))
+
+    document.set({"version": 1})
+    watch.unsubscribe()
+    document.set({"version": 2})
+
+    assert received == [None, {"version": 1}]
+
+
+def test_sqlite_backend_does_not_support_listeners(tmp_path):
+    """SQLite 백엔드에서는 CatalogCache가 리스너 대신 주기 확인 사용"""
+    backend = SqliteBackend(str(tmp_path / "documents.sqlite3"))
+    cache = CatalogCache(backend, "modules", lambda: {}, use_listener=True)
+
+    assert not backend.supports_listeners
+    assert cache._watch is None
+    assert CatalogCache(MemoryBackend(), "modules", lambda: {}, use_listener=True)._watch is not None
+
+
+def test_sqlite_backend_persists_across_connections(tmp_path):
+    path = str(tmp_path / "documents.sqlite3")
+    SqliteBackend(path).collection("sessions").document("s1").set({"updated_at": datetime(2026, 1, 1)})
+
+    snapshot = SqliteBackend(path).collection("sessions").document("s1").get()
+
+    assert snapshot.to_dict() == {"updated_at": datetime(2026, 1, 1)}
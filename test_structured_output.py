@@ -0,0 +1,186 @@
+"""구조화 출력 파싱/검증 테스트"""
+from types import SimpleNamespace
+
+import pytest
+
+from config import Config
+from services.structured_output import (
+    StructuredOutputError, choice_schema, decode_choice, get_structured_output_metrics, invoke_structured,
+    parse_partial_object, parse_structured_output, validate_schema
+)
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "status": {"type": "string", "enum": ["P", "I", "S", "C"]},
+        "task": choice_schema(3),
+        "keywords": {"type": "array", "items": {"type": "string"}, "max_items": 2},
+        "done": {"type": "boolean"},
+        "reason": {"type": "string"}
+    },
+    "required": ["status", "task"],
+    "property_ordering": ["status", "task", "keywords", "done", "reason"]
+}
+
+
+def test_valid_value_passes():
+    validate_schema({"status": "S", "task": 3, "keywords": ["회의"], "done": False}, SCHEMA)
+
+
+@pytest.mark.parametrize("value, message", [
+    ({"status": "S"}, "$.task: 필수 필드 없음"),
+    ({"status": "X", "task": 1}, "$.status"),
+    ({"status": "S", "task": 4}, "$.task: 4 > 3"),
+    ({"status": "S", "task": True}, "$.task: integer가 아님"),
+    ({"status": "S", "task": 1, "keywords": ["a", "b", "c"]}, "$.keywords: 항목 수 3 > 2"),
+    ({"status": "S", "task": 1, "keywords": [1]}, "$.keywords[0]: string이 아님"),
+    ([], "$: object가 아님")
+])
+def test_schema_errors_name_the_path(value, message):
+    with pytest.raises(StructuredOutputError) as error:
+        validate_schema(value, SCHEMA)
+
+    assert error.value.reason == "schema_error"
+    assert message in str(error.value)
+
+
+def test_parse_strips_code_fence_and_records_outcomes():
+    service = "test_parse"
+
+    value = parse_structured_output(service, '```json\n{"status": "C", "task": 2}\n```', SCHEMA)
+    assert value == {"status": "C", "task": 2}
+
+    with pytest.raises(StructuredOutputError) as error:
+        parse_structured_output(service, '{"status": "C",', SCHEMA)
+    assert error.value.reason == "invalid_json"
+    assert error.value.text == '{"status": "C",'
+
+    with pytest.raises(StructuredOutputError):
+        parse_structured_output(service, '{"status": "C"}', SCHEMA)
+
+    stats = get_structured_output_metrics().snapshot()[service]
+    assert (stats["ok"], stats["invalid_json"], stats["schema_error"]) == (1, 1, 1)
+    assert stats["parse_failure_rate"] == round(2 / 3, 4)
+
+
+def test_decode_choice():
+    options = ["task_a", "task_b"]
+
+    assert decode_choice(2, options) == "task_b"
+    assert decode_choice(0, options) is None
+    assert decode_choice(3, options) is None
+
+
+class FakeStream:
+    """청크를 하나씩 내보내고 close() 여부와 읽은 청크 수를 기록"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield SimpleNamespace(content=chunk)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeLLM:
+    def __init__(self, text, chunk_size=6):
+        self.text = text
+        self.stream_result = FakeStream([text[i:i + chunk_size] for i in range(0, len(text), chunk_size)])
+        self.calls = []
+
+    def invoke(self, messages, **kwargs):
+        self.calls.append(("invoke", kwargs))
+        return SimpleNamespace(content=self.text)
+
+    def stream(self, messages, **kwargs):
+        self.calls.append(("stream", kwargs))
+        return self.stream_result
+
+
+FULL_OUTPUT = '{"status": "S", "task": 2, "keywords": ["회의"], "reason": "목표를 구체적으로 말함"}'
+
+
+def _ready(fields):
+    return "status" in fields and "task" in fields
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('', {}),
+    ('{"status": "S", "ta', {"status": "S"}),
+    # 숫자는 뒤에 , 또는 }가 와야 끝난 값
+    ('{"status": "S", "task": 2', {"status": "S"}),
+    ('{"status": "S", "task": 2,', {"status": "S", "task": 2}),
+    ('{"keywords": ["회의", "지', {}),
+    ('```json\n{"done": true}', {"done": True}),
+    ('{"status": "S"}', {"status": "S"})
+])
+def test_parse_partial_object(text, expected):
+    assert parse_partial_object(text) == expected
+
+
+def test_early_exit_closes_stream_once_ready(monkeypatch):
+    monkeypatch.setattr(Config, "CLASSIFIER_EARLY_EXIT", True)
+    llm = FakeLLM(FULL_OUTPUT)
+
+    value, text = invoke_structured("test_early_exit", llm, [], SCHEMA, ready=_ready)
+
+    assert value == {"status": "S", "task": 2}
+    assert llm.calls[0][0] == "stream"
+    assert llm.calls[0][1]["response_mime_type"] == "application/json"
+    assert llm.stream_result.closed
+    assert llm.stream_result.read < len(llm.stream_result.chunks)
+    assert FULL_OUTPUT.startswith(text)
+    stats = get_structured_output_metrics().snapshot()["test_early_exit"]
+    assert (stats["ok"], stats["early_exit"]) == (1, 1)
+
+
+def test_stream_falls_back_to_full_parse(monkeypatch):
+    """끝까지 ready를 만족하지 않으면 전체 응답을 스키마 검증해 반환"""
+    monkeypatch.setattr(Config, "CLASSIFIER_EARLY_EXIT", True)
+    llm = FakeLLM(FULL_OUTPUT)
+
+    value, text = invoke_structured("test_fallback", llm, [], SCHEMA, ready=lambda fields: False)
+
+    assert value["reason"] == "목표를 구체적으로 말함"
+    assert text == FULL_OUTPUT
+    assert llm.stream_result.closed
+    assert get_structured_output_metrics().snapshot()["test_fallback"]["early_exit"] == 0
+
+
+def test_invalid_streamed_field_fails_immediately(monkeypatch):
+    monkeypatch.setattr(Config, "CLASSIFIER_EARLY_EXIT", True)
+    llm = FakeLLM('{"status": "X", "task": 2, "reason": "..."}')
+
+    with pytest.raises(StructuredOutputError) as error:
+        invoke_structured("test_invalid_stream", llm, [], SCHEMA, ready=_ready)
+
+    assert error.value.reason == "schema_error"
+    assert llm.stream_result.closed
+    assert get_structured_output_metrics().snapshot()["test_invalid_stream"]["schema_error"] == 1
+
+
+def test_early_exit_disabled_uses_invoke(monkeypatch):
+    monkeypatch.setattr(Config, "CLASSIFIER_EARLY_EXIT", False)
+    llm = FakeLLM(FULL_OUTPUT)
+
+    value, _ = invoke_structured("test_disabled", llm, [], SCHEMA, ready=_ready)
+
+    assert [call[0] for call in llm.calls] == ["invoke"]
+    assert value["keywords"] == ["회의"]
+
+
+def test_llm_error_is_recorded():
+    class BrokenLLM:
+        def invoke(self, messages, **kwargs):
+            raise RuntimeError("quota")
+
+    with pytest.raises(RuntimeError):
+        invoke_structured("test_llm_error", BrokenLLM(), [], SCHEMA)
+
+    assert get_structured_output_metrics().snapshot()["test_llm_error"]["llm_error"] == 1
@@ -0,0 +1,49 @@
+"""Task 템플릿 축약/복원 테스트"""
+from services.task_templates import (
+    INITIAL_TASK_TEMPLATES, PART3_TASK_TEMPLATES, TASK_TEMPLATES, compact_tasks, expand_tasks, instantiate_tasks
+)
+
+
+def test_instantiate_tasks_copies_templates_as_pending():
+    tasks = instantiate_tasks(INITIAL_TASK_TEMPLATES["first_session"])
+
+    assert [task["id"] for task in tasks] == ["task_rapport_1", "task_rapport_2"]
+    assert all(task["status"] == "pending" for task in tasks)
+    assert tasks[0]["template_id"] == "task_rapport_1@v1"
+
+    # 반환된 Task를 바꿔도 템플릿은 그대로
+    tasks[0]["title"] = "변경"
+    assert TASK_TEMPLATES["task_rapport_1@v1"]["title"] == "환영 및 인사"
+
+
+def test_compact_keeps_only_fields_that_differ_from_template():
+    task = instantiate_tasks(["task_goal_1@v1"])[0]
+    task["status"] = "completed"
+    task["completed_at"] = "2026-01-01T00:00:00"
+
+    assert compact_tasks([task]) == [{
+        "template_id": "task_goal_1@v1",
+        "status": "completed",
+        "completed_at": "2026-01-01T00:00:00"
+    }]
+
+
+def test_round_trip_with_overrides_and_untemplated_tasks():
+    """템플릿과 다른 값, 템플릿 없는 Task(Part 2 생성 Task)도 그대로 복원"""
+    tasks = instantiate_tasks(PART3_TASK_TEMPLATES)
+    tasks[1]["description"] = "내담자와 합의한 목표를 구체화"
+    tasks.append({"id": "p2_a", "part": 2, "title": "회의 긴장 줄이기", "status": "in_progress"})
+
+    compacted = compact_tasks(tasks)
+
+    assert "title" not in compacted[0]
+    assert compacted[1]["description"] == "내담자와 합의한 목표를 구체화"
+    assert compacted[-1] == tasks[-1]
+    assert expand_tasks(compacted) == tasks
+
+
+def test_expand_unknown_template_keeps_stored_fields():
+    """없는 템플릿 버전은 저장된 필드만으로 복원하고 id는 template_id에서 가져옴"""
+    stored = [{"template_id": "task_removed@v9", "status": "sufficient"}]
+
+    assert expand_tasks(stored) == [{"id": "task_removed", "template_id": "task_removed@v9", "status": "sufficient"}]
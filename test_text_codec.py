@@ -0,0 +1,68 @@
+"""TextCodec 테스트"""
+import zlib
+
+from services.text_codec import TextCodec
+
+TRANSCRIPT = "\n".join(
+    f"[User]\n{index}번째 턴: 요즘 회의 때마다 지적을 받아서 출근이 힘들어요.\n"
+    f"[Assistant]\n여러 사람 앞에서 지적받으면 창피함이 오래 남을 것 같아. 그때 어떤 생각이 들어?"
+    for index in range(20)
+)
+
+
+def test_round_trip_uses_marker():
+    codec = TextCodec(threshold=100, enabled=True)
+
+    encoded = codec.encode(TRANSCRIPT)
+
+    assert isinstance(encoded, bytes)
+    assert encoded.startswith(TextCodec.MARKER)
+    assert len(encoded) < len(TRANSCRIPT.encode("utf-8"))
+    assert codec.decode(encoded) == TRANSCRIPT
+    # 설정과 무관하므로 클래스에서도 복원 가능
+    assert TextCodec.decode(encoded) == TRANSCRIPT
+
+
+def test_short_text_and_non_strings_are_kept():
+    codec = TextCodec(threshold=1024, enabled=True)
+
+    assert codec.encode("짧은 피드백") == "짧은 피드백"
+    assert codec.encode(None) is None
+    assert codec.encode(7) == 7
+
+
+def test_incompressible_text_is_kept():
+    """압축해도 작아지지 않으면 원문 유지"""
+    codec = TextCodec(threshold=0, enabled=True)
+    text = "가나다"
+
+    assert codec.encode(text) == text
+
+
+def test_disabled_codec_still_decodes():
+    encoded = TextCodec(threshold=0, enabled=True).encode(TRANSCRIPT)
+    disabled = TextCodec(threshold=0, enabled=False)
+
+    assert disabled.encode(TRANSCRIPT) == TRANSCRIPT
+    assert disabled.decode(encoded) == TRANSCRIPT
+
+
+def test_decode_passes_through_legacy_values():
+    """압축 전 문서의 문자열과 MARKER가 없는 바이트는 그대로"""
+    raw = zlib.compress(TRANSCRIPT.encode("utf-8"))
+
+    assert TextCodec.decode(TRANSCRIPT) == TRANSCRIPT
+    assert TextCodec.decode(raw) == raw
+
+
+def test_fields_and_entries():
+    codec = TextCodec(threshold=100, enabled=True)
+    data = {"prompt": TRANSCRIPT, "current_part": 1}
+
+    encoded = codec.encode_fields(data, ("prompt", "missing"))
+    entries = codec.encode_entries([{"feedback": TRANSCRIPT, "score": 6}, "legacy"], ("feedback",))
+
+    assert data["prompt"] == TRANSCRIPT  # 원본은 바뀌지 않음
+    assert isinstance(encoded["prompt"], bytes)
+    assert codec.decode_fields(encoded, ("prompt",)) == data
+    assert codec.decode_entries(entries, ("feedback",)) == [{"feedback": TRANSCRIPT, "score": 6}, "legacy"]
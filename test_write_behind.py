@@ -0,0 +1,162 @@
+"""WriteBehindService 테스트 (outbox 순서, 재시도, dead_letter와 대화 차단)"""
+import threading
+
+import pytest
+
+from config import Config
+from services.write_behind_service import ConversationBlocked, WriteBehindDelayed, WriteBehindService
+
+
+class FakeFirestore:
+    """add_message만 흉내내는 저장소 (failing인 대화는 저장 실패)"""
+
+    def __init__(self):
+        self.messages = []
+        self.failing = set()
+        self.lock = threading.Lock()
+
+    def add_message(self, conversation_id, role, content, metadata=None, expected_seq=None):
+        if conversation_id in self.failing:
+            raise IOError("저장소 장애")
+        with self.lock:
+            self.messages.append((conversation_id, expected_seq, content))
+        return expected_seq
+
+
+class FakeSessionService:
+    def __init__(self):
+        self.writes = []
+
+    def update_fields(self, conversation_id, fields):
+        self.writes.append((conversation_id, "fields", fields))
+
+    def append_log(self, conversation_id, field, entry):
+        self.writes.append((conversation_id, field, entry.get("status")))
+
+
+@pytest.fixture
+def store():
+    return FakeFirestore()
+
+
+@pytest.fixture
+def sessions():
+    return FakeSessionService()
+
+
+@pytest.fixture
+def make_service(tmp_path, store, sessions, monkeypatch):
+    monkeypatch.setattr(Config, "WRITE_BEHIND_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(WriteBehindService, "MAX_BACKOFF", 0)
+
+    def make():
+        return WriteBehindService(store, sessions, str(tmp_path / "outbox.sqlite3"))
+    return make
+
+
+def test_items_are_applied_in_order_per_conversation(make_service, store, sessions):
+    service = make_service()
+
+    service.enqueue_message("c1", "assistant", "첫 응답", expected_seq=1)
+    service.enqueue_session_fields("c1", {"message_count": 2})
+    service.enqueue_session_log("c1", "completion_log", {"status": "S"})
+    service.enqueue_message("c1", "assistant", "두 번째 응답", expected_seq=3)
+    service.flush_conversation("c1", timeout=5)
+
+    assert not service.has_pending("c1")
+    assert store.messages == [("c1", 1, "첫 응답"), ("c1", 3, "두 번째 응답")]
+    assert sessions.writes == [("c1", "fields", {"message_count": 2}), ("c1", "completion_log", "S")]
+
+
+def test_failing_conversation_does_not_block_others(make_service, store):
+    store.failing.add("c1")
+    service = make_service()
+
+    service.enqueue_message("c1", "assistant", "실패", expected_seq=1)
+    service.enqueue_message("c2", "assistant", "성공", expected_seq=1)
+    service.flush_conversation("c2", timeout=5)
+
+    assert store.messages == [("c2", 1, "성공")]
+
+
+def test_flush_timeout_raises_retryable_error(make_service, store, monkeypatch):
+    # 재시도 대기 중에 시간 초과 (바로 재시도하면 dead_letter로 가서 읽기가 통과할 수 있음)
+    monkeypatch.setattr(WriteBehindService, "MAX_BACKOFF", 60)
+    store.failing.add("c1")
+    service = make_service()
+    service.enqueue_message("c1", "assistant", "지연", expected_seq=1)
+
+    with pytest.raises(WriteBehindDelayed):
+        service.flush_conversation("c1", timeout=0.2)
+    assert service.has_pending("c1")
+
+
+def test_dead_lettered_message_blocks_conversation(make_service, store, sessions):
+    """메시지가 dead_letter로 가면 뒤 항목도 함께 옮겨 순번이 비지 않게 하고 새 쓰기를 막음"""
+    store.failing.add("c1")
+    service = make_service()
+    service.enqueue_message("c1", "assistant", "첫 응답", expected_seq=1)
+    service.enqueue_session_fields("c1", {"message_count": 2})
+
+    # 읽기는 남은 항목이 없으면 바로 진행
+    service.flush_conversation("c1", timeout=10)
+
+    assert service.is_blocked("c1")
+    assert not service.has_pending("c1")
+    assert sessions.writes == []
+    with pytest.raises(ConversationBlocked):
+        service.flush_conversation("c1", timeout=1, for_write=True)
+
+    # 차단 중에 끝난 턴의 쓰기도 반영하지 않고 쌓아 둠
+    service.enqueue_session_log("c1", "completion_log", {"status": "C"})
+    assert not service.has_pending("c1")
+
+    # 재시작해도 차단 유지
+    assert make_service().is_blocked("c1")
+
+
+def test_requeue_dead_letter_replays_in_order_and_unblocks(make_service, store, sessions):
+    store.failing.add("c1")
+    service = make_service()
+    service.enqueue_message("c1", "assistant", "첫 응답", expected_seq=1)
+    service.enqueue_session_fields("c1", {"message_count": 2})
+    service.flush_conversation("c1", timeout=10)
+    service.enqueue_session_log("c1", "completion_log", {"status": "C"})
+
+    store.failing.clear()
+    assert service.requeue_dead_letter("c1") == 3
+    service.flush_conversation("c1", timeout=5, for_write=True)
+
+    assert not service.is_blocked("c1")
+    assert store.messages == [("c1", 1, "첫 응답")]
+    assert sessions.writes == [("c1", "fields", {"message_count": 2}), ("c1", "completion_log", "C")]
+
+
+def test_dead_lettered_session_write_does_not_block(make_service, store, sessions, monkeypatch):
+    """세션 쓰기만 실패한 경우 그 항목만 dead_letter로 옮기고 다음 항목은 계속 반영"""
+    def fail(conversation_id, fields):
+        raise IOError("저장소 장애")
+    monkeypatch.setattr(sessions, "update_fields", fail)
+    service = make_service()
+
+    service.enqueue_session_fields("c1", {"message_count": 2})
+    service.enqueue_message("c1", "assistant", "다음 응답", expected_seq=3)
+    service.flush_conversation("c1", timeout=10, for_write=True)
+
+    assert not service.is_blocked("c1")
+    assert store.messages == [("c1", 3, "다음 응답")]
+
+
+def test_restart_replays_remaining_items(tmp_path, store, sessions, monkeypatch):
+    monkeypatch.setattr(Config, "WRITE_BEHIND_MAX_ATTEMPTS", 1000)
+    path = str(tmp_path / "outbox.sqlite3")
+    # 반영하지 못한 채 종료된 인스턴스 (계속 실패하는 별도 저장소)
+    unavailable = FakeFirestore()
+    unavailable.failing.add("c1")
+    WriteBehindService(unavailable, sessions, path).enqueue_message("c1", "assistant", "남은 응답", expected_seq=1)
+
+    restarted = WriteBehindService(store, sessions, path)
+
+    assert restarted.has_pending("c1")
+    restarted.flush_conversation("c1", timeout=5)
+    assert store.messages == [("c1", 1, "남은 응답")]
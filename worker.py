@@ -0,0 +1,22 @@
+"""
+백그라운드 작업 워커
+
+JOB_EXECUTION_MODE=worker일 때 웹 서버와 별도로 실행해 작업 큐(background_jobs)의
+Supervision / Part 전환 / Part 2 Task 업데이트 작업을 처리한다.
+웹 서버와 같은 STORAGE_BACKEND 설정을 사용해야 한다.
+
+사용 예:
+    JOB_EXECUTION_MODE=worker python worker.py
+"""
+from services.counselor_service import CounselorService
+from services.log_setup import configure_logging
+
+
+def main() -> None:
+    configure_logging()
+    counselor_service = CounselorService()
+    counselor_service.jobs.run_worker()
+
+
+if __name__ == "__main__":
+    main()